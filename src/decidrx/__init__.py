@@ -1 +1 @@
-__version__ = "0.2.1"
\ No newline at end of file
+__version__ = "0.2.1"
@@ -0,0 +1,630 @@
+"""Embeddable Python API.
+
+A :class:`Session` keeps one database connection open and exposes typed
+operations that return plain data objects instead of rendered tables. The CLI
+commands are thin wrappers over it, so scripts can do the same work without
+per-call setup::
+
+    from decidrx.api import Session
+
+    with Session("/path/to/decidrx.db") as s:
+        t = s.add("Write report", deadline=2, duration=45, reward=7)
+        for r in s.rank(limit=3):
+            print(r.score, r.task.title)
+        s.done(t.id)
+
+Invalid input raises ValueError (FilterError for bad `where` expressions).
+"""
+import calendar as _calendar
+import heapq
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from decidrx import db as _db
+from decidrx.deps import effective_deadlines
+from decidrx.filters import AllOf, IdFilter, build_filter
+from decidrx.profiling import phase
+from decidrx.records import Task
+from decidrx.recurrence import expand_series
+from decidrx.scoring import aggregate_task_for_scoring, score_task
+
+DeadlineArg = Union[datetime, int, float, None]
+
+# fields `Session.edit` may change
+EDITABLE = ("title", "deadline", "description", "duration", "reward", "penalty", "effort", "type", "parent_id")
+
+
+class Ranked:
+    """A `rank` entry. For an aggregated parent, `score` covers the parent plus its subtasks."""
+
+    __slots__ = ("task", "score", "aggregate", "children")
+
+    def __init__(self, task: Task, score: float, aggregate: bool = False, children: Optional[List[Task]] = None):
+        self.task = task
+        self.score = score
+        self.aggregate = aggregate
+        self.children = children or []
+
+    def __repr__(self):
+        return f"Ranked({self.task!r}, score={self.score:.3f}, aggregate={self.aggregate})"
+
+
+class QuickWin:
+    """A `quick` entry; `parent_title` is set for subtasks."""
+
+    __slots__ = ("task", "score", "parent_title")
+
+    def __init__(self, task: Task, score: float, parent_title: Optional[str] = None):
+        self.task = task
+        self.score = score
+        self.parent_title = parent_title
+
+    def __repr__(self):
+        return f"QuickWin({self.task!r}, score={self.score:.3f})"
+
+
+class TreeNode:
+    """A task with its subtasks, as returned by `tree`."""
+
+    __slots__ = ("task", "children")
+
+    def __init__(self, task: Task, children: Optional[List["TreeNode"]] = None):
+        self.task = task
+        self.children = children or []
+
+    def walk(self, depth: int = 0):
+        """Yield (node, depth) depth-first."""
+        yield self, depth
+        for c in self.children:
+            yield from c.walk(depth + 1)
+
+    def __repr__(self):
+        return f"TreeNode({self.task!r}, children={len(self.children)})"
+
+
+class DoneResult:
+    """Outcome of `done`: the completed task id and, for recurring tasks, the next occurrence."""
+
+    __slots__ = ("task_id", "next")
+
+    def __init__(self, task_id: int, next: Optional[Task] = None):
+        self.task_id = task_id
+        self.next = next
+
+
+class MonthView:
+    """Deadline counts and minutes per local day (recurring occurrences included) and blocked days of a month."""
+
+    __slots__ = ("year", "month", "counts", "blocked", "minutes")
+
+    def __init__(self, year: int, month: int, counts: Dict[date, int], blocked: Dict[date, Optional[str]],
+                 minutes: Optional[Dict[date, int]] = None):
+        self.year = year
+        self.month = month
+        self.counts = counts
+        self.blocked = blocked
+        # summed durations of the deadlines counted in `counts`
+        self.minutes = minutes if minutes is not None else {}
+
+    def weeks(self) -> List[List[Optional[date]]]:
+        """Monday-first weeks of the month; days outside it are None."""
+        cal = _calendar.Calendar(firstweekday=0)
+        return [[d if d.month == self.month else None for d in week] for week in cal.monthdatescalendar(self.year, self.month)]
+
+
+class AgendaDay:
+    """One day of `agenda`: its tasks by score, best first, and whether the day is blocked.
+
+    `upcoming` holds the ids among `ranked` that are future occurrences of recurring
+    series, computed from their rule rather than stored.
+    """
+
+    __slots__ = ("day", "ranked", "blocked", "reason", "upcoming")
+
+    def __init__(self, day: date, ranked: List[Ranked], blocked: bool = False, reason: Optional[str] = None,
+                 upcoming: Optional[set] = None):
+        self.day = day
+        self.ranked = ranked
+        self.blocked = blocked
+        self.reason = reason
+        self.upcoming = upcoming or set()
+
+    def __repr__(self):
+        return f"AgendaDay({self.day}, tasks={len(self.ranked)}, blocked={self.blocked})"
+
+
+class Forecast:
+    """Pending minutes due by each day of a horizon against the minutes available by then.
+
+    `due[i]` is what falls due on `days[i]`, `demand[i]` and `supply[i]` are the
+    running totals through that day. `demand` starts with the overdue backlog, and
+    blocked days add no capacity. `first_short` is the index of the first day whose
+    demand exceeds its supply (None when everything fits).
+    """
+
+    __slots__ = ("days", "capacity", "due", "demand", "supply", "blocked", "overdue", "first_short")
+
+    def __init__(self, days: List[date], capacity: int, due: List[int], demand: List[int], supply: List[int],
+                 blocked: Dict[date, Optional[str]], overdue: tuple = (0, 0), first_short: Optional[int] = None):
+        self.days = days
+        self.capacity = capacity
+        self.due = due
+        self.demand = demand
+        self.supply = supply
+        self.blocked = blocked
+        # (count, minutes) of pending tasks already past their deadline
+        self.overdue = overdue
+        self.first_short = first_short
+
+    def slack(self, i: int) -> int:
+        """Minutes to spare through `days[i]` (negative: short by that much)."""
+        return self.supply[i] - self.demand[i]
+
+    def tightest(self) -> Optional[int]:
+        """Index of the day with the least slack, the earliest on a tie."""
+        if not self.days:
+            return None
+        return min(range(len(self.days)), key=self.slack)
+
+
+def _midnight_utc(d: date, tz=None) -> datetime:
+    """The UTC instant `d` starts in `tz` (None: the system's local time on that date)."""
+    start = datetime(d.year, d.month, d.day, tzinfo=tz) if tz else datetime(d.year, d.month, d.day).astimezone()
+    return start.astimezone(timezone.utc)
+
+
+def _deadline_value(deadline: DeadlineArg) -> Optional[datetime]:
+    """Accept a datetime or a number of days from now (the CLI's --deadline); returns UTC.
+
+    Deadlines are stored and compared as UTC ISO strings, so an aware datetime is
+    converted, and a naive one is taken to be UTC already.
+    """
+    if deadline is None:
+        return None
+    if isinstance(deadline, datetime):
+        return deadline.astimezone(timezone.utc) if deadline.tzinfo else deadline.replace(tzinfo=timezone.utc)
+    if deadline < 0:
+        raise ValueError("Deadline must be >= 0.")
+    return datetime.now(timezone.utc) + timedelta(days=deadline)
+
+
+def _filter_key(flt):
+    """Hashable identity of a compiled filter, for `Database.cached`."""
+    if flt is None:
+        return None
+    clause, params = flt.sql()
+    return clause, tuple(params)
+
+
+def _score_into(out: list, t: Task, children_map, inherited, now: datetime):
+    """Append the (score, task, aggregate) entries of one pending task: itself and, with subtasks, its aggregate."""
+    if t.id in inherited:
+        t = t.replace(deadline=inherited[t.id])
+    out.append((score_task(t, now), t, False))
+    children = children_map.get(t.id)
+    if children:
+        children = [c.replace(deadline=inherited[c.id]) if c.id in inherited else c for c in children]
+        try:
+            agg = aggregate_task_for_scoring(t, children)
+            out.append((score_task(agg, now), t, True))
+        except Exception:
+            # fall back to base behaviour on any error
+            pass
+
+
+def _check_fields(fields: dict):
+    if fields.get("duration") is not None and fields["duration"] < 0:
+        raise ValueError("Duration must be >= 0.")
+    for name in ("reward", "penalty", "effort"):
+        v = fields.get(name)
+        if v is not None and (v < 0 or v > 10):
+            raise ValueError(f"{name.capitalize()} must be between 0 and 10.")
+    if "type" in fields and fields["type"] not in ("deep", "shallow"):
+        raise ValueError("Type must be 'deep' or 'shallow'.")
+    if "title" in fields and not (fields["title"] or "").strip():
+        raise ValueError("Title must not be empty.")
+
+
+class Session:
+    """A long-lived handle on one decidrx database.
+
+    `path` defaults to $DECIDRX_DB or the per-user database. Inside `decidrx batch` the
+    batch's shared connection is reused. Each write commits on its own unless wrapped in
+    :meth:`transaction`.
+    """
+
+    def __init__(self, path: Optional[str] = None, db: Optional["_db.Database"] = None):
+        self.db = db or _db.get_database(path)
+        self._owns = db is None and self.db is not _db.shared()
+
+    def close(self):
+        if self._owns:
+            self.db.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def transaction(self):
+        """Context manager grouping several operations into one commit."""
+        return self.db.transaction()
+
+    # -- single tasks --------------------------------------------------------
+    def get(self, task_id: int) -> Optional[Task]:
+        return self.db.get_task(task_id)
+
+    def _require(self, task_id: int) -> Task:
+        task = self.get(task_id)
+        if task is None:
+            raise ValueError(f"No task with id {task_id}")
+        return task
+
+    def add(self, title: str, deadline: DeadlineArg = None, *, description: Optional[str] = None, duration: int = 0,
+            reward: int = 0, penalty: int = 0, effort: int = 0, type: str = "shallow", parent_id: Optional[int] = None,
+            tags: Optional[Iterable[str]] = None, recur: Optional[str] = None) -> Task:
+        """Create a task; `deadline` is a datetime or a number of days from now."""
+        _check_fields(dict(title=title, duration=duration, reward=reward, penalty=penalty, effort=effort, type=type))
+        deadline_dt = _deadline_value(deadline)
+        with self.db.transaction():
+            task_id = self.db.add_task(title=title, deadline=deadline_dt, description=description, duration=duration,
+                                       reward=reward, penalty=penalty, effort=effort, type=type, parent_id=parent_id,
+                                       recur=recur)
+            if tags:
+                self.db.add_tags(task_id, tags)
+        return self.get(task_id)
+
+    def edit(self, task_id: int, **fields) -> Task:
+        """Update the given fields (see EDITABLE); `deadline` may be a datetime, days from now, or None."""
+        unknown = set(fields) - set(EDITABLE)
+        if unknown:
+            raise ValueError(f"Cannot edit: {', '.join(sorted(unknown))}")
+        self._require(task_id)
+        _check_fields(fields)
+        if "deadline" in fields:
+            fields["deadline"] = _deadline_value(fields["deadline"])
+        if fields.get("parent_id") is not None and self.db.get_task(fields["parent_id"]) is None:
+            raise ValueError(f"parent_id {fields['parent_id']} does not exist")
+        if fields:
+            self.db.update_task(task_id, **fields)
+        return self.get(task_id)
+
+    def done(self, task_id: int) -> DoneResult:
+        """Mark a task done; for a recurring task the next occurrence is returned as well."""
+        self._require(task_id)
+        next_id = self.db.mark_done(task_id)
+        return DoneResult(task_id, self.get(next_id) if next_id is not None else None)
+
+    def done_where(self, where: Optional[str] = None, tags: Optional[Iterable[str]] = None) -> List[int]:
+        """Mark every pending task matching the filter done; returns the matched ids."""
+        flt = build_filter(where, tags)
+        if flt is None:
+            raise ValueError("A filter is required")
+        ids = [t.id for t in self.db.find_tasks(flt, columns=("id",))]
+        with self.db.transaction():
+            for tid in ids:
+                # a parent may already have been completed by propagation from its last child
+                t = self.db.get_task(tid)
+                if t is not None and not t["completed"]:
+                    self.db.mark_done(tid)
+        return ids
+
+    def remove(self, task_id: int, cascade: bool = False) -> int:
+        """Delete a task (with its subtasks when `cascade`); returns how many tasks were deleted."""
+        self._require(task_id)
+        return self.db.delete_task(task_id, cascade=cascade)
+
+    # -- listings ------------------------------------------------------------
+    def tasks(self, where: Optional[str] = None, tags: Optional[Iterable[str]] = None,
+              include_completed: bool = False) -> List[Task]:
+        """Matching tasks ordered by id (descriptions shortened as in listings)."""
+        return self.db.find_tasks(build_filter(where, tags), include_completed=include_completed, columns=_db.LIST_COLUMNS)
+
+    def rank(self, limit: Optional[int] = 5, where: Optional[str] = None, tags: Optional[Iterable[str]] = None,
+             ready: bool = False, now: Optional[datetime] = None) -> List[Ranked]:
+        """Pending tasks by score, best first; parents also get an aggregated entry with their subtasks."""
+        flt = build_filter(where, tags, ready)
+
+        def load():
+            tasks = self.db.get_pending_tasks(where=flt, columns=_db.SCORE_COLUMNS)
+            if not tasks:
+                return tasks, {}, {}
+            # fetch all parent->children links once instead of querying per task
+            children_map = self.db.get_children_map(flt, columns=_db.SCORE_COLUMNS)
+            # prerequisites inherit the earliest deadline of the pending tasks waiting on them
+            inherited = effective_deadlines(self.db.get_pending_dependency_edges())
+            return tasks, children_map, inherited
+
+        # scores depend on the time, so only the loaded rows are reused between calls
+        tasks, children_map, inherited = self.db.cached(("rank", _filter_key(flt)), load)
+        if not tasks:
+            return []
+        now = now or datetime.now(timezone.utc)
+        with phase("score"):
+            scored = []
+            for t in tasks:
+                _score_into(scored, t, children_map, inherited, now)
+            scored.sort(key=lambda x: x[0], reverse=True)
+        if limit:
+            scored = scored[:limit]
+        return [Ranked(t, score, agg, children_map.get(t.id, [])) for score, t, agg in scored]
+
+    def quick(self, max_duration: int = 20, limit: Optional[int] = 10, leaves: bool = False, where: Optional[str] = None,
+              tags: Optional[Iterable[str]] = None, now: Optional[datetime] = None) -> List[QuickWin]:
+        """Pending tasks of at most `max_duration` minutes by score, best first (`limit` 0/None for all)."""
+        flt = build_filter(where, tags)
+        # the duration filter runs in SQL, so only candidates are scored
+        rows = self.db.cached(
+            ("quick", max_duration, leaves, _filter_key(flt)),
+            lambda: self.db.get_quick_tasks(max_duration, leaves_only=leaves, where=flt, columns=_db.SCORE_COLUMNS))
+        now = now or datetime.now(timezone.utc)
+        with phase("score"):
+            scored = ((score_task(t, now), t) for t in rows)
+            if limit and limit > 0:
+                best = heapq.nlargest(limit, scored, key=lambda x: x[0])
+            else:
+                best = sorted(scored, key=lambda x: x[0], reverse=True)
+        return [QuickWin(t, s, t["parent_title"]) for s, t in best]
+
+    def tree(self, where: Optional[str] = None, tags: Optional[Iterable[str]] = None,
+             include_completed: bool = False) -> List[TreeNode]:
+        """Root tasks with nested subtasks.
+
+        With a filter only matching tasks are included; a match nests under its parent
+        when the parent matches too.
+        """
+        flt = build_filter(where, tags)
+        if flt is not None:
+            rows = self.db.find_tasks(flt, include_completed=include_completed, order_by="completed, id", columns=_db.LIST_COLUMNS)
+            matched = {t["id"] for t in rows}
+            roots = [t for t in rows if t["parent_id"] not in matched]
+            children_map = {}
+            for t in rows:
+                if t["parent_id"] in matched:
+                    children_map.setdefault(t["parent_id"], []).append(t)
+        else:
+            roots = self.db.get_root_tasks(include_completed=include_completed, columns=_db.LIST_COLUMNS)
+            children_map = self.db.get_children_map(columns=_db.LIST_COLUMNS)
+
+        def build(task: Task) -> TreeNode:
+            return TreeNode(task, [build(c) for c in children_map.get(task.id, [])])
+
+        return [build(r) for r in roots]
+
+    def subtree(self, task_id: int) -> TreeNode:
+        """One task with all of its subtasks, completed ones included."""
+        rows = self.db.get_subtree(task_id, columns=_db.LIST_COLUMNS)
+        if not rows:
+            raise ValueError(f"No task with id {task_id}")
+        nodes = {t.id: TreeNode(t) for t in rows}
+        for t in rows:
+            if t.id != task_id:
+                nodes[t.parent_id].children.append(nodes[t.id])
+        return nodes[task_id]
+
+    def agenda(self, start: date, end: date, include_completed: bool = False, where: Optional[str] = None,
+               tags: Optional[Iterable[str]] = None, use_local: bool = True,
+               now: Optional[datetime] = None) -> Iterator[AgendaDay]:
+        """Days in [start, end) that have deadlines or are blocked, in order, each ranked by score.
+
+        A generator over three sorted streams merged by day: one ordered range query over
+        `tasks`, the future occurrences of recurring series (one pending item per series)
+        and the blocked days. Only the day being yielded is held in memory.
+        """
+        # checked here, not on the first `next()`
+        flt = build_filter(where, tags)
+        return self._agenda(start, end, flt, include_completed, None if use_local else timezone.utc,
+                            now or datetime.now(timezone.utc))
+
+    def _agenda(self, start: date, end: date, flt, include_completed: bool, tz, now: datetime) -> Iterator[AgendaDay]:
+        start_utc, end_utc = _midnight_utc(start, tz), _midnight_utc(end, tz)
+
+        def local_day(t: Task) -> date:
+            return t.deadline_dt.astimezone(tz).date()
+
+        stored = ((local_day(t), t, False) for t in self.db.iter_tasks_between(
+            start_utc, end_utc, include_completed=include_completed, where=flt, columns=_db.SCORE_COLUMNS + ("completed",)))
+        series = self.db.get_recurring_series(columns=_db.SCORE_COLUMNS + ("recur",), where=flt)
+        # each series yields its occurrences in order, so merging them keeps the whole stream sorted
+        upcoming = heapq.merge(*(
+            ((occ.astimezone(tz).date(), row.replace(deadline=occ.isoformat()), True) for _, occ in expand_series([row], start_utc, end_utc))
+            for row in series
+        ), key=lambda e: e[0])
+        entries = heapq.merge(stored, upcoming, key=lambda e: e[0])
+
+        blocked = self.db.blocked_index(start, end).entries()
+        pending_block = next(blocked, None)
+        for day, group in groupby(entries, key=lambda e: e[0]):
+            # blocked days without deadlines come out between the days that have some
+            while pending_block is not None and pending_block[0] < day:
+                yield AgendaDay(pending_block[0], [], True, pending_block[1])
+                pending_block = next(blocked, None)
+            is_blocked, reason = False, None
+            if pending_block is not None and pending_block[0] == day:
+                is_blocked, reason = True, pending_block[1]
+                pending_block = next(blocked, None)
+            ranked, virtual = [], set()
+            for _, t, is_virtual in group:
+                ranked.append(Ranked(t, score_task(t, now)))
+                if is_virtual:
+                    virtual.add(t.id)
+            ranked.sort(key=lambda r: r.score, reverse=True)
+            yield AgendaDay(day, ranked, is_blocked, reason, virtual)
+        while pending_block is not None:
+            yield AgendaDay(pending_block[0], [], True, pending_block[1])
+            pending_block = next(blocked, None)
+
+    def calendar_month(self, year: int, month: int, include_completed: bool = False, use_local: bool = True) -> MonthView:
+        """Deadline counts per day for a month, in local time (or UTC), plus blocked days."""
+        return self.calendar_months(year, month, 1, include_completed=include_completed, use_local=use_local)[0]
+
+    def calendar_months(self, year: int, month: int, count: int, include_completed: bool = False,
+                        use_local: bool = True) -> List[MonthView]:
+        """`calendar_month` for `count` consecutive months from year/month, from one aggregate query."""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        # None: the system's local time, so months across a daylight-saving change bucket correctly
+        tz = None if use_local else timezone.utc
+        first = date(year, month, 1)
+        y, m = divmod(month - 1 + count, 12)
+        last = date(year + y, m + 1, 1)
+        start_utc, end_utc = _midnight_utc(first, tz), _midnight_utc(last, tz)
+
+        views: Dict[tuple, MonthView] = {}
+        for k in range(count):
+            y, m = divmod(month - 1 + k, 12)
+            views[(year + y, m + 1)] = MonthView(year + y, m + 1, {}, {}, {})
+        for d, (n, mins) in self.db.get_day_totals(start_utc, end_utc, tz, include_completed=include_completed).items():
+            view = views[(d.year, d.month)]
+            view.counts[d], view.minutes[d] = n, mins
+        # future occurrences of recurring tasks are expanded from their rule, not stored
+        for t, occ in expand_series(self.db.get_recurring_series(columns=("deadline", "recur", "duration")), start_utc, end_utc):
+            d = occ.astimezone(tz).date()
+            view = views[(d.year, d.month)]
+            view.counts[d] = view.counts.get(d, 0) + 1
+            view.minutes[d] = view.minutes.get(d, 0) + (t.duration or 0)
+        for d, reason in self.db.blocked_index(first, last).items():
+            views[(d.year, d.month)].blocked[d] = reason
+        return list(views.values())
+
+    def forecast(self, days: int, capacity: int, start: Optional[date] = None, use_local: bool = True) -> Forecast:
+        """Cumulative pending work due against cumulative capacity for `days` days from `start`.
+
+        Minutes due per day come from the same aggregate as the calendar, plus the
+        expanded occurrences of recurring tasks. One pass over the days then builds
+        both prefix sums, so the cost is O(days + occurrences) however many tasks
+        the database holds.
+        """
+        if days < 1 or capacity < 1:
+            raise ValueError("--days and --capacity must be positive")
+        tz = None if use_local else timezone.utc
+        start = start or (datetime.now().date() if use_local else datetime.now(timezone.utc).date())
+        end = start + timedelta(days=days)
+        start_utc, end_utc = _midnight_utc(start, tz), _midnight_utc(end, tz)
+        minutes = {d: mins for d, (_, mins) in self.db.get_day_totals(start_utc, end_utc, tz).items()}
+        for t, occ in expand_series(self.db.get_recurring_series(columns=("deadline", "recur", "duration")), start_utc, end_utc):
+            d = occ.astimezone(tz).date()
+            minutes[d] = minutes.get(d, 0) + (t.duration or 0)
+        blocked = dict(self.db.blocked_index(start, end).items())
+        overdue = self.db.get_due_before(start_utc)
+
+        dates, due, demand, supply = [], [], [], []
+        total, available, first_short = overdue[1], 0, None
+        for i in range(days):
+            d = start + timedelta(days=i)
+            today = minutes.get(d, 0)
+            total += today
+            if d not in blocked:
+                available += capacity
+            dates.append(d)
+            due.append(today)
+            demand.append(total)
+            supply.append(available)
+            if first_short is None and total > available:
+                first_short = i
+        return Forecast(dates, capacity, due, demand, supply, blocked, overdue, first_short)
+
+
+class LiveRanking:
+    """`Session.rank` kept current from the `changes` feed (`decidrx watch now`).
+
+    `refresh` loads and scores every pending task. `update` reads the change rows written
+    since, then re-reads and re-scores only the tasks they name, their ancestors (a
+    parent's aggregate depends on its subtasks) and the tasks whose prerequisites or
+    inherited deadline changed. Scores of untouched tasks keep the time they were
+    computed at, so callers refresh periodically as well.
+    """
+
+    # beyond this many touched tasks a full refresh is cheaper than the id lookups
+    MAX_INCREMENTAL = 2000
+
+    def __init__(self, session: Session, where: Optional[str] = None, tags: Optional[Iterable[str]] = None,
+                 ready: bool = False):
+        self.session = session
+        self.flt = build_filter(where, tags, ready)
+        self.seq = 0
+        self.tasks: Dict[int, Task] = {}
+        self.children: Dict[int, List[Task]] = {}
+        self.entries: Dict[int, list] = {}
+
+    def refresh(self, now: Optional[datetime] = None):
+        db = self.session.db
+        self.seq = db.last_change()
+        self.tasks = {t.id: t for t in db.get_pending_tasks(where=self.flt, columns=_db.SCORE_COLUMNS)}
+        self.children = db.get_children_map(self.flt, columns=_db.SCORE_COLUMNS)
+        self._load_edges()
+        self._rescore(self.tasks, now)
+
+    def update(self, now: Optional[datetime] = None) -> Optional[set]:
+        """Apply changes newer than the last one seen; returns the re-scored ids, or None if nothing changed."""
+        db = self.session.db
+        if self.seq < db.changes_horizon():
+            # the feed was compacted past what we have seen
+            self.refresh(now)
+            return set(self.tasks)
+        changes = db.changes_since(self.seq)
+        if not changes:
+            if db.last_change() < self.seq:
+                # the database was replaced (e.g. `decidrx reset`)
+                self.refresh(now)
+                return set(self.tasks)
+            return None
+        self.seq = changes[-1]["seq"]
+        touched = {c["row_id"] for c in changes if c["tbl"] not in ("blocked_days", "blocked_rules") and c["row_id"] is not None}
+        if not touched:
+            return set()
+        if len(touched) > self.MAX_INCREMENTAL:
+            self.refresh(now)
+            return set(self.tasks)
+        old_edges, old_inherited = self.edges, self.inherited
+        self._load_edges()
+        # both ends of an added or removed edge: readiness and inherited deadlines move
+        for a, b, *_ in set(old_edges) ^ set(self.edges):
+            touched.update((a, b))
+        touched.update(k for k in old_inherited.keys() | self.inherited.keys() if old_inherited.get(k) != self.inherited.get(k))
+        if self.flt is not None:
+            # filters such as `under 12` depend on where a task sits in the tree
+            touched.update(db.get_descendant_ids(list(touched)))
+        # old parents (a task may have moved or been completed) and the current ancestors
+        touched.update(self._parent_of[i] for i in list(touched) if i in self._parent_of)
+        touched.update(db.get_ancestor_ids(list(touched)))
+        if len(touched) > self.MAX_INCREMENTAL:
+            self.refresh(now)
+            return set(self.tasks)
+
+        only = AllOf(self.flt, IdFilter(touched))
+        for i in touched:
+            self.tasks.pop(i, None)
+            self.entries.pop(i, None)
+            for c in self.children.pop(i, ()):
+                self._parent_of.pop(c.id, None)
+        fresh = {t.id: t for t in db.get_pending_tasks(where=only, columns=_db.SCORE_COLUMNS)}
+        for parent_id, kids in db.get_children_map(only, columns=_db.SCORE_COLUMNS).items():
+            self.children[parent_id] = kids
+            for c in kids:
+                self._parent_of[c.id] = parent_id
+        self.tasks.update(fresh)
+        self._rescore(fresh, now, clear=False)
+        return set(fresh)
+
+    def top(self, limit: Optional[int] = 5) -> List[Ranked]:
+        entries = (e for es in self.entries.values() for e in es)
+        best = heapq.nlargest(limit, entries, key=lambda x: x[0]) if limit else \
+            sorted(entries, key=lambda x: x[0], reverse=True)
+        return [Ranked(t, score, agg, self.children.get(t.id, [])) for score, t, agg in best]
+
+    def _load_edges(self):
+        self.edges = self.session.db.get_pending_dependency_edges()
+        self.inherited = effective_deadlines(self.edges)
+
+    def _rescore(self, tasks: Dict[int, Task], now: Optional[datetime], clear: bool = True):
+        now = now or datetime.now(timezone.utc)
+        if clear:
+            self.entries = {}
+            self._parent_of = {c.id: p for p, kids in self.children.items() for c in kids}
+        for t in tasks.values():
+            out: list = []
+            _score_into(out, t, self.children, self.inherited, now)
+            self.entries[t.id] = out
@@ -0,0 +1,199 @@
+"""Online backups of a DecidRX database with SQLite's backup API.
+
+:func:`snapshot` copies the database page by page through
+``sqlite3.Connection.backup`` on a read-only connection of its own. Each step
+copies ``pages`` pages under a short shared lock and then pauses, so readers
+(``now``, ``decidrx serve``) are never held up and writers wait at most one step.
+If another connection commits while a backup runs, SQLite restarts the copy, so
+the result is always a consistent snapshot, never a torn copy. When writes keep
+coming (more than ``MAX_RESTARTS`` restarts), the copy is finished inside one
+read transaction instead. In WAL mode that never blocks anyone, and WAL databases
+take that path from the start. With the default rollback journal, writers wait
+until that final copy ends.
+
+Backups are named ``<db stem>-<UTC time>.db`` (``.db.gz`` when compressed) and
+live in ``$DECIDRX_BACKUP_DIR``, or a ``backups`` directory next to the database.
+Only the newest ``keep`` are kept. :func:`restore` copies a backup back into the
+live database with the same API, after saving a snapshot of what it replaces.
+"""
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+from urllib.parse import quote
+
+from decidrx.sync import reset_site
+
+BACKUP_DIR_ENV = "DECIDRX_BACKUP_DIR"
+KEEP = 10
+# pages copied per step (4 MiB at the default 4 KiB page size) and the pause after each step
+PAGES = 1024
+PAUSE = 0.005
+# wait before retrying a step that found the database locked (sqlite3's default is 0.25 s)
+BUSY_RETRY = 0.01
+# restarts caused by other connections' writes before the copy pins a read transaction
+MAX_RESTARTS = 3
+_NAME_RE = re.compile(r"-\d{8}T\d{12}Z\.db(\.gz)?$")
+
+
+def backup_dir(db_path: str) -> str:
+    """$DECIDRX_BACKUP_DIR, else `backups/` beside the database file."""
+    return os.environ.get(BACKUP_DIR_ENV) or os.path.join(os.path.dirname(os.path.abspath(db_path)), "backups")
+
+
+def _prefix(db_path: str) -> str:
+    return os.path.splitext(os.path.basename(db_path))[0] + "-"
+
+
+def list_backups(db_path: str, directory: Optional[str] = None) -> List[str]:
+    """Backups of `db_path` in `directory`, newest first."""
+    directory = directory or backup_dir(db_path)
+    if not os.path.isdir(directory):
+        return []
+    prefix = _prefix(db_path)
+    # the stem must be followed by exactly a timestamp: `todo.db` does not own `todo-list-...` backups
+    names = [n for n in os.listdir(directory) if n.startswith(prefix) and _NAME_RE.fullmatch(n, len(prefix) - 1)]
+    # the UTC time in the name sorts chronologically
+    return [os.path.join(directory, n) for n in sorted(names, reverse=True)]
+
+
+def _open_readonly(path: str) -> sqlite3.Connection:
+    if not os.path.exists(path):
+        # opening would silently create an empty database
+        raise ValueError(f"No database at {path}")
+    return sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+
+
+class _KeepsChanging(Exception):
+    pass
+
+
+def _copy(src: sqlite3.Connection, dst: sqlite3.Connection, pages: int, pause: float,
+          progress: Optional[Callable[[int, int], None]], max_restarts: int = MAX_RESTARTS):
+    last = None
+    restarts = 0
+
+    def step(status, remaining, total):
+        nonlocal last, restarts
+        if last is not None and remaining >= last:
+            restarts += 1
+            if restarts > max_restarts:
+                raise _KeepsChanging()
+        last = remaining
+        report(status, remaining, total)
+        if remaining and pause:
+            # sqlite3 only sleeps after a busy step; give waiting writers a window every time
+            time.sleep(pause)
+
+    def report(status, remaining, total):
+        if progress is not None:
+            progress(remaining, total)
+
+    wal = src.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+    if not wal:
+        try:
+            src.backup(dst, pages=pages, progress=step, sleep=BUSY_RETRY)
+            return
+        except _KeepsChanging:
+            pass
+    # Hold one read transaction over the whole copy: later commits by others no longer
+    # restart it. With WAL they go ahead meanwhile; with a rollback journal they wait.
+    src.execute("BEGIN")
+    src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    try:
+        src.backup(dst, pages=pages, progress=report, sleep=BUSY_RETRY)
+    finally:
+        src.rollback()
+
+
+def snapshot(db_path: str, directory: Optional[str] = None, keep: Optional[int] = KEEP, compress: bool = False,
+             pages: int = PAGES, pause: float = PAUSE, progress: Optional[Callable[[int, int], None]] = None) -> str:
+    """Back up the database at `db_path` while it stays in use; returns the backup's path.
+
+    `keep` rotates the directory down to that many backups of this database (None keeps all).
+    `progress(remaining, total)` is called with page counts after every step.
+    """
+    directory = directory or backup_dir(db_path)
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    target = os.path.join(directory, f"{_prefix(db_path)}{stamp}.db")
+    part = target + ".part"
+    src = _open_readonly(db_path)
+    try:
+        dst = sqlite3.connect(part)
+        try:
+            _copy(src, dst, pages, pause, progress)
+        finally:
+            dst.close()
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    finally:
+        src.close()
+    if compress:
+        with open(part, "rb") as raw, gzip.open(target + ".gz", "wb") as packed:
+            shutil.copyfileobj(raw, packed, 1 << 20)
+        os.remove(part)
+        target += ".gz"
+    else:
+        os.replace(part, target)
+    if keep:
+        for old in list_backups(db_path, directory)[keep:]:
+            os.remove(old)
+    return target
+
+
+def restore(db, source: str, directory: Optional[str] = None, pages: int = PAGES,
+            progress: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
+    """Replace the contents of the open `Database` `db` with the backup at `source`.
+
+    The backup is checked first (ValueError if it is damaged or not a DecidRX
+    database), and the current contents are saved with `snapshot`, whose path is
+    returned (None if the database file did not exist yet); that snapshot is not
+    rotated, so it never removes `source` or other backups. Other connections see
+    the restored data on their next query. The database gets a new sync site id and
+    forgets its peers, so the next `decidrx sync` re-exchanges everything.
+    """
+    if not os.path.exists(source):
+        raise ValueError(f"No backup at {source}")
+    unpacked = None
+    if source.endswith(".gz"):
+        fd, unpacked = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(os.path.abspath(db.path)))
+        with os.fdopen(fd, "wb") as raw, gzip.open(source, "rb") as packed:
+            try:
+                shutil.copyfileobj(packed, raw, 1 << 20)
+            except (OSError, EOFError) as e:
+                os.remove(unpacked)
+                raise ValueError(f"{source} is not a readable gzip file: {e}")
+    try:
+        src = _open_readonly(unpacked or source)
+        try:
+            try:
+                check = src.execute("PRAGMA quick_check").fetchone()[0]
+                has_tasks = src.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks'").fetchone()
+            except sqlite3.DatabaseError as e:
+                raise ValueError(f"{source} is not a SQLite database: {e}")
+            if check != "ok":
+                raise ValueError(f"{source} is damaged: {check}")
+            if not has_tasks:
+                raise ValueError(f"{source} is not a DecidRX database")
+            saved = snapshot(db.path, directory, keep=None) if os.path.exists(db.path) else None
+            if db.conn.in_transaction:
+                db.conn.commit()
+            _copy(src, db.conn, pages, 0, progress)
+        finally:
+            src.close()
+    finally:
+        if unpacked:
+            os.remove(unpacked)
+    # a backup from an older version gets the current schema
+    db.init_db()
+    reset_site(db)
+    db._cache_version = None
+    return saved
@@ -0,0 +1,206 @@
+"""Blocked days: one-off dates plus recurring rules, and an interval index over them.
+
+One-off dates live in ``blocked_days``. Repeating ones ("every weekend", "every
+other Friday", a two-week trip) are single ``blocked_rules`` rows holding the rule
+text, a start date and an optional last day (``until``). Rules are never expanded
+into rows. :meth:`BlockRule.intervals` yields the runs of blocked days inside a
+requested window only, and :class:`BlockedIndex` merges them with the one-off
+dates into sorted, non-overlapping ranges, so a membership test is one bisect.
+
+Rule forms (case-insensitive; the leading ``every`` may be left out)::
+
+    daily | every day | every 3 days        with --until: a date range
+    weekends | every sat,sun | every other fri | every 2 weeks on mon,tue
+    weekly | monthly | every month on 15 | every 3 months on 31
+"""
+import calendar as _calendar
+import heapq
+import re
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+_WEEKDAYS = {}
+for _i, _name in enumerate(_calendar.day_name):
+    _WEEKDAYS[_name.lower()] = _WEEKDAYS[_name.lower()[:3]] = _i
+_SHORT = [n.lower()[:3] for n in _calendar.day_abbr]
+_ALIASES = {"daily": "every day", "weekly": "every week", "biweekly": "every 2 weeks", "monthly": "every month",
+            "weekends": "every sat,sun", "every weekend": "every sat,sun"}
+_RULE_RE = re.compile(r"every (?:(other|\d+) )?(?:(day|week|month)s?|([a-z,]+))(?: on ([a-z0-9,]+))?")
+_UNITS = {"day": "d", "week": "w", "month": "m"}
+_DAY = timedelta(days=1)
+
+# (first day, day after the last, reason, origin): origin is the blocked_days id or "rule <id>"
+Interval = Tuple[date, date, Optional[str], str]
+
+
+class BlockRule:
+    """Every `interval` days, weeks (on `days`, weekday numbers) or months (on day `days`) from `start`."""
+
+    __slots__ = ("unit", "interval", "days", "start", "until", "reason", "id")
+
+    def __init__(self, unit: str, interval: int, days, start: date, until: Optional[date] = None,
+                 reason: Optional[str] = None, id: Optional[int] = None):
+        if interval < 1:
+            raise ValueError("Rule interval must be at least 1")
+        if until is not None and until < start:
+            raise ValueError("--until must not be before the rule's start")
+        self.unit = unit
+        self.interval = interval
+        self.days = days
+        self.start = start
+        self.until = until
+        self.reason = reason
+        self.id = id
+
+    def __str__(self):
+        every = "every" if self.interval == 1 else f"every {self.interval}"
+        plural = "s" if self.interval != 1 else ""
+        if self.unit == "d":
+            return f"{every} day{plural}"
+        if self.unit == "w":
+            return f"{every} week{plural} on {','.join(_SHORT[d] for d in sorted(self.days))}"
+        return f"{every} month{plural} on {self.days}"
+
+    def intervals(self, start: date, end: date) -> Iterator[Interval]:
+        """Yield the rule's runs of blocked days within [start, end), in order."""
+        lo = max(start, self.start)
+        hi = end if self.until is None else min(end, self.until + _DAY)
+        if lo >= hi:
+            return
+        origin = f"rule {self.id}"
+        if self.unit == "d":
+            if self.interval == 1:
+                # a date range: one interval however long
+                yield lo, hi, self.reason, origin
+                return
+            k = -(-(lo - self.start).days // self.interval)
+            d = self.start + timedelta(days=k * self.interval)
+            while d < hi:
+                yield d, d + _DAY, self.reason, origin
+                d += timedelta(days=self.interval)
+            return
+        if self.unit == "w":
+            monday = self.start - timedelta(days=self.start.weekday())
+            # jump straight to the first week of the window that the interval selects
+            k = (lo - monday).days // 7
+            k += -k % self.interval
+            runs = _runs(sorted(self.days))
+            while True:
+                week = monday + timedelta(weeks=k)
+                if week >= hi:
+                    return
+                for first, last in runs:
+                    a, b = max(lo, week + timedelta(days=first)), min(hi, week + timedelta(days=last + 1))
+                    if a < b:
+                        yield a, b, self.reason, origin
+                k += self.interval
+        base = self.start.year * 12 + self.start.month - 1
+        k = lo.year * 12 + lo.month - 1 - base
+        k += -k % self.interval
+        while True:
+            year, month = divmod(base + k, 12)
+            # day 31 falls on the last day of shorter months, as recurring tasks do
+            d = date(year, month + 1, min(self.days, _calendar.monthrange(year, month + 1)[1]))
+            if d >= hi:
+                return
+            if d >= lo:
+                yield d, d + _DAY, self.reason, origin
+            k += self.interval
+
+
+def _runs(weekdays: List[int]) -> List[Tuple[int, int]]:
+    """Consecutive weekday numbers as (first, last) pairs: sat,sun is one run."""
+    runs: List[Tuple[int, int]] = []
+    for d in weekdays:
+        if runs and runs[-1][1] == d - 1:
+            runs[-1] = (runs[-1][0], d)
+        else:
+            runs.append((d, d))
+    return runs
+
+
+def parse_block_rule(text: str, start: date, until: Optional[date] = None, reason: Optional[str] = None,
+                     id: Optional[int] = None) -> BlockRule:
+    """Parse a blocked-day rule starting on `start`; raises ValueError for unknown forms."""
+    low = " ".join(re.sub(r"\s*,\s*", ",", (text or "").strip().lower()).split())
+    low = _ALIASES.get(low) or re.sub(r"^(daily|weekly|biweekly|monthly)\b", lambda m: _ALIASES[m.group(1)], low)
+    m = _RULE_RE.fullmatch(low if low.startswith("every ") else "every " + low)
+    if not m or (m.group(2) == "day" and m.group(4)) or (m.group(3) and m.group(4)):
+        raise ValueError(f"Invalid blocked-day rule: {text!r} (e.g. weekends, every other fri, monthly on 15, daily --until DATE)")
+    interval = 2 if m.group(1) == "other" else int(m.group(1) or 1)
+    unit = _UNITS.get(m.group(2), "w")
+    on = m.group(3) or m.group(4)
+    if unit == "d":
+        days = None
+    elif unit == "w":
+        try:
+            days = frozenset(_WEEKDAYS[n] for n in on.split(",")) if on else frozenset([start.weekday()])
+        except KeyError as e:
+            raise ValueError(f"Unknown weekday {e.args[0]!r} in blocked-day rule {text!r}")
+    else:
+        days = start.day if not on else int(on) if on.isdigit() else 0
+        if not 1 <= days <= 31:
+            raise ValueError(f"Day of month must be 1-31 in blocked-day rule {text!r}")
+    return BlockRule(unit, interval, days, start, until, reason, id)
+
+
+class BlockedIndex:
+    """Blocked days of a window as sorted, non-overlapping [first, end) date ranges.
+
+    Built from intervals sorted by first day. Where they overlap, the one that starts
+    first keeps the shared days; on a tie, the one listed first (one-off days before rules).
+    """
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._starts: List[date] = []
+        self._ends: List[date] = []
+        self._info: List[Tuple[Optional[str], str]] = []
+        for a, b, reason, origin in intervals:
+            if self._ends and a < self._ends[-1]:
+                if b <= self._ends[-1]:
+                    continue
+                a = self._ends[-1]
+            if self._ends and a == self._ends[-1] and self._info[-1] == (reason, origin):
+                self._ends[-1] = b
+            else:
+                self._starts.append(a)
+                self._ends.append(b)
+                self._info.append((reason, origin))
+
+    @classmethod
+    def merge(cls, *sources: Iterable[Interval]) -> "BlockedIndex":
+        return cls(heapq.merge(*sources, key=lambda iv: iv[0]))
+
+    def _find(self, d: date) -> int:
+        i = bisect_right(self._starts, d) - 1
+        return i if i >= 0 and d < self._ends[i] else -1
+
+    def __contains__(self, d) -> bool:
+        return self._find(d) >= 0
+
+    def get(self, d: date) -> Optional[Tuple[Optional[str], str]]:
+        """(reason, origin) if `d` is blocked, else None."""
+        i = self._find(d)
+        return self._info[i] if i >= 0 else None
+
+    def entries(self) -> Iterator[Tuple[date, Optional[str], str]]:
+        """Every blocked day in order, with its reason and origin."""
+        for a, b, (reason, origin) in zip(self._starts, self._ends, self._info):
+            for n in range((b - a).days):
+                yield a + timedelta(days=n), reason, origin
+
+    def items(self) -> Iterator[Tuple[date, Optional[str]]]:
+        for d, reason, _ in self.entries():
+            yield d, reason
+
+    def __iter__(self) -> Iterator[date]:
+        for d, _, _ in self.entries():
+            yield d
+
+    def __len__(self) -> int:
+        return sum((b - a).days for a, b in zip(self._starts, self._ends))
+
+    @property
+    def ranges(self) -> List[Tuple[date, date]]:
+        return list(zip(self._starts, self._ends))
@@ -1,4 +1,5 @@
 import argparse
+import sys
 from rich.table import Table
 
 from .ui import console
@@ -16,31 +17,108 @@ from .commands.undone import cmd_undone as cmd_undone
 from .commands.view import cmd_view as cmd_view
 from rich.panel import Panel
 
+WHERE_HELP = "Filter expression, e.g. \"type = deep and reward > 6 and due < eow and under 12\" (see decidrx help show)"
+TAG_HELP = "Only tasks carrying this tag (repeat to require several)"
+DB_HELP = "Read this database instead of $DECIDRX_DB; repeat to merge several (default list: $DECIDRX_DBS)"
+
 # Per-command examples to surface in help
 EXAMPLES = {
     "add": (
         "decidrx add\n"
         "  # Interactive: prompts for fields if title omitted\n"
         "  decidrx add \"Write report\" --deadline 2 --duration 45 --reward 7\n"
-        "  # Create subtask: --parent <parent_id> or use interactive 'Add subtasks' flow"
+        "  # Create subtask: --parent <parent_id> or use interactive 'Add subtasks' flow\n"
+        "  decidrx add \"Water plants\" --deadline 1 --recur weekly  # next occurrence is created on done"
     ),
     "now": (
         "decidrx now  # shows ranked tasks by score (parents aggregated from subtasks when applicable)\n"
-        "  # Use --limit to control how many are shown"
+        "  # Use --limit to control how many are shown\n"
+        "  decidrx now --db ~/clients/acme.db --db ~/clients/globex.db  # one ranking across databases, ids like acme:12"
+    ),
+    "quick": (
+        "decidrx quick  # quick wins (short duration tasks, default <=20 min, top 10)\n"
+        "  decidrx quick --max-duration 10 --limit 3  # tighter threshold, top 3\n"
+        "  decidrx quick --leaves  # quick subtasks of big parents; parents with pending subtasks are skipped"
+    ),
+    "plan": (
+        "decidrx plan --minutes 180  # highest total score that fits in 3 hours (leaf tasks with a duration)\n"
+        "  decidrx plan --minutes 120 --max-deep 60  # at most an hour of deep work\n"
+        "  decidrx plan --minutes 90 --ready --tag home"
+    ),
+    "schedule": (
+        "decidrx schedule  # next 14 days at 240 min/day, blocked days skipped, earliest deadline first\n"
+        "  decidrx schedule --days 90 --capacity 180  # calendar overlay plus any deadlines that cannot be met"
+    ),
+    "forecast": (
+        "decidrx forecast  # next 30 days: minutes due by each day against 240 min/day, blocked days excluded\n"
+        "  decidrx forecast --days 365 --capacity 180  # flags the first day the work due outgrows the time available"
+    ),
+    "agenda": (
+        "decidrx agenda  # the next 7 days: deadlines by local day, best score first, blocked days marked\n"
+        "  decidrx agenda --from 2026-01-01 --to 2027-12-31 --limit 3  # printed as it is read, any range length"
+    ),
+    "batch": (
+        "decidrx batch < commands.txt  # one command per line: CLI words, a JSON argv array or {\"argv\": [...], \"id\": ...}\n"
+        "  printf 'add \"Buy milk\" --duration 5\\ndone 3\\n' | decidrx batch  # one JSON result per line on stdout\n"
+        "  decidrx batch ops.jsonl --atomic  # any failure rolls back every command"
+    ),
+    "watch": (
+        "decidrx watch now  # re-ranks only the tasks named in new change rows (and their ancestors)\n"
+        "  decidrx watch now --tag work --limit 10 --interval 0.5\n"
+        "  decidrx watch calendar 2030 5  # redrawn whenever a task or blocked day changes"
+    ),
+    "serve": (
+        "decidrx serve &  # keep the database open; later `decidrx ...` commands run in the daemon\n"
+        "  decidrx serve --status  # pid, database and number of commands served\n"
+        "  decidrx serve --stop  # without a daemon every command runs in-process as before"
+    ),
+    "http": (
+        "decidrx http --port 8765  # GET /now /quick /tasks /tasks/<id>/tree /calendar/<year>/<month>\n"
+        "  curl -s localhost:8765/now?limit=3  # JSON; send the ETag back in If-None-Match to get 304 until a write\n"
+        "  curl -s -X POST -H 'Content-Type: application/json' -d '{\"title\": \"Call Bob\", \"deadline\": 1}' localhost:8765/tasks"
+    ),
+    "sync": (
+        "decidrx sync ~/desktop.db  # exchange the changes made since the last sync, both ways\n"
+        "  decidrx sync --dir ~/Dropbox/decidrx  # publish ours to <dir>/<site>/, apply the other copies' batches\n"
+        "  # per field, the later edit wins; a task deleted on either side is deleted on both"
     ),
-    "quick": "decidrx quick  # quick wins (short duration tasks, default <20 min)",
     "edit": (
         "decidrx edit 1 --title \"New title\"  # non-interactive edit (set fields via flags)\n"
         "  decidrx edit 1  # interactive edit prompts for fields"
     ),
     "show": (
         "decidrx show  # show pending tasks (nested subtasks are indented)\n"
-        "  decidrx show --all  # include completed tasks in the view"
+        "  decidrx show --all  # include completed tasks in the view\n"
+        "  decidrx show --where \"type = deep and reward > 6 and due < eow and under 12\"\n"
+        "\n"
+        "Filter expressions (--where on show, now, quick, export, done):\n"
+        "  fields: id title description deadline|due duration reward penalty effort type\n"
+        "          created_at|created completed|done completed_at parent_id|parent\n"
+        "  operators: = != < <= > >= ~ (contains); combine with and / or / not and parentheses\n"
+        "  dates: ISO dates, relative 3d -12h 2w, now today tomorrow yesterday eow (start of next week)\n"
+        "  subtree: under <id> matches every descendant of a task; null tests: due = null"
+    ),
+    "export": (
+        "decidrx export > tasks.jsonl  # pending tasks as JSON lines\n"
+        "  decidrx export --all --format csv --where \"completed_at > -7d\""
+    ),
+    "done": (
+        "decidrx done 3  # mark task 3 done\n"
+        "  decidrx done --where \"under 12 and duration <= 5\"  # bulk-complete matching tasks"
     ),
     "reset": (
         "decidrx reset  # interactively confirm and reset DB (destructive)\n"
         "  decidrx reset --yes  # force reset without prompt"
     ),
+    "db": (
+        "decidrx db backup  # consistent copy of the live database, taken in small steps; newest 10 kept\n"
+        "  decidrx db backup --compress --keep 30 --dir /mnt/usb/decidrx\n"
+        "  decidrx db list\n"
+        "  decidrx db restore  # newest backup (the current contents are backed up first); or give a file\n"
+        "  decidrx db rebuild-counts  # recompute the per-day deadline counters behind the calendar\n"
+        "  decidrx db compact  # drop change-feed entries every sync peer has already received\n"
+        "  decidrx db compact --prune-deletions 90  # and forget deletions synced more than 90 days ago"
+    ),
     "archive": "decidrx archive  # show every task in the DB (history view)",
     "remove": (
         "decidrx remove <task_id>  # delete a task; will ask to confirm if it has subtasks\n"
@@ -53,14 +131,31 @@ EXAMPLES = {
         "  decidrx subtask remove <parent_id> <child_id>  # remove a subtask (confirms)\n"
         "  decidrx subtask edit <parent_id> <child_id> [--flags]  # edit a subtask"
     ),
+    "tag": (
+        "decidrx tag add 3 home errand  # attach tags\n"
+        "  decidrx tag remove 3 errand\n"
+        "  decidrx tag list  # every tag with pending/total counts\n"
+        "  decidrx now --tag home --tag errand  # rank only tasks carrying both tags"
+    ),
+    "dep": (
+        "decidrx dep add 7 3  # task 7 cannot start until task 3 is done\n"
+        "  decidrx dep remove 7 3\n"
+        "  decidrx dep list 7  # prerequisites and dependents of task 7\n"
+        "  decidrx now --ready  # rank only tasks whose prerequisites are done"
+    ),
     "calendar": (
         "decidrx calendar                 # show current month calendar with deadline heatmap\n"
         "  decidrx calendar YEAR MONTH     # show a specific month (e.g. 2026 02)\n"
+        "  decidrx calendar --year 2027    # one heatmap row per month, with task and minute totals\n"
+        "  decidrx calendar --months 6     # the next six months (or --months 6 YEAR MONTH)\n"
         "  decidrx calendar show YYYY-MM-DD # show tasks and blocked-day info for that date\n"
         "  decidrx calendar add YYYY-MM-DD --reason '...'  # add a blocked day\n"
         "  decidrx calendar remove YYYY-MM-DD            # remove a blocked day\n"
         "  decidrx calendar bad add YYYY-MM-DD --reason '...' # alias for blocked day add\n"
+        "  decidrx calendar bad add 2026-07-01 --until 2026-07-14 --reason trip  # a date range\n"
+        "  decidrx calendar bad add --every weekends          # also 'every other fri', 'monthly on 15'\n"
         "  decidrx calendar bad remove YYYY-MM-DD            # alias for blocked day remove\n"
+        "  decidrx calendar bad remove --rule 2              # remove a blocked-day rule\n"
         "  decidrx calendar bad list [YEAR MONTH]            # list blocked (bad) days"
     ),
 }
@@ -84,6 +179,9 @@ def build_parser():
             "Tip: Use `decidrx help <command>` for command-specific examples and flags."
         )
     )
+    parser.add_argument("--profile", action="store_true", help="Print per-phase wall/CPU timings to stderr")
+    parser.add_argument("--profile-out", metavar="FILE", help="With --profile, also dump cProfile stats (pstats format) to FILE")
+    parser.add_argument("--trace-sql", action="store_true", help="Count and time every SQL statement; print a summary to stderr")
     sub = parser.add_subparsers(dest="cmd")
 
     p_add = sub.add_parser("add")
@@ -97,17 +195,106 @@ def build_parser():
     p_add.add_argument("--effort", type=int, default=0)
     p_add.add_argument("--type", choices=["deep", "shallow"], default="shallow")
     p_add.add_argument("--parent", type=int, help="Parent task id (make this a subtask)")
+    p_add.add_argument("--tag", action="append", help="Tag the new task (repeatable)")
+    p_add.add_argument("--recur", help="Repeat the task: daily, weekly, monthly, yearly, 'every 2 weeks', 3d ... (needs --deadline)")
     p_add.set_defaults(func=cmd_add)
 
     p_now = sub.add_parser("now", help="Show a ranked list of tasks to do now")
     p_now.add_argument("--limit", type=int, default=5, help="How many tasks to show (default: 5)")
+    p_now.add_argument("--where", help=WHERE_HELP)
+    p_now.add_argument("--tag", action="append", help=TAG_HELP)
+    p_now.add_argument("--ready", action="store_true", help="Skip tasks with unfinished prerequisites (see `dep`)")
+    p_now.add_argument("--db", action="append", metavar="PATH", help=DB_HELP)
     p_now.set_defaults(func=cmd_now)
 
     p_quick = sub.add_parser("quick", help="Show quick-win tasks (short duration tasks prioritized)")
+    p_quick.add_argument("--max-duration", type=int, default=20, help="Longest duration (minutes) that counts as a quick win (default: 20)")
+    p_quick.add_argument("--limit", type=int, default=10, help="How many tasks to show (default: 10, 0 for all)")
+    p_quick.add_argument("--leaves", action="store_true", help="Only leaf tasks: skip parents with pending subtasks, surface their quick subtasks")
+    p_quick.add_argument("--where", help=WHERE_HELP)
+    p_quick.add_argument("--tag", action="append", help=TAG_HELP)
+    p_quick.add_argument("--db", action="append", metavar="PATH", help=DB_HELP)
     p_quick.set_defaults(func=cmd_quick)
 
+    p_plan = sub.add_parser("plan", help="Pick the best set of tasks that fits a time budget")
+    p_plan.add_argument("--minutes", type=int, required=True, help="Time available (minutes)")
+    p_plan.add_argument("--max-deep", type=int, help="At most this many minutes of deep work")
+    p_plan.add_argument("--max-shallow", type=int, help="At most this many minutes of shallow work")
+    p_plan.add_argument("--time-limit", type=float, default=0.5, help="Seconds to search for the optimal plan before settling for the best found (default: 0.5)")
+    p_plan.add_argument("--where", help=WHERE_HELP)
+    p_plan.add_argument("--tag", action="append", help=TAG_HELP)
+    p_plan.add_argument("--ready", action="store_true", help="Skip tasks with unfinished prerequisites")
+    from .commands.plan import cmd_plan as cmd_plan
+    p_plan.set_defaults(func=cmd_plan)
+
+    p_schedule = sub.add_parser("schedule", help="Lay out pending tasks over the coming days and check deadlines")
+    p_schedule.add_argument("--days", type=int, default=14, help="How many days ahead to plan (default: 14)")
+    p_schedule.add_argument("--capacity", type=int, default=240, help="Minutes of work per day (default: 240)")
+    p_schedule.add_argument("--where", help=WHERE_HELP)
+    p_schedule.add_argument("--tag", action="append", help=TAG_HELP)
+    from .commands.schedule import cmd_schedule as cmd_schedule
+    p_schedule.set_defaults(func=cmd_schedule)
+
+    p_forecast = sub.add_parser("forecast", help="Compare the work due by each day with the time available until then")
+    p_forecast.add_argument("--days", type=int, default=30, help="How many days ahead to look (default: 30)")
+    p_forecast.add_argument("--capacity", type=int, default=240, help="Minutes of work per unblocked day (default: 240)")
+    p_forecast.add_argument("--from", dest="start", metavar="YYYY-MM-DD", help="First day (default: today)")
+    from .commands.forecast import cmd_forecast as cmd_forecast
+    p_forecast.set_defaults(func=cmd_forecast)
+
+    p_agenda = sub.add_parser("agenda", help="Deadlines day by day over a date range, each day ranked by score")
+    p_agenda.add_argument("--from", dest="start", metavar="YYYY-MM-DD", help="First day (default: today)")
+    p_agenda.add_argument("--to", dest="end", metavar="YYYY-MM-DD", help="Last day, inclusive (default: a week from --from)")
+    p_agenda.add_argument("--limit", type=int, default=0, help="Show at most this many tasks per day (default: 0, all)")
+    p_agenda.add_argument("--all", action="store_true", help="Include completed tasks")
+    p_agenda.add_argument("--where", help=WHERE_HELP)
+    p_agenda.add_argument("--tag", action="append", help=TAG_HELP)
+    from .commands.agenda import cmd_agenda as cmd_agenda
+    p_agenda.set_defaults(func=cmd_agenda)
+
+    p_batch = sub.add_parser("batch", help="Run many commands from stdin or a file in one process and one transaction")
+    p_batch.add_argument("file", nargs="?", help="File with one command per line (default: stdin)")
+    p_batch.add_argument("--atomic", action="store_true", help="Stop at the first failing command and roll back the whole batch")
+    from .commands.batch import cmd_batch as cmd_batch
+    p_batch.set_defaults(func=cmd_batch)
+
+    p_watch = sub.add_parser("watch", help="Live view of now, show or calendar that updates when the database changes")
+    p_watch.add_argument("view", choices=["now", "show", "calendar"], help="View to keep up to date")
+    p_watch.add_argument("period", nargs="*", metavar="YEAR MONTH", help="Month for the calendar view (default: current)")
+    p_watch.add_argument("--interval", type=float, default=1.0, help="Seconds between checks of the change feed (default: 1)")
+    p_watch.add_argument("--rescore", type=float, default=60.0, help="Recompute everything at least this often, in seconds, since scores depend on the time (default: 60)")
+    p_watch.add_argument("--count", type=int, help="Stop after this many checks")
+    p_watch.add_argument("--limit", type=int, default=5, help="Rows in the now view")
+    p_watch.add_argument("--where", help=WHERE_HELP)
+    p_watch.add_argument("--tag", action="append", help=TAG_HELP)
+    p_watch.add_argument("--ready", action="store_true", help="Now view: only tasks whose prerequisites are done")
+    p_watch.add_argument("--all", action="store_true", help="Show/calendar views: include completed tasks")
+    from .commands.watch import cmd_watch as cmd_watch
+    p_watch.set_defaults(func=cmd_watch)
+
+    p_serve = sub.add_parser("serve", help="Keep the database warm in a background daemon that `decidrx` forwards commands to")
+    p_serve.add_argument("--socket", metavar="PATH", help="UNIX socket to listen on (default: $DECIDRX_SOCKET or a per-user socket)")
+    p_serve.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    p_serve.add_argument("--status", action="store_true", help="Show whether a daemon is running and what it serves")
+    from .commands.serve import cmd_serve as cmd_serve
+    p_serve.set_defaults(func=cmd_serve)
+
+    p_http = sub.add_parser("http", help="Serve a local HTTP/JSON API (ranking, quick wins, tasks, calendar) with ETags")
+    p_http.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    p_http.add_argument("--port", type=int, default=8765, help="Port to listen on, 0 for any free port (default: 8765)")
+    from .commands.http import cmd_http as cmd_http
+    p_http.set_defaults(func=cmd_http)
+
+    p_sync = sub.add_parser("sync", help="Two-way sync with another copy of the database, directly or through a shared directory")
+    p_sync.add_argument("other", nargs="?", help="Database file to sync with")
+    p_sync.add_argument("--dir", metavar="PATH", help="Exchange change batches through this directory instead")
+    from .commands.sync import cmd_sync as cmd_sync
+    p_sync.set_defaults(func=cmd_sync)
+
     p_done = sub.add_parser("done", help="Mark a task as completed (records completion time)")
-    p_done.add_argument("task_id", type=int, help="ID of the task to mark done")
+    p_done.add_argument("task_id", type=int, nargs="?", help="ID of the task to mark done")
+    p_done.add_argument("--where", help="Mark every pending task matching this filter expression done")
+    p_done.add_argument("--tag", action="append", help="Mark every pending task carrying this tag done (repeat to require several)")
     p_done.set_defaults(func=cmd_done)
 
     p_edit = sub.add_parser("edit", help="Edit a task (interactive if no flags)" )
@@ -137,12 +324,23 @@ def build_parser():
 
     p_reset = sub.add_parser("reset", help="Reset the database (destructive)")
     p_reset.add_argument("--yes", action="store_true", help="Skip confirmation and reset immediately")
+    p_reset.add_argument("--no-backup", action="store_true", help="Do not save a snapshot of the database first")
     p_reset.set_defaults(func=cmd_reset)
 
     p_show = sub.add_parser("show", help="Show pending tasks in a readable table (subtasks indented)")
     p_show.add_argument("--all", action="store_true", help="Show all tasks including completed")
+    p_show.add_argument("--where", help=WHERE_HELP)
+    p_show.add_argument("--tag", action="append", help=TAG_HELP)
     p_show.set_defaults(func=cmd_show)
 
+    p_export = sub.add_parser("export", help="Export tasks as JSON lines or CSV to stdout")
+    p_export.add_argument("--all", action="store_true", help="Include completed tasks")
+    p_export.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    p_export.add_argument("--where", help=WHERE_HELP)
+    p_export.add_argument("--tag", action="append", help=TAG_HELP)
+    from .commands.export import cmd_export as cmd_export
+    p_export.set_defaults(func=cmd_export)
+
     p_archive = sub.add_parser("archive", help="Show all tasks irrespective of done status")
     p_archive.set_defaults(func=cmd_archive)
 
@@ -200,19 +398,90 @@ def build_parser():
     from .commands.subtask import cmd_subtask_edit as cmd_subtask_edit
     p_sub_edit.set_defaults(func=cmd_subtask_edit)
 
+    # database maintenance: online backups and restores, summary rebuilds
+    p_db = sub.add_parser("db", help="Back up, restore and maintain the database")
+    db_sub = p_db.add_subparsers(dest="db_cmd")
+    from .commands.dbadmin import cmd_db_backup, cmd_db_compact, cmd_db_list, cmd_db_rebuild_counts, cmd_db_restore
+
+    p_db_backup = db_sub.add_parser("backup", help="Copy the database without blocking other commands")
+    p_db_backup.add_argument("--dir", metavar="PATH", help="Backup directory (default: $DECIDRX_BACKUP_DIR or backups/ beside the database)")
+    p_db_backup.add_argument("--keep", type=int, default=10, help="Keep this many newest backups, 0 for all (default: 10)")
+    p_db_backup.add_argument("--compress", action="store_true", help="Write a gzip-compressed backup")
+    p_db_backup.set_defaults(func=cmd_db_backup)
+
+    p_db_list = db_sub.add_parser("list", help="List backups, newest first")
+    p_db_list.add_argument("--dir", metavar="PATH", help="Backup directory")
+    p_db_list.set_defaults(func=cmd_db_list)
+
+    p_db_restore = db_sub.add_parser("restore", help="Replace the database with a backup (the newest by default)")
+    p_db_restore.add_argument("file", nargs="?", help="Backup file (.db or .db.gz)")
+    p_db_restore.add_argument("--dir", metavar="PATH", help="Backup directory to pick the newest backup from")
+    p_db_restore.add_argument("--yes", action="store_true", help="Skip confirmation")
+    p_db_restore.set_defaults(func=cmd_db_restore)
+
+    p_db_counts = db_sub.add_parser("rebuild-counts", help="Recompute the per-day deadline counters from the tasks")
+    p_db_counts.set_defaults(func=cmd_db_rebuild_counts)
+
+    p_db_compact = db_sub.add_parser("compact", help="Prune the change feed up to what every sync peer has received")
+    p_db_compact.add_argument("--prune-deletions", type=int, metavar="DAYS",
+                              help="Also forget deletions older than DAYS that every peer has (default: keep them all)")
+    p_db_compact.set_defaults(func=cmd_db_compact)
+
+    # tag commands: attach/detach tags and list tag usage
+    p_tag = sub.add_parser("tag", help="Manage task tags")
+    tag_sub = p_tag.add_subparsers(dest="tag_cmd")
+    from .commands.tag import cmd_tag_add, cmd_tag_remove, cmd_tag_list
+
+    p_tag_add = tag_sub.add_parser("add", help="Add tags to a task")
+    p_tag_add.add_argument("task_id", help="Task id")
+    p_tag_add.add_argument("tags", nargs="+", help="Tag names")
+    p_tag_add.set_defaults(func=cmd_tag_add)
+
+    p_tag_remove = tag_sub.add_parser("remove", help="Remove tags from a task")
+    p_tag_remove.add_argument("task_id", help="Task id")
+    p_tag_remove.add_argument("tags", nargs="+", help="Tag names")
+    p_tag_remove.set_defaults(func=cmd_tag_remove)
+
+    p_tag_list = tag_sub.add_parser("list", help="List tags with task counts, or the tags of one task")
+    p_tag_list.add_argument("task_id", nargs="?", help="Task id")
+    p_tag_list.set_defaults(func=cmd_tag_list)
+
+    # dependency commands: "task_id cannot start until depends_on is done"
+    p_dep = sub.add_parser("dep", help="Manage task dependencies")
+    dep_sub = p_dep.add_subparsers(dest="dep_cmd")
+    from .commands.dep import cmd_dep_add, cmd_dep_remove, cmd_dep_list
+
+    p_dep_add = dep_sub.add_parser("add", help="Make a task wait for another task")
+    p_dep_add.add_argument("task_id", help="Dependent task id")
+    p_dep_add.add_argument("depends_on", help="Prerequisite task id")
+    p_dep_add.set_defaults(func=cmd_dep_add)
+
+    p_dep_remove = dep_sub.add_parser("remove", help="Remove a dependency")
+    p_dep_remove.add_argument("task_id", help="Dependent task id")
+    p_dep_remove.add_argument("depends_on", help="Prerequisite task id")
+    p_dep_remove.set_defaults(func=cmd_dep_remove)
+
+    p_dep_list = dep_sub.add_parser("list", help="Show a task's prerequisites and dependents")
+    p_dep_list.add_argument("task_id", help="Task id")
+    p_dep_list.set_defaults(func=cmd_dep_list)
+
     # Calendar commands: monthly calendar heatmap, blocked day CRUD, and per-day show
     p_cal = sub.add_parser("calendar", help="Show a monthly calendar with deadlines and manage blocked days")
     p_cal.add_argument("--local", action="store_true", help="Group deadlines by local timezone (default)")
     p_cal.add_argument("--all", action="store_true", help="Include completed tasks in calendar views and day shows")
+    p_cal.add_argument("--db", action="append", metavar="PATH", help=DB_HELP + "; several only for the month views")
+    p_cal.add_argument("--year", type=int, nargs="?", const=0, metavar="YEAR", help="Heatmap of a whole year, one row per month (default: this year)")
+    p_cal.add_argument("--months", type=int, metavar="N", help="Heatmap of N months from YEAR MONTH (default: this month)")
     # calendar accepts either a plain month view: `decidrx calendar [YEAR] [MONTH]`
     # or a sub-command style: `decidrx calendar add YYYY-MM-DD --reason ...` etc.
     # To avoid argparse ambiguity we capture remaining args into `args` and let the handler decide.
-    p_cal.add_argument("args", nargs=argparse.REMAINDER, help="Either: YEAR MONTH  OR: add|remove|show <date> [--reason]")
+    p_cal.add_argument("args", nargs=argparse.REMAINDER, help="Either: YEAR MONTH  OR: add|remove|show <date> [--until DATE] [--reason]  OR: bad add --every RULE [--from DATE] [--until DATE]  OR: bad remove --rule ID")
     from .commands.calendar import cmd_calendar as cmd_calendar
     p_cal.set_defaults(func=cmd_calendar)
 
     # Update command
     p_update = sub.add_parser("update", help="Check for updates from upstream GitHub repository")
+    p_update.add_argument("--timeout", type=float, default=3.0, help="Give up after this many seconds (default: 3)")
     p_update.set_defaults(func=cmd_update)
 
     return parser
@@ -223,10 +492,11 @@ def cmd_update(args):
     from .update_checker import check_for_updates
     
     console.print("[bold blue]Checking for updates...[/bold blue]")
-    available, latest, current = check_for_updates()
+    available, latest, current = check_for_updates(timeout=getattr(args, "timeout", 3.0) or 3.0, force=True)
     
     if available is None:
         console.print(f"[bold red]Error checking for updates:[/bold red] {latest}")
+        return 1
     elif available:
         console.print(f"[bold green]New version {latest} is available![/bold green] (Current: {current})")
         console.print("Please update via: pip install --upgrade decidrx")
@@ -268,7 +538,34 @@ def main(argv=None):
     if not hasattr(args, "func"):
         parser.print_help()
         return
-    args.func(args)
+    if args.cmd not in ("update", "help"):
+        from .update_checker import startup_check
+
+        # refreshes a stale cache on a daemon thread; never waited for
+        startup_check()
+    status = run_command(args)
+    if status:
+        sys.exit(status)
+
+
+def run_command(args):
+    """Dispatch a parsed command, wrapped in profiling/SQL tracing when requested.
+
+    Returns the handler's status: handlers print why they failed and return 1, else None.
+    """
+    from contextlib import ExitStack
+    from .profiling import profile_session, phase
+
+    with ExitStack() as stack:
+        if getattr(args, "trace_sql", False):
+            from .tracing import trace_sql
+
+            tracer = stack.enter_context(trace_sql())
+            stack.callback(tracer.report)
+        if getattr(args, "profile", False) or getattr(args, "profile_out", None):
+            stack.enter_context(profile_session(getattr(args, "profile_out", None), console=console))
+        with phase("command"):
+            return args.func(args)
 
 
 if __name__ == "__main__":
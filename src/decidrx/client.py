@@ -0,0 +1,189 @@
+"""Thin client for a running `decidrx serve` daemon; the `decidrx` entry point.
+
+When a daemon is listening on the socket, argv is forwarded to it and its output is
+copied back as it arrives, so a command costs a socket round trip instead of Python
+imports, schema setup and reloading the tasks. Without a daemon (or for commands that
+must run here) the normal CLI runs in-process.
+
+This module only imports the standard library pieces it needs, so the forwarding
+path stays cheap.
+
+Wire format: the client sends one JSON line ``{"argv": [...], ...}``; the daemon
+answers with JSON lines ``{"out": text}`` / ``{"err": text}`` and finishes with
+``{"exit": code}``, or ``{"fallback": reason}`` when the command has to run in the
+client instead (nothing was changed in that case).
+
+The socket carries every forwarded command's argv, working directory and database
+path, so the client only connects to a socket owned by the current user that no one
+else can open or swap out. Without $XDG_RUNTIME_DIR, the default socket lives in a
+private ``decidrx-<uid>`` directory (mode 0700) under the temp directory.
+"""
+import json
+import os
+import sys
+
+SOCKET_ENV = "DECIDRX_SOCKET"
+# commands that read the client's stdin or files, delete the database, use the network or keep running
+LOCAL_COMMANDS = {"serve", "http", "watch", "batch", "reset", "update", "help", "sync", "db"}
+# options that only make sense in the process that runs the command
+LOCAL_OPTIONS = ("--profile", "--profile-out", "--trace-sql", "--db")
+
+
+def socket_path() -> str:
+    """$DECIDRX_SOCKET, else a per-user socket in $XDG_RUNTIME_DIR or a private directory under the temp directory."""
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, f"decidrx-{uid}.sock")
+    import tempfile
+
+    # the temp directory is shared: the socket goes in a 0700 directory of our own
+    return os.path.join(tempfile.gettempdir(), f"decidrx-{uid}", "daemon.sock")
+
+
+def safe_directory(path: str) -> bool:
+    """True when no other user can add, remove or rename entries in directory `path`."""
+    if not hasattr(os, "getuid"):
+        return True
+    import stat
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_uid not in (os.getuid(), 0):
+        return False
+    # a shared directory such as /tmp is fine when sticky: only owners can remove or rename
+    return not st.st_mode & 0o022 or bool(st.st_mode & stat.S_ISVTX)
+
+
+def owned_socket(path: str) -> bool:
+    """True for a socket of the current user that only it can open, in a `safe_directory`."""
+    if not hasattr(os, "getuid"):
+        return True
+    import stat
+
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return False
+    return safe_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def runs_locally(argv) -> bool:
+    """True for invocations the daemon must not take (see LOCAL_COMMANDS / LOCAL_OPTIONS)."""
+    if os.environ.get("DECIDRX_DBS"):
+        return True
+    words = [a for a in argv if not a.startswith("-")]
+    if not words or words[0] in LOCAL_COMMANDS:
+        return True
+    return any(a == opt or a.startswith(opt + "=") for a in argv for opt in LOCAL_OPTIONS)
+
+
+def encode(message: dict) -> bytes:
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+def connect(path: str = None, timeout: float = None):
+    """A connected socket to the daemon, or None when none is listening."""
+    import socket
+
+    path = path or socket_path()
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    if not owned_socket(path):
+        # someone else's socket would receive our commands and could answer with forged output
+        sys.stderr.write(f"decidrx: ignoring {path}: not a private socket of this user\n")
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        # stale socket file: the daemon is gone
+        sock.close()
+        return None
+    return sock
+
+
+def request(message: dict, path: str = None, timeout: float = None):
+    """Send one request to the daemon and return its decoded replies (None without a daemon)."""
+    sock = connect(path, timeout)
+    if sock is None:
+        return None
+    with sock, sock.makefile("rb") as replies:
+        sock.sendall(encode(message))
+        return [json.loads(line) for line in replies]
+
+
+def _terminal():
+    """Width and colour system the daemon should render for, matching what rich picks here."""
+    if not sys.stdout.isatty() or os.environ.get("NO_COLOR"):
+        return None, None
+    import shutil
+
+    colorterm = os.environ.get("COLORTERM", "").lower()
+    if colorterm in ("truecolor", "24bit"):
+        colors = "truecolor"
+    elif "256" in os.environ.get("TERM", ""):
+        colors = "256"
+    else:
+        colors = "standard"
+    return shutil.get_terminal_size().columns, colors
+
+
+def forward(argv, path: str = None, stdout=None, stderr=None):
+    """Run argv in the daemon and copy its output; returns the exit code, or None to run it here."""
+    if runs_locally(argv):
+        return None
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    width, colors = _terminal()
+    message = {
+        "argv": list(argv),
+        "db": os.environ.get("DECIDRX_DB"),
+        "cwd": os.getcwd(),
+        "tz": os.environ.get("TZ"),
+        "width": width,
+        "colors": colors,
+    }
+    sock = connect(path)
+    if sock is None:
+        return None
+    try:
+        with sock, sock.makefile("rb") as replies:
+            sock.sendall(encode(message))
+            for line in replies:
+                reply = json.loads(line)
+                if "out" in reply:
+                    stdout.write(reply["out"])
+                    stdout.flush()
+                elif "err" in reply:
+                    stderr.write(reply["err"])
+                    stderr.flush()
+                elif "exit" in reply:
+                    return reply["exit"]
+                elif "fallback" in reply:
+                    return None
+    except (OSError, ValueError) as e:
+        stderr.write(f"decidrx: lost the connection to the daemon: {e}\n")
+        return 1
+    # the daemon may already have committed the command, so it is not run a second time
+    stderr.write("decidrx: the daemon closed the connection before the command finished\n")
+    return 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    code = forward(argv)
+    if code is None:
+        from decidrx.cli import main as cli_main
+
+        return cli_main(argv)
+    if code:
+        sys.exit(code)
@@ -1,18 +1,22 @@
 import os
 from typing import Optional
 from rich.prompt import Confirm
-from decidrx.prompt import prompt_str, prompt_int, parse_deadline, validate_args
-from decidrx.db import Database
+from decidrx.api import Session
+from decidrx.prompt import prompt_str, prompt_int
 from decidrx.ui import console
 
 DB_ENV = "DECIDRX_DB"
 
 
 def cmd_add(args):
-    db = Database(os.environ.get(DB_ENV))
+    with Session(os.environ.get(DB_ENV)) as session:
+        return _add(session, args)
 
+
+def _add(session: Session, args):
     # If title is missing, assume interactive mode
-    if not args.title:
+    interactive = not args.title
+    if interactive:
         args.title = prompt_str("Title", required=True)
 
         # deadline
@@ -47,18 +51,17 @@ def cmd_add(args):
             console.print("Type must be 'deep' or 'shallow'.")
 
 
-    else:
-        # Non-interactive: validate provided args and bail out if invalid
-        if not validate_args(args):
-            return
-
-    deadline_dt = parse_deadline(args.deadline) if args.deadline is not None else None
-    parent = getattr(args, 'parent', None)
-    task_id = db.add_task(title=args.title, deadline=deadline_dt, description=getattr(args, 'description', None), duration=args.duration, reward=args.reward, penalty=args.penalty, effort=args.effort, type=args.type, parent_id=parent)
+    # validation (including the non-interactive options) happens in Session.add
+    try:
+        task = session.add(args.title, args.deadline, description=getattr(args, 'description', None), duration=args.duration, reward=args.reward, penalty=args.penalty, effort=args.effort, type=args.type, parent_id=getattr(args, 'parent', None), tags=getattr(args, 'tag', None), recur=getattr(args, 'recur', None))
+    except ValueError as e:
+        console.print(str(e))
+        return 1
+    task_id = task.id
     console.print(f"Added task [bold]{args.title}[/bold] (id={task_id})")
 
     # If we were in interactive mode (title was prompted), offer adding subtasks
-    if not getattr(args, 'title', None) is None and not getattr(args, 'title', None) == "":
+    if interactive:
         try:
             add_subtasks = Confirm.ask("Add subtasks to this task?")
         except Exception:
@@ -96,9 +99,8 @@ def cmd_add(args):
                     break
                 console.print("Type must be 'deep' or 'shallow'.")
 
-            sub_deadline_dt = parse_deadline(sub_deadline) if sub_deadline is not None else None
-            sub_id = db.add_task(title=sub_title, deadline=sub_deadline_dt, description=sub_description or None, duration=sub_duration, reward=sub_reward, penalty=sub_penalty, effort=sub_effort, type=sub_type, parent_id=task_id)
-            console.print(f"Added subtask [bold]{sub_title}[/bold] (id={sub_id})")
+            sub = session.add(sub_title, sub_deadline, description=sub_description or None, duration=sub_duration, reward=sub_reward, penalty=sub_penalty, effort=sub_effort, type=sub_type, parent_id=task_id)
+            console.print(f"Added subtask [bold]{sub_title}[/bold] (id={sub.id})")
 
             try:
                 add_subtasks = Confirm.ask("Add another subtask?")
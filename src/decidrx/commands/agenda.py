@@ -0,0 +1,65 @@
+import os
+from datetime import date, datetime, timedelta
+from decidrx.api import Session
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+# days shown when only --from (or nothing) is given
+DEFAULT_DAYS = 7
+
+
+def _parse_day(text: str, option: str) -> date:
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"{option} must be YYYY-MM-DD")
+
+
+def _day_lines(agenda_day, limit: int):
+    """The heading and task lines of one agenda day."""
+    head = f"[bold]{agenda_day.day.strftime('%a')} {agenda_day.day.isoformat()}[/bold]"
+    if agenda_day.blocked:
+        head += f"  [white on red] blocked [/] {agenda_day.reason or ''}".rstrip()
+    yield head
+    shown = agenda_day.ranked[:limit] if limit else agenda_day.ranked
+    for rank, r in enumerate(shown, start=1):
+        t = r.task
+        virtual = t.id in agenda_day.upcoming
+        label = f"[dim]~{t.id}[/dim]" if virtual else f"[cyan]{t.id}[/cyan]"
+        title = f"{t.title} [dim]({t['recur']})[/dim]" if virtual else (t.title or "")
+        if not virtual and t.completed:
+            title = f"[strike]{title}[/strike]"
+        details = [t.deadline_dt.astimezone().strftime("%H:%M")]
+        if t.duration:
+            details.append(f"{t.duration}m")
+        details.append(f"score {r.score:.3f}")
+        yield f"  {rank:>2}. {label} {title} [dim]{' · '.join(details)}[/dim]"
+    if len(shown) < len(agenda_day.ranked):
+        yield f"      [dim]+{len(agenda_day.ranked) - len(shown)} more[/dim]"
+
+
+def cmd_agenda(args):
+    try:
+        start = _parse_day(args.start, "--from") if getattr(args, "start", None) else datetime.now().date()
+        end = _parse_day(args.end, "--to") if getattr(args, "end", None) else start + timedelta(days=DEFAULT_DAYS - 1)
+    except ValueError as e:
+        console.print(str(e))
+        return 1
+    if end < start:
+        console.print("--to must not be before --from")
+        return 1
+    limit = getattr(args, "limit", 0) or 0
+    with Session(os.environ.get(DB_ENV)) as session:
+        try:
+            days = session.agenda(start, end + timedelta(days=1), include_completed=getattr(args, "all", False),
+                                  where=getattr(args, "where", None), tags=getattr(args, "tag", None))
+        except ValueError as e:
+            console.print(f"Invalid filter: {e}")
+            return 1
+        shown = 0
+        # printed day by day as the query advances: a long range never waits for the whole result
+        for agenda_day in days:
+            console.print("\n".join(_day_lines(agenda_day, limit)))
+            shown += 1
+    if not shown:
+        console.print(f"No deadlines or blocked days from {start.isoformat()} to {end.isoformat()}.")
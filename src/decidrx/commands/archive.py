@@ -1,7 +1,7 @@
 import os
 from datetime import datetime
 from rich.table import Table
-from decidrx.db import Database
+from decidrx.db import LIST_COLUMNS, get_database
 from decidrx.ui import console
 
 DB_ENV = "DECIDRX_DB"
@@ -9,12 +9,8 @@ DB_ENV = "DECIDRX_DB"
 
 def cmd_archive(args):
     """Show all tasks regardless of completed status (archive view)."""
-    db = Database(os.environ.get(DB_ENV))
-    cur = db.conn.cursor()
-    cur.execute("SELECT * FROM tasks ORDER BY id")
-    tasks = cur.fetchall()
+    db = get_database(os.environ.get(DB_ENV))
 
-    from rich.tree import Tree
     from datetime import timezone
 
     now = datetime.now(timezone.utc)
@@ -36,26 +32,6 @@ def cmd_archive(args):
             return f"{prefix}{mins}m"
         return f"{prefix}{int(seconds)}s"
 
-    def make_label(t):
-        dl = t["deadline"] if t["deadline"] else ""
-        left = ""
-        if dl:
-            try:
-                ddt = datetime.fromisoformat(dl)
-                if ddt.tzinfo is None:
-                    from datetime import timezone
-
-                    ddt = ddt.replace(tzinfo=timezone.utc)
-                delta = (ddt - now).total_seconds()
-                left = format_time_left(delta)
-            except Exception:
-                pass
-        created = t["created_at"][:19] if t["created_at"] else ""
-        done = "✅" if t["completed"] else ""
-        completed_at = t["completed_at"] or ""
-        def v(key):
-            return t[key] if key in t.keys() and t[key] is not None else 0
-        return f"[cyan]{t['id']}[/cyan] [bold]{t['title']}[/bold] {left} dur:{v('duration')} r:{v('reward')} p:{v('penalty')} eff:{v('effort')} {done} [dim]{created}[/dim] [dim]{completed_at}[/dim]"
     # Render as table with inlined tree-style titles
     table = Table(title="Archive")
     table.add_column("id", style="cyan")
@@ -71,12 +47,9 @@ def cmd_archive(args):
     table.add_column("done", justify="center")
     table.add_column("completed_at", style="dim")
 
-    cur = db.conn.cursor()
-    cur.execute("SELECT * FROM tasks WHERE parent_id IS NULL ORDER BY id")
-    parents = cur.fetchall()
-
-    def v(row, key):
-        return row[key] if key in row.keys() and row[key] is not None else 0
+    parents = db.get_root_tasks(include_completed=True, order_by="id", columns=LIST_COLUMNS)
+    # fetch all parent->children links once instead of querying per rendered row
+    children_map = db.get_children_map(columns=LIST_COLUMNS)
 
     def render_recursive(task_row, prefix_parts):
         if not prefix_parts:
@@ -86,27 +59,18 @@ def cmd_archive(args):
             connector = "├── " if prefix_parts[-1] else "└── "
             title = f"{prefix}{connector}{task_row['title']}"
 
-        dl = task_row["deadline"] if task_row["deadline"] else ""
+        dl = task_row.deadline or ""
         left = ""
-        if dl:
-            try:
-                ddt = datetime.fromisoformat(dl)
-                if ddt.tzinfo is None:
-                    from datetime import timezone
-
-                    ddt = ddt.replace(tzinfo=timezone.utc)
-                delta = (ddt - now).total_seconds()
-                left = format_time_left(delta)
-            except Exception:
-                pass
+        if task_row.deadline_dt is not None:
+            left = format_time_left((task_row.deadline_dt - now).total_seconds())
         created = task_row["created_at"][:19] if task_row["created_at"] else ""
         done = "✅" if task_row["completed"] else ""
         completed_at = task_row["completed_at"] or ""
-        desc_val = task_row["description"] if "description" in task_row.keys() else None
+        desc_val = task_row.description
         desc = (desc_val or "")[:60] + "..." if desc_val and len(desc_val) > 60 else (desc_val or "")
-        table.add_row(str(task_row["id"]), title, desc, dl, str(v(task_row, "duration")), str(v(task_row, "reward")), str(v(task_row, "penalty")), str(v(task_row, "effort")), task_row["type"] or "", created, done, completed_at)
+        table.add_row(str(task_row["id"]), title, desc, dl, str(task_row.duration or 0), str(task_row.reward or 0), str(task_row.penalty or 0), str(task_row.effort or 0), task_row["type"] or "", created, done, completed_at)
 
-        children = db.get_children(task_row["id"])
+        children = children_map.get(task_row["id"], [])
         for idx, c in enumerate(children):
             is_more = (idx < len(children) - 1)
             render_recursive(c, prefix_parts + [is_more])
@@ -0,0 +1,143 @@
+import contextlib
+import io
+import json
+import os
+import shlex
+import sys
+from rich.text import Text
+from decidrx.db import Database, shared_database
+from decidrx.ui import console, err_console
+
+DB_ENV = "DECIDRX_DB"
+# commands that make no sense inside a batch (destructive, networked or nested)
+DISALLOWED = {"batch", "reset", "update", "help"}
+
+
+class InteractiveInputRequired(BaseException):
+    """Raised when a batched command tries to prompt.
+
+    A BaseException so the prompt helpers' `except Exception` retry loops cannot swallow it.
+    """
+
+
+class _Abort(Exception):
+    """Stops an --atomic batch so its transaction rolls back."""
+
+
+class _Failed(Exception):
+    """A command returned a failure status; raised inside its savepoint to undo it."""
+
+
+class _NoInput(io.TextIOBase):
+    def readable(self):
+        return True
+
+    def read(self, *args):
+        raise InteractiveInputRequired()
+
+    readline = read
+
+
+def parse_line(line: str):
+    """Return (argv, request id) for one batch line: CLI words, a JSON array, or {"argv": [...], "id": ...}."""
+    if line.startswith(("[", "{")):
+        data = json.loads(line)
+        req_id = None
+        if isinstance(data, dict):
+            req_id = data.get("id")
+            data = data.get("argv")
+        if not isinstance(data, list) or not all(isinstance(a, (str, int, float)) for a in data):
+            raise ValueError('JSON lines must be an argv array or {"argv": [...]}')
+        return [str(a) for a in data], req_id
+    return shlex.split(line), None
+
+
+def _dispatch(parser, argv):
+    if not argv:
+        raise ValueError("empty command")
+    if argv[0] in DISALLOWED:
+        raise ValueError(f"`{argv[0]}` is not available in batch mode")
+    errors = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(errors):
+            ns = parser.parse_args(argv)
+    except SystemExit:
+        lines = errors.getvalue().strip().splitlines()
+        raise ValueError(lines[-1] if lines else f"invalid arguments: {' '.join(argv)}")
+    if not hasattr(ns, "func"):
+        raise ValueError(f"incomplete command: {' '.join(argv)}")
+    return ns
+
+
+def run_line(parser, db: Database, line: str, lineno: int) -> dict:
+    """Run one batch line inside its own savepoint and describe the outcome."""
+    result = {"line": lineno}
+    try:
+        argv, req_id = parse_line(line)
+    except ValueError as e:
+        result.update(ok=False, error=str(e))
+        return result
+    if req_id is not None:
+        result["id"] = req_id
+    result["argv"] = argv
+    stdout = io.StringIO()
+    stdin = sys.stdin
+    sys.stdin = _NoInput()
+    cap = None
+    try:
+        ns = _dispatch(parser, argv)
+        with db.savepoint("batch_cmd"), console.capture() as cap, contextlib.redirect_stdout(stdout):
+            # handlers print why they failed and return a non-zero status
+            if ns.func(ns):
+                raise _Failed()
+        result["ok"] = True
+    except InteractiveInputRequired:
+        result.update(ok=False, error="command needs interactive input; pass every field as an option")
+    except _Failed:
+        output = (Text.from_ansi(cap.get()).plain + stdout.getvalue()).strip()
+        result.update(ok=False, error=output or "command failed")
+    except Exception as e:
+        result.update(ok=False, error=str(e) or type(e).__name__)
+    else:
+        output = Text.from_ansi(cap.get()).plain + stdout.getvalue()
+        result["output"] = output.rstrip("\n")
+    finally:
+        sys.stdin = stdin
+    return result
+
+
+def cmd_batch(args):
+    from decidrx.cli import build_parser
+
+    source = getattr(args, "file", None) or "-"
+    stream = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    parser = build_parser()
+    db = Database(os.environ.get(DB_ENV))
+    out = sys.stdout
+    ok = failed = 0
+    try:
+        # one transaction for the whole batch; each command gets a savepoint so a failure
+        # only undoes that command (or, with --atomic, aborts and undoes everything)
+        with shared_database(db), db.transaction():
+            for lineno, raw in enumerate(stream, 1):
+                line = raw.strip()
+                if not line or line.startswith("#"):
+                    continue
+                result = run_line(parser, db, line, lineno)
+                out.write(json.dumps(result) + "\n")
+                if result["ok"]:
+                    ok += 1
+                    continue
+                failed += 1
+                if args.atomic:
+                    raise _Abort()
+    except _Abort:
+        err_console.print(f"batch aborted at command {ok + failed}: rolled back {ok} successful command(s)")
+        return 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        out.flush()
+    if failed:
+        err_console.print(f"{ok} command(s) committed, {failed} failed")
+        return 1
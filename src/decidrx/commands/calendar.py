@@ -1,11 +1,14 @@
 import os
 import calendar as _calendar
 from datetime import datetime, date, timezone, timedelta
-from typing import Optional
+from typing import List, Optional
 from rich.table import Table
 from rich.panel import Panel
 from rich.console import RenderableType
-from decidrx.db import Database
+from decidrx import federation
+from decidrx.api import MonthView, Session
+from decidrx.db import DEADLINE_COLUMNS, Database, get_database
+from decidrx.recurrence import expand_series
 from decidrx.ui import console
 
 DB_ENV = "DECIDRX_DB"
@@ -35,40 +38,101 @@ def _format_cell(day: int, count: int, blocked: bool, is_today: bool) -> str:
 
 
 def _render_month(db: Database, year: int, month: int, use_local: bool = True, include_completed: bool = False) -> RenderableType:
-    # choose tz
-    if use_local:
-        local_tz = datetime.now().astimezone().tzinfo
-    else:
-        local_tz = timezone.utc
+    view = Session(db=db).calendar_month(year, month, include_completed=include_completed, use_local=use_local)
+    return _month_panel(view, use_local=use_local)
 
-    # compute start/end in local timezone and convert to UTC for DB queries
-    start_local = datetime(year, month, 1, 0, 0, tzinfo=local_tz)
-    if month == 12:
-        next_local = datetime(year + 1, 1, 1, 0, 0, tzinfo=local_tz)
-    else:
-        next_local = datetime(year, month + 1, 1, 0, 0, tzinfo=local_tz)
 
-    start_utc = start_local.astimezone(timezone.utc)
-    end_utc = next_local.astimezone(timezone.utc)
-
-    tasks = db.get_tasks_between(start_utc, end_utc, include_completed=include_completed)
-    # map tasks to local date
-    counts = {}
-    for t in tasks:
-        dl = t['deadline']
-        if not dl:
+def _federated_month(paths, year: int, month: int, use_local: bool = True, include_completed: bool = False) -> RenderableType:
+    """Month heatmap summed over several databases; blocked days from any of them are shown."""
+    return _month_panel(_federated_months(paths, year, month, 1, use_local, include_completed)[0], use_local=use_local)
+
+
+def _federated_months(paths, year: int, month: int, count: int, use_local: bool = True,
+                      include_completed: bool = False) -> List[MonthView]:
+    results = federation.fan_out(paths, lambda s: s.calendar_months(year, month, count, include_completed=include_completed, use_local=use_local))
+    for name, err in federation.errors(results):
+        console.print(f"[yellow]Skipped {name}: {err}[/yellow]")
+    merged = []
+    for k in range(count):
+        y, m = divmod(month - 1 + k, 12)
+        merged.append(MonthView(year + y, m + 1, {}, {}, {}))
+    for _, views, err in results:
+        if err is not None:
             continue
+        for total, view in zip(merged, views):
+            for d, n in view.counts.items():
+                total.counts[d] = total.counts.get(d, 0) + n
+            for d, n in view.minutes.items():
+                total.minutes[d] = total.minutes.get(d, 0) + n
+            total.blocked.update(view.blocked)
+    return merged
+
+
+def _heat_cell(count: int, blocked: bool) -> str:
+    """One character of the multi-month heatmap."""
+    if blocked:
+        return "[white on red]×[/]"
+    if count == 0:
+        return "[dim]·[/]"
+    if count <= 2:
+        return "[magenta]▪[/]"
+    return "[bold magenta]■[/]"
+
+
+def _day_ruler() -> str:
+    """Day numbers over a 31-character strip, every five days."""
+    ruler = [" "] * 31
+    for day in (1, 5, 10, 15, 20, 25, 30):
+        ruler[day - 1:day - 1 + len(str(day))] = str(day)
+    return "".join(ruler)
+
+
+def _heatmap(views: List[MonthView], title: str) -> RenderableType:
+    """One row per month, one character per day of the month, with month totals."""
+    table = Table(box=None, padding=(0, 1), show_edge=False)
+    table.add_column("month", style="bold", no_wrap=True)
+    table.add_column(_day_ruler(), no_wrap=True)
+    table.add_column("tasks", justify="right", style="magenta")
+    table.add_column("min", justify="right", style="green")
+    for view in views:
+        days = (date(view.year, view.month, day) for day in range(1, _calendar.monthrange(view.year, view.month)[1] + 1))
+        strip = "".join(_heat_cell(view.counts.get(d, 0), d in view.blocked) for d in days)
+        table.add_row(f"{view.year}-{view.month:02d}", strip, str(sum(view.counts.values())), str(sum(view.minutes.values())))
+    legend = "[dim]·[/dim] none, [magenta]▪[/magenta] 1-2, [bold magenta]■[/bold magenta] 3+ deadlines, [white on red]×[/] blocked"
+    return Panel(table, title=title, subtitle=legend, expand=False)
+
+
+def _show_months(args, paths, args_list, use_local: bool, include_completed: bool):
+    """`calendar --year [YEAR]` or `calendar --months N [YEAR MONTH]`: the heatmap over several months."""
+    now = datetime.now()
+    if args.year is not None:
+        year, month, count = args.year or now.year, 1, 12
+        title = f"Calendar: {year}"
+    else:
         try:
-            ddt = datetime.fromisoformat(dl)
-            if ddt.tzinfo is None:
-                ddt = ddt.replace(tzinfo=timezone.utc)
-            d_local = ddt.astimezone(local_tz).date()
-            counts[d_local] = counts.get(d_local, 0) + 1
-        except Exception:
-            continue
+            year = int(args_list[0]) if args_list else now.year
+            month = int(args_list[1]) if len(args_list) > 1 else (now.month if not args_list else 1)
+        except ValueError:
+            console.print("Usage: calendar --months N [YEAR [MONTH]]")
+            return 1
+        count = args.months
+        if count < 1 or not 1 <= month <= 12:
+            console.print("--months must be positive and the month 1-12")
+            return 1
+        y, m = divmod(month - 2 + count, 12)
+        title = f"Calendar: {year}-{month:02d} to {year + y}-{m + 1:02d}"
+    if len(paths) > 1:
+        views = _federated_months(paths, year, month, count, use_local, include_completed)
+    else:
+        db = get_database(paths[0] if paths else os.environ.get(DB_ENV))
+        views = Session(db=db).calendar_months(year, month, count, include_completed=include_completed, use_local=use_local)
+    console.print(_heatmap(views, title))
 
-    blocked_rows = db.get_blocked_days_in_month(year, month)
-    blocked = {datetime.fromisoformat(r['date']).date() if isinstance(r['date'], str) else r['date']: r for r in blocked_rows}
+
+def _month_panel(view: MonthView, use_local: bool = True) -> RenderableType:
+    year, month = view.year, view.month
+    counts, blocked = view.counts, view.blocked
+    local_tz = datetime.now().astimezone().tzinfo if use_local else timezone.utc
 
     cal = _calendar.Calendar(firstweekday=0)  # Monday=0 in earlier decision, keep default
     month_weeks = cal.monthdayscalendar(year, month)
@@ -110,20 +174,19 @@ def _show_day(db: Database, date_str: str, use_local: bool = True, include_compl
     end_local = start_local + timedelta(days=1)
     start_utc = start_local.astimezone(timezone.utc)
     end_utc = end_local.astimezone(timezone.utc)
-    tasks = db.get_tasks_between(start_utc, end_utc, include_completed=include_completed)
-    # blocked day info
-    cur = db.conn.cursor()
-    cur.execute("SELECT * FROM blocked_days WHERE date = ?", (d.isoformat(),))
-    blocked = cur.fetchone()
+    tasks = db.get_tasks_between(start_utc, end_utc, include_completed=include_completed, columns=DEADLINE_COLUMNS)
+    upcoming = list(expand_series(db.get_recurring_series(columns=DEADLINE_COLUMNS + ("recur",)), start_utc, end_utc))
+    # blocked day info: a one-off day or an occurrence of a rule
+    blocked = db.blocked_index(d, d + timedelta(days=1)).get(d)
 
     lines = []
     lines.append(f"Date: {d.isoformat()}")
     if blocked:
-        lines.append(f"Blocked: Yes — {blocked['reason'] or ''}")
+        lines.append(f"Blocked: Yes — {blocked[0] or ''}")
     else:
         lines.append("Blocked: No")
 
-    if tasks:
+    if tasks or upcoming:
         tbl = Table(title=f"Tasks on {d.isoformat()}")
         tbl.add_column("id", style="cyan")
         tbl.add_column("title", style="bold")
@@ -144,17 +207,102 @@ def _show_day(db: Database, date_str: str, use_local: bool = True, include_compl
                 except Exception:
                     pass
             tbl.add_row(str(t['id']), t['title'] or "", dl or "", left)
+        for t, occ in upcoming:
+            # not stored yet: created when the pending occurrence is marked done
+            tbl.add_row(f"[dim]~{t['id']}[/dim]", f"{t['title']} [dim]({t['recur']})[/dim]", occ.isoformat(),
+                        str(int((occ - now).total_seconds() // 3600)) + "h")
         console.print(Panel('\n'.join(lines)))
         console.print(tbl)
     else:
         console.print(Panel('\n'.join(lines)))
 
 
+def _option(tokens, name: str) -> Optional[str]:
+    """The value following `name` in the raw calendar arguments, if any."""
+    if name in tokens:
+        idx = tokens.index(name)
+        if idx + 1 < len(tokens):
+            return tokens[idx + 1]
+    return None
+
+
+def _add_blocked(db: Database, tokens, noun: str, missing: str):
+    """`DATE [--until DATE] [--reason R]` or `--every RULE [--from DATE] [--until DATE] [--reason R]`.
+
+    A date with `--until` is stored as a `daily` rule: one row for the whole range.
+    """
+    reason = _option(tokens, "--reason")
+    every = _option(tokens, "--every")
+    if every is None and (not tokens or tokens[0].startswith("--")):
+        console.print(missing)
+        return 1
+    try:
+        until = _parse_ymd(_option(tokens, "--until")) if "--until" in tokens else None
+        if every is None:
+            start = _parse_ymd(tokens[0])
+        else:
+            start = _parse_ymd(_option(tokens, "--from")) if "--from" in tokens else date.today()
+        if every is None and until is None:
+            rid = db.add_blocked_day(start, reason=reason)
+            console.print(f"Added {noun} day {start.isoformat()} (id={rid})")
+            return
+        rid = db.add_blocked_rule(every or "daily", start, until, reason=reason)
+    except ValueError as e:
+        console.print(str(e))
+        return 1
+    if every is None:
+        console.print(f"Added {noun} days {start.isoformat()} to {until.isoformat()} (rule id={rid})")
+    else:
+        console.print(f"Added {noun}-day rule '{every}' from {start.isoformat()}{' until ' + until.isoformat() if until else ''} (rule id={rid})")
+
+
+def _remove_blocked(db: Database, tokens, noun: str):
+    """`DATE` removes a one-off day, `--rule ID` a rule."""
+    if "--rule" in tokens:
+        try:
+            rule_id = int(_option(tokens, "--rule") or "")
+        except ValueError:
+            console.print("--rule needs a rule id (see `calendar bad list`)")
+            return 1
+        if db.remove_blocked_rule(rule_id):
+            console.print(f"Removed {noun}-day rule {rule_id}")
+        else:
+            console.print(f"No {noun}-day rule with id {rule_id}")
+            return 1
+        return
+    try:
+        d = _parse_ymd(tokens[0])
+    except ValueError as e:
+        console.print(str(e))
+        return 1
+    if db.remove_blocked_day(d):
+        console.print(f"Removed {noun} day {d.isoformat()}")
+    else:
+        console.print(f"No {noun} day found for {d.isoformat()}")
+        return 1
+
+
 def cmd_calendar(args):
-    db = Database(os.environ.get(DB_ENV))
     args_list = getattr(args, "args", []) or []
     use_local = getattr(args, "local", False) or True
     include_completed = getattr(args, "all", False)
+    paths = federation.db_paths(args)
+    if getattr(args, "year", None) is not None or getattr(args, "months", None) is not None:
+        return _show_months(args, paths, args_list, use_local, include_completed)
+    if len(paths) > 1:
+        # only the month heatmap is read-only; blocked-day edits and day shows need one database
+        try:
+            year = int(args_list[0]) if args_list else datetime.now().year
+            month = int(args_list[1]) if len(args_list) > 1 else datetime.now().month
+        except ValueError:
+            console.print("Several databases are only supported for the month view: calendar [YEAR [MONTH]]")
+            return 1
+        if not 1 <= month <= 12:
+            console.print("Month must be 1-12")
+            return 1
+        console.print(_federated_month(paths, year, month, use_local=use_local, include_completed=include_completed))
+        return
+    db = get_database(paths[0] if paths else os.environ.get(DB_ENV))
 
     # If no args, render current month
     if not args_list:
@@ -170,104 +318,68 @@ def cmd_calendar(args):
     if first in ("add", "remove", "show"):
         if len(args_list) < 2:
             console.print("Missing date argument")
-            return
-        date_token = args_list[1]
+            return 1
         if first == "add":
-            reason = None
-            # optional --reason value
-            if "--reason" in args_list:
-                idx = args_list.index("--reason")
-                if idx + 1 < len(args_list):
-                    reason = args_list[idx + 1]
-            try:
-                d = _parse_ymd(date_token)
-            except ValueError as e:
-                console.print(str(e))
-                return
-            rid = db.add_blocked_day(d, reason=reason)
-            console.print(f"Added blocked day {d.isoformat()} (id={rid})")
-            return
+            return _add_blocked(db, args_list[1:], "blocked", "Missing date argument")
         if first == "remove":
-            try:
-                d = _parse_ymd(date_token)
-            except ValueError as e:
-                console.print(str(e))
-                return
-            cnt = db.remove_blocked_day(d)
-            if cnt:
-                console.print(f"Removed blocked day {d.isoformat()}")
-            else:
-                console.print(f"No blocked day found for {d.isoformat()}")
-            return
+            return _remove_blocked(db, args_list[1:], "blocked")
         if first == "show":
             try:
-                _show_day(db, date_token, use_local=use_local, include_completed=include_completed)
+                _show_day(db, args_list[1], use_local=use_local, include_completed=include_completed)
             except ValueError as e:
                 console.print(str(e))
+                return 1
             return
 
     # New: support `decidrx calendar bad add|remove|list` aliases
     if first == "bad":
-        # form: bad add YYYY-MM-DD [--reason R]
+        # form: bad add YYYY-MM-DD [--until YYYY-MM-DD] [--reason R] | bad add --every RULE ...
         if len(args_list) < 2:
             console.print("Usage: calendar bad add|remove|list ...")
-            return
+            return 1
         sub = args_list[1]
         if sub == "add":
-            if len(args_list) < 3:
-                console.print("Missing date argument for bad add")
-                return
-            date_token = args_list[2]
-            reason = None
-            if "--reason" in args_list:
-                idx = args_list.index("--reason")
-                if idx + 1 < len(args_list):
-                    reason = args_list[idx + 1]
-            try:
-                d = _parse_ymd(date_token)
-            except ValueError as e:
-                console.print(str(e))
-                return
-            rid = db.add_blocked_day(d, reason=reason)
-            console.print(f"Added bad day {d.isoformat()} (id={rid})")
-            return
+            return _add_blocked(db, args_list[2:], "bad", "Missing date argument for bad add")
         if sub == "remove":
             if len(args_list) < 3:
                 console.print("Missing date argument for bad remove")
-                return
-            date_token = args_list[2]
-            try:
-                d = _parse_ymd(date_token)
-            except ValueError as e:
-                console.print(str(e))
-                return
-            cnt = db.remove_blocked_day(d)
-            if cnt:
-                console.print(f"Removed bad day {d.isoformat()}")
-            else:
-                console.print(f"No bad day found for {d.isoformat()}")
-            return
+                return 1
+            return _remove_blocked(db, args_list[2:], "bad")
         if sub == "list":
-            # optional year month
+            # optional year month: every blocked day of that month, rule occurrences included
             if len(args_list) >= 4:
                 try:
                     y = int(args_list[2]); m = int(args_list[3])
+                    month_start = date(y, m, 1)
                 except Exception:
                     console.print("Invalid year/month for bad list")
-                    return
-                rows = db.get_blocked_days_in_month(y, m)
+                    return 1
+                index = db.blocked_index(month_start, date(y + m // 12, m % 12 + 1, 1))
+                rows = [(d.isoformat(), reason or "", origin) for d, reason, origin in index.entries()]
+                rules = []
             else:
-                # show all
+                # show all: the stored days, then the rules unexpanded
                 cur = db.conn.cursor()
                 cur.execute("SELECT * FROM blocked_days ORDER BY date")
-                rows = cur.fetchall()
+                rows = [(r["date"], r["reason"] or "", str(r["id"])) for r in cur.fetchall()]
+                rules = db.get_blocked_rules()
             tbl = Table(title="Blocked days (bad)")
             tbl.add_column("date")
             tbl.add_column("reason")
             tbl.add_column("id", style="cyan")
-            for r in rows:
-                tbl.add_row(r["date"], r["reason"] or "", str(r["id"]))
+            for row in rows:
+                tbl.add_row(*row)
             console.print(tbl)
+            if rules:
+                rtbl = Table(title="Blocked-day rules")
+                rtbl.add_column("rule", style="bold")
+                rtbl.add_column("from")
+                rtbl.add_column("until")
+                rtbl.add_column("reason")
+                rtbl.add_column("id", style="cyan")
+                for r in rules:
+                    rtbl.add_row(str(r), r.start.isoformat(), r.until.isoformat() if r.until else "", r.reason or "", str(r.id))
+                console.print(rtbl)
             return
 
     # Otherwise, assume it's YEAR [MONTH]
@@ -276,7 +388,7 @@ def cmd_calendar(args):
         month = int(args_list[1]) if len(args_list) > 1 else None
     except Exception:
         console.print("Invalid arguments. Use `decidrx calendar YEAR MONTH` or `decidrx calendar add YYYY-MM-DD ...`")
-        return
+        return 1
     if not month:
         now = datetime.now()
         month = now.month
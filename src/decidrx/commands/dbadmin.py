@@ -0,0 +1,90 @@
+import os
+from datetime import datetime, timezone
+from rich.prompt import Confirm
+from rich.table import Table
+from decidrx import backup
+from decidrx.db import DEFAULT_DB, get_database
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+
+
+def _db_path() -> str:
+    return os.environ.get(DB_ENV) or DEFAULT_DB
+
+
+def cmd_db_backup(args):
+    try:
+        path = backup.snapshot(_db_path(), getattr(args, "dir", None), keep=getattr(args, "keep", backup.KEEP) or None,
+                               compress=getattr(args, "compress", False))
+    except ValueError as e:
+        console.print(str(e))
+        return 1
+    console.print(f"Backed up to {path} ({os.path.getsize(path) // 1024} KiB)")
+
+
+def cmd_db_list(args):
+    paths = backup.list_backups(_db_path(), getattr(args, "dir", None))
+    if not paths:
+        console.print("No backups yet.")
+        return
+    table = Table(title=f"Backups of {_db_path()}")
+    table.add_column("file", style="cyan")
+    table.add_column("taken (UTC)")
+    table.add_column("KiB", justify="right")
+    for p in paths:
+        taken = datetime.fromtimestamp(os.path.getmtime(p), timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        table.add_row(os.path.basename(p), taken, str(os.path.getsize(p) // 1024))
+    console.print(table)
+
+
+def cmd_db_restore(args):
+    source = getattr(args, "file", None)
+    if source is None:
+        paths = backup.list_backups(_db_path(), getattr(args, "dir", None))
+        if not paths:
+            console.print("No backups to restore.")
+            return 1
+        source = paths[0]
+    if not getattr(args, "yes", False):
+        ok = Confirm.ask(f"Replace every task in {_db_path()} with the contents of {source}?", default=False)
+        if not ok:
+            console.print("Aborted.")
+            return 1
+    db = get_database(os.environ.get(DB_ENV))
+    try:
+        saved = backup.restore(db, source, getattr(args, "dir", None))
+    except ValueError as e:
+        console.print(str(e))
+        return 1
+    if saved:
+        console.print(f"Saved the replaced contents to {saved}")
+    console.print(f"Restored {source}")
+
+
+def _day_counts(db) -> dict:
+    return {tuple(r[:3]): tuple(r[3:]) for r in db.conn.execute("SELECT * FROM deadline_day_counts")}
+
+
+def cmd_db_rebuild_counts(args):
+    """The triggers keep `deadline_day_counts` current; this recovers from edits made with them off."""
+    db = get_database(os.environ.get(DB_ENV))
+    before = _day_counts(db)
+    rows = db.rebuild_day_counts()
+    after = _day_counts(db)
+    drifted = sum(1 for k in before.keys() | after.keys() if before.get(k) != after.get(k))
+    console.print(f"Rebuilt deadline counters: {rows} hourly row(s), {drifted} corrected")
+
+
+def cmd_db_compact(args):
+    """Peers and watchers that fall behind the cut reload in full, so this only saves space."""
+    db = get_database(os.environ.get(DB_ENV))
+    days = getattr(args, "prune_deletions", None)
+    if days is not None and days < 0:
+        console.print("--prune-deletions must be >= 0")
+        return 1
+    removed = db.compact_changes()
+    console.print(f"Compacted the change feed: {removed} entr{'y' if removed == 1 else 'ies'} removed, "
+                  f"{db.conn.execute('SELECT COUNT(*) FROM changes').fetchone()[0]} kept")
+    if days is not None:
+        console.print(f"Forgot {db.prune_tombstones(days)} deletion(s) older than {days} day(s)")
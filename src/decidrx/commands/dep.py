@@ -0,0 +1,48 @@
+import os
+from rich.table import Table
+from decidrx.db import get_database
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+
+
+def cmd_dep_add(args):
+    db = get_database(os.environ.get(DB_ENV))
+    try:
+        added = db.add_dependency(int(args.task_id), int(args.depends_on))
+    except ValueError as e:
+        console.print(str(e))
+        return 1
+    if added:
+        console.print(f"Task {args.task_id} now depends on task {args.depends_on}")
+    else:
+        console.print(f"Task {args.task_id} already depends on task {args.depends_on}")
+
+
+def cmd_dep_remove(args):
+    db = get_database(os.environ.get(DB_ENV))
+    if db.remove_dependency(int(args.task_id), int(args.depends_on)):
+        console.print(f"Task {args.task_id} no longer depends on task {args.depends_on}")
+    else:
+        console.print(f"Task {args.task_id} does not depend on task {args.depends_on}")
+        return 1
+
+
+def cmd_dep_list(args):
+    db = get_database(os.environ.get(DB_ENV))
+    task_id = int(args.task_id)
+    if not db.get_task(task_id):
+        console.print("Task not found")
+        return 1
+    table = Table(title=f"Dependencies of task {task_id}")
+    table.add_column("relation")
+    table.add_column("id", style="cyan")
+    table.add_column("title", style="bold")
+    table.add_column("done")
+    for relation, rows in (("needs", db.get_dependencies(task_id)), ("blocks", db.get_dependents(task_id))):
+        for r in rows:
+            table.add_row(relation, str(r["id"]), r["title"], "yes" if r["completed"] else "no")
+    if not table.rows:
+        console.print(f"Task {task_id} has no dependencies")
+        return
+    console.print(table)
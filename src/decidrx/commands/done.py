@@ -1,11 +1,32 @@
 import os
-from decidrx.db import Database
+from decidrx.api import Session
 from decidrx.ui import console
 
 DB_ENV = "DECIDRX_DB"
 
 
 def cmd_done(args):
-    db = Database(os.environ.get(DB_ENV))
-    db.mark_done(args.task_id)
-    console.print(f"Marked task {args.task_id} done")
+    where, tags = getattr(args, "where", None), getattr(args, "tag", None)
+    with Session(os.environ.get(DB_ENV)) as session:
+        if not where and not tags:
+            if args.task_id is None:
+                console.print("Give a task id or --where EXPR")
+                return 1
+            try:
+                result = session.done(args.task_id)
+            except ValueError as e:
+                console.print(str(e))
+                return 1
+            console.print(f"Marked task {args.task_id} done")
+            if result.next is not None:
+                console.print(f"Next occurrence: task {result.next.id} due {result.next.deadline}")
+            return
+        if args.task_id is not None:
+            console.print("Give either a task id or --where, not both")
+            return 1
+        try:
+            ids = session.done_where(where, tags)
+        except ValueError as e:
+            console.print(f"Invalid filter: {e}")
+            return 1
+    console.print(f"Marked {len(ids)} task(s) done")
@@ -1,7 +1,7 @@
 import os
 from datetime import datetime
 from rich.prompt import Prompt, IntPrompt
-from decidrx.db import Database
+from decidrx.api import Session
 from decidrx.prompt import parse_deadline
 from decidrx.ui import console
 
@@ -9,11 +9,15 @@ DB_ENV = "DECIDRX_DB"
 
 
 def cmd_edit(args):
-    db = Database(os.environ.get(DB_ENV))
-    task = db.get_task(args.task_id)
+    with Session(os.environ.get(DB_ENV)) as session:
+        return _edit(session, args)
+
+
+def _edit(session: Session, args):
+    task = session.get(args.task_id)
     if not task:
         console.print(f"No task with id {args.task_id}")
-        return
+        return 1
 
     provided_flags = any(
         getattr(args, k) is not None for k in ("title", "deadline", "duration", "reward", "penalty", "effort", "type", "parent")
@@ -112,49 +116,20 @@ def cmd_edit(args):
             updates["type"] = t
 
     else:
-        if args.title is not None:
-            updates["title"] = args.title
-        if args.deadline is not None:
-            if args.deadline < 0:
-                console.print("Deadline must be >= 0.")
-                return
-            updates["deadline"] = parse_deadline(args.deadline)
-        if args.description is not None:
-            updates["description"] = args.description
-        if args.duration is not None:
-            if args.duration < 0:
-                console.print("Duration must be >= 0.")
-                return
-            updates["duration"] = args.duration
-        if args.reward is not None:
-            if args.reward < 0 or args.reward > 10:
-                console.print("Reward must be 0-10.")
-                return
-            updates["reward"] = args.reward
-        if args.penalty is not None:
-            if args.penalty < 0 or args.penalty > 10:
-                console.print("Penalty must be 0-10.")
-                return
-            updates["penalty"] = args.penalty
-        if args.effort is not None:
-            if args.effort < 0 or args.effort > 10:
-                console.print("Effort must be 0-10.")
-                return
-            updates["effort"] = args.effort
-        if args.type is not None:
-            if args.type not in ("deep", "shallow"):
-                console.print("Type must be 'deep' or 'shallow'.")
-                return
-            updates["type"] = args.type
+        # values are validated by Session.edit
+        for key in ("title", "deadline", "description", "duration", "reward", "penalty", "effort", "type"):
+            if getattr(args, key, None) is not None:
+                updates[key] = getattr(args, key)
         if getattr(args, 'parent', None) is not None:
             # explicit parent flag provided (use 0 to clear parent)
-            if args.parent == 0:
-                updates["parent_id"] = None
-            else:
-                updates["parent_id"] = args.parent
+            updates["parent_id"] = args.parent or None
     if not updates:
         console.print("No changes.")
         return
 
-    db.update_task(args.task_id, **updates)
+    try:
+        session.edit(args.task_id, **updates)
+    except ValueError as e:
+        console.print(str(e))
+        return 1
     console.print(f"Updated task {args.task_id}")
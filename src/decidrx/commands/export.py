@@ -0,0 +1,33 @@
+import csv
+import json
+import os
+import sys
+from decidrx.db import get_database
+from decidrx.filters import filter_from_args
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+
+COLUMNS = ["id", "title", "description", "deadline", "duration", "reward", "penalty", "effort", "type", "created_at", "completed", "completed_at", "parent_id", "recur", "series_id"]
+
+
+def cmd_export(args):
+    """Write tasks as JSON lines (default) or CSV to stdout, filtered in SQL by --where."""
+    db = get_database(os.environ.get(DB_ENV))
+    try:
+        where = filter_from_args(args)
+    except ValueError as e:
+        console.print(f"Invalid filter: {e}")
+        return 1
+    rows = db.find_tasks(where, include_completed=getattr(args, "all", False))
+    # tags are a list in JSON and comma-separated in CSV (tag names never contain commas)
+    tags = db.get_tags_map()
+    out = sys.stdout
+    if getattr(args, "format", "jsonl") == "csv":
+        writer = csv.writer(out)
+        writer.writerow(COLUMNS + ["tags"])
+        for r in rows:
+            writer.writerow([r[c] for c in COLUMNS] + [",".join(tags.get(r["id"], []))])
+    else:
+        for r in rows:
+            out.write(json.dumps({**{c: r[c] for c in COLUMNS}, "tags": tags.get(r["id"], [])}) + "\n")
@@ -0,0 +1,63 @@
+import os
+from datetime import date
+from rich.table import Table
+from decidrx.api import Session
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+# days listed in the table; the summary lines always cover the whole horizon
+MAX_ROWS = 31
+
+
+def _hours(minutes: int) -> str:
+    return f"{minutes // 60}h{minutes % 60:02d}" if minutes >= 60 else f"{minutes}m"
+
+
+def cmd_forecast(args):
+    try:
+        start = date.fromisoformat(args.start) if getattr(args, "start", None) else None
+    except ValueError:
+        console.print("--from must be YYYY-MM-DD")
+        return 1
+    with Session(os.environ.get(DB_ENV)) as session:
+        try:
+            fc = session.forecast(args.days, args.capacity, start=start)
+        except ValueError as e:
+            console.print(str(e))
+            return 1
+
+    count, backlog = fc.overdue
+    if count:
+        console.print(f"[red]{count} overdue task(s), {_hours(backlog)} of work already due[/red]")
+    table = Table(title=f"Forecast {fc.days[0].isoformat()} to {fc.days[-1].isoformat()} at {fc.capacity} min/day")
+    table.add_column("day")
+    table.add_column("due", justify="right")
+    table.add_column("due by then", justify="right")
+    table.add_column("available", justify="right")
+    table.add_column("slack", justify="right")
+    # only days that change the picture: something falls due, or the first shortfall
+    rows = [i for i, d in enumerate(fc.days) if fc.due[i] or i == fc.first_short]
+    for i in rows[:MAX_ROWS]:
+        d, slack = fc.days[i], fc.slack(i)
+        day = f"{d.strftime('%a')} {d.isoformat()}"
+        if d in fc.blocked:
+            day += " [white on red]blocked[/]"
+        style = "bold red" if slack < 0 else ("yellow" if slack < fc.capacity else "green")
+        mark = " [bold red]![/]" if i == fc.first_short else ""
+        table.add_row(day, _hours(fc.due[i]), _hours(fc.demand[i]), _hours(fc.supply[i]), f"[{style}]{slack:+d}m[/]{mark}")
+    if len(rows) > MAX_ROWS:
+        table.add_row(f"[dim]... {len(rows) - MAX_ROWS} more day(s)[/dim]", "", "", "", "")
+    if rows:
+        console.print(table)
+
+    total = fc.demand[-1] - backlog
+    console.print(f"{_hours(total)} due over {len(fc.days)} day(s), {_hours(fc.supply[-1])} available "
+                  f"({len(fc.days) - len(fc.blocked)} working day(s), {len(fc.blocked)} blocked)")
+    if fc.first_short is None:
+        tight = fc.tightest()
+        console.print(f"[green]Capacity covers every deadline.[/green] Tightest: {fc.days[tight].isoformat()} "
+                      f"with {_hours(fc.slack(tight))} to spare")
+        return
+    i = fc.first_short
+    console.print(f"[bold red]Over capacity from {fc.days[i].isoformat()}:[/bold red] {_hours(fc.demand[i])} due by then, "
+                  f"{_hours(fc.supply[i])} available (short {_hours(-fc.slack(i))})")
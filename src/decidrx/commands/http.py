@@ -0,0 +1,22 @@
+import asyncio
+import os
+from decidrx.httpapi import ApiServer
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+
+
+def cmd_http(args):
+    server = ApiServer(os.environ.get(DB_ENV), getattr(args, "host", "127.0.0.1"), getattr(args, "port", 8765))
+
+    async def run():
+        await server.start()
+        console.print(f"Serving {server.db.path} at http://{server.host}:{server.port}/ (Ctrl-C to stop)")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        console.print(f"Cannot listen on {server.host}:{server.port}: {e.strerror or e}")
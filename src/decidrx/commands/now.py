@@ -1,48 +1,48 @@
 import os
-from datetime import datetime, timezone
 from rich.table import Table
-from decidrx.db import Database
-from decidrx.scoring import score_task
+from decidrx import federation
+from decidrx.api import Session
+from decidrx.filters import build_filter
 from decidrx.ui import console
 
 DB_ENV = "DECIDRX_DB"
 
 
+def _rank(session: Session, args, limit):
+    return session.rank(limit, getattr(args, "where", None), getattr(args, "tag", None), getattr(args, "ready", False))
+
+
 def cmd_now(args):
-    db = Database(os.environ.get(DB_ENV))
-    tasks = db.get_pending_tasks()
-    if not tasks:
-        console.print("No pending tasks.")
-        return
-    scored = []
-    now = datetime.now(timezone.utc)
-    for t in tasks:
-        tdict = dict(t)
-        # compute base score for the task itself
-        score = score_task(tdict, now)
-        scored.append((score, tdict))
-        # if this task has children, also compute an aggregated parent score
-        children = db.get_children(t["id"])
-        if children:
-            # convert children rows to dicts
-            child_dicts = [dict(c) for c in children]
+    limit = getattr(args, "limit", 5) or 5
+    paths = federation.db_paths(args)
+    if len(paths) > 1:
+        try:
+            # validated once here rather than once per database
+            build_filter(getattr(args, "where", None), getattr(args, "tag", None))
+        except ValueError as e:
+            console.print(f"Invalid filter: {e}")
+            return 1
+        results = federation.fan_out(paths, lambda s: _rank(s, args, limit))
+        for name, err in federation.errors(results):
+            console.print(f"[yellow]Skipped {name}: {err}[/yellow]")
+        ranked = federation.merge_top(results, key=lambda r: r.score, limit=limit)
+    else:
+        with Session(paths[0] if paths else os.environ.get(DB_ENV)) as session:
             try:
-                from decidrx.scoring import aggregate_task_for_scoring
+                ranked = [(None, r) for r in _rank(session, args, limit)]
+            except ValueError as e:
+                console.print(f"Invalid filter: {e}")
+                return 1
+    console.print(ranked_table(ranked))
 
-                agg = aggregate_task_for_scoring(tdict, child_dicts)
-                agg_score = score_task(agg, now)
-                # attach an aggregated marker so UI can highlight if needed
-                agg_record = dict(agg)
-                agg_record["id"] = tdict["id"]
-                agg_record["_is_aggregate"] = True
-                scored.append((agg_score, agg_record))
-            except Exception:
-                # fall back to base behaviour on any error
-                pass
-    scored.sort(key=lambda x: x[0], reverse=True)
 
-    limit = getattr(args, "limit", 5) or 5
-    top = scored[:limit]
+def ranked_table(ranked):
+    """Table of (source, Ranked) pairs; source is None for a single database."""
+    if not ranked:
+        return "No pending tasks."
+
+    def label(source, task_id):
+        return federation.qualify(source, task_id) if source else str(task_id)
 
     table = Table(title="Ranked Tasks")
     table.add_column("rank", justify="right")
@@ -51,31 +51,24 @@ def cmd_now(args):
     table.add_column("score", justify="right")
 
     displayed = set()
-    for idx, (score, t) in enumerate(top, start=1):
+    for idx, (source, r) in enumerate(ranked, start=1):
+        t = r.task
         # If this row is a child that was already displayed under its parent, skip
-        if t.get("id") in displayed:
+        if (source, t.id) in displayed:
             continue
         # mark aggregated parent rows so users can tell them apart
-        title = t.get("title") or ""
-        if t.get("_is_aggregate"):
+        title = t.title or ""
+        if r.aggregate:
             title = f"{title} (agg)"
-        table.add_row(str(idx), str(t["id"]), title, f"{score:.3f}")
-        displayed.add(t.get("id"))
+        table.add_row(str(idx), label(source, t.id), title, f"{r.score:.3f}")
+        displayed.add((source, t.id))
         # if task has children, render them as inline rows with tree-style prefixes
-        try:
-            children = db.get_children(t["id"])
-        except Exception:
-            children = []
-        for i, c in enumerate(children):
+        for i, c in enumerate(r.children):
             # skip if child was explicitly in top and already displayed
-            if c["id"] in displayed:
+            if (source, c.id) in displayed:
                 continue
-            is_more = (i < len(children) - 1)
-            prefix = "├── " if is_more else "└── "
-            def v(key):
-                return c[key] if key in c.keys() and c[key] is not None else 0
-            child_title = f"{prefix}{c['title']}"
-            table.add_row("", str(c["id"]), child_title, "")
-            displayed.add(c["id"])
+            prefix = "├── " if i < len(r.children) - 1 else "└── "
+            table.add_row("", label(source, c.id), f"{prefix}{c.title}", "")
+            displayed.add((source, c.id))
 
-    console.print(table)
+    return table
@@ -0,0 +1,65 @@
+import os
+from datetime import datetime, timezone
+from rich.table import Table
+from decidrx.db import SCORE_COLUMNS, get_database
+from decidrx.deps import effective_deadlines
+from decidrx.filters import filter_from_args
+from decidrx.planner import Item, solve
+from decidrx.profiling import phase
+from decidrx.scoring import score_task
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+
+
+def cmd_plan(args):
+    db = get_database(os.environ.get(DB_ENV))
+    minutes = args.minutes
+    if minutes is None or minutes <= 0:
+        console.print("--minutes must be positive")
+        return 1
+    try:
+        where = filter_from_args(args)
+    except ValueError as e:
+        console.print(f"Invalid filter: {e}")
+        return 1
+    # leaves only: a parent's remaining work is its pending subtasks, which are candidates themselves
+    tasks = db.get_quick_tasks(minutes, leaves_only=True, where=where, columns=SCORE_COLUMNS)
+    inherited = effective_deadlines(db.get_pending_dependency_edges())
+    now = datetime.now(timezone.utc)
+    items = []
+    unestimated = 0
+    with phase("score"):
+        for t in tasks:
+            if not t["duration"]:
+                unestimated += 1
+                continue
+            scored = t.replace(deadline=inherited[t.id]) if t.id in inherited else t
+            items.append(Item(t, score_task(scored, now), t.duration, t.type or "shallow"))
+    caps = {}
+    if args.max_deep is not None:
+        caps["deep"] = args.max_deep
+    if args.max_shallow is not None:
+        caps["shallow"] = args.max_shallow
+    with phase("solve"):
+        plan = solve(items, minutes, caps, time_limit=args.time_limit)
+    if not plan.items:
+        console.print("Nothing fits in the given time.")
+        return
+
+    table = Table(title=f"Plan for {minutes} min")
+    table.add_column("id", style="cyan")
+    table.add_column("title", style="bold")
+    table.add_column("under", style="dim")
+    table.add_column("type")
+    table.add_column("min", justify="right")
+    table.add_column("score", justify="right")
+    # most urgent first, the order to work through them
+    for it in sorted(plan.items, key=lambda it: it.value, reverse=True):
+        t = it.key
+        table.add_row(str(t["id"]), t["title"], t["parent_title"] or "", it.kind, str(it.minutes), f"{it.value:.3f}")
+    status = "optimal" if plan.optimal else f"best found within {args.time_limit:g}s"
+    table.caption = f"{plan.minutes}/{minutes} min, total score {plan.value:.3f} ({status})"
+    console.print(table)
+    if unestimated:
+        console.print(f"[dim]{unestimated} task(s) without a duration were not considered[/dim]")
@@ -1,28 +1,50 @@
 import os
-from datetime import datetime, timezone
 from rich.table import Table
-from decidrx.db import Database
-from decidrx.scoring import score_task
+from decidrx import federation
+from decidrx.api import Session
+from decidrx.filters import build_filter
 from decidrx.ui import console
 
 DB_ENV = "DECIDRX_DB"
 
 
+def _quick(session: Session, args):
+    return session.quick(getattr(args, "max_duration", 20), getattr(args, "limit", 10), getattr(args, "leaves", False),
+                         getattr(args, "where", None), getattr(args, "tag", None))
+
+
 def cmd_quick(args):
-    db = Database(os.environ.get(DB_ENV))
-    tasks = db.get_pending_tasks()
-    now = datetime.now(timezone.utc)
-    quicks = []
-    for t in tasks:
-        if (t["duration"] or 0) <= 20:
-            score = score_task(dict(t), now)
-            quicks.append((score, dict(t)))
-    quicks.sort(key=lambda x: x[0], reverse=True)
-    table = Table(title="Quick Wins (<20 min)")
+    max_duration = getattr(args, "max_duration", 20)
+    leaves = getattr(args, "leaves", False)
+    paths = federation.db_paths(args)
+    if len(paths) > 1:
+        try:
+            build_filter(getattr(args, "where", None), getattr(args, "tag", None))
+        except ValueError as e:
+            console.print(f"Invalid filter: {e}")
+            return 1
+        results = federation.fan_out(paths, lambda s: _quick(s, args))
+        for name, err in federation.errors(results):
+            console.print(f"[yellow]Skipped {name}: {err}[/yellow]")
+        quicks = federation.merge_top(results, key=lambda q: q.score, limit=getattr(args, "limit", 10))
+    else:
+        with Session(paths[0] if paths else os.environ.get(DB_ENV)) as session:
+            try:
+                quicks = [(None, q) for q in _quick(session, args)]
+            except ValueError as e:
+                console.print(f"Invalid filter: {e}")
+                return 1
+    table = Table(title=f"Quick Wins (<={max_duration} min)")
     table.add_column("id")
     table.add_column("title")
+    if leaves:
+        table.add_column("under", style="dim")
     table.add_column("duration")
     table.add_column("score")
-    for s, t in quicks:
-        table.add_row(str(t["id"]), t["title"], str(t.get("duration") or ""), f"{s:.3f}")
+    for source, q in quicks:
+        row = [federation.qualify(source, q.task.id) if source else str(q.task.id), q.task.title]
+        if leaves:
+            row.append(q.parent_title or "")
+        row += [str(q.task.duration or ""), f"{q.score:.3f}"]
+        table.add_row(*row)
     console.print(table)
@@ -1,18 +1,18 @@
 import os
 from rich.prompt import Confirm
-from decidrx.db import Database
+from decidrx.db import get_database
 from decidrx.ui import console
 
 DB_ENV = "DECIDRX_DB"
 
 
 def cmd_remove(args):
-    db = Database(os.environ.get(DB_ENV))
+    db = get_database(os.environ.get(DB_ENV))
     try:
         tid = int(args.task_id)
     except Exception:
         console.print("task_id must be an integer")
-        return
+        return 1
 
     # check children count
     cur = db.conn.cursor()
@@ -35,10 +35,11 @@ def cmd_remove(args):
 
     if not ok:
         console.print("Aborted.")
-        return
+        return 1
 
     try:
         deleted = db.delete_task(tid, cascade=True)
         console.print(f"Deleted {deleted} task(s) (including subtasks if any)")
     except ValueError as e:
         console.print(str(e))
+        return 1
@@ -1,24 +1,29 @@
 import os
 from rich.prompt import Confirm
-from decidrx.db import Database
+from decidrx.db import get_database
 from decidrx.ui import console
 
 DB_ENV = "DECIDRX_DB"
 
 
+def _reset(db, args):
+    saved = db.reset(snapshot=not getattr(args, "no_backup", False))
+    if saved:
+        console.print(f"Saved a snapshot to {saved}")
+    console.print("Database reset.")
+
+
 def cmd_reset(args):
-    db = Database(os.environ.get(DB_ENV))
+    db = get_database(os.environ.get(DB_ENV))
 
     # If --yes is passed, do not prompt
     if getattr(args, "yes", False):
-        db.reset()
-        console.print("Database reset.")
+        _reset(db, args)
         return
 
     # Otherwise prompt for confirmation
     ok = Confirm.ask(f"Are you sure you want to reset the database at {db.path}? This will delete ALL tasks", default=False)
     if not ok:
         console.print("Aborted.")
-        return
-    db.reset()
-    console.print("Database reset.")
+        return 1
+    _reset(db, args)
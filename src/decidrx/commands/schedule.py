@@ -0,0 +1,113 @@
+import calendar as _calendar
+import os
+from datetime import date, datetime, timezone
+from rich.panel import Panel
+from rich.table import Table
+from decidrx.db import SCORE_COLUMNS, get_database
+from decidrx.deps import effective_deadlines
+from decidrx.filters import filter_from_args
+from decidrx.profiling import phase
+from decidrx.scheduler import Job, schedule, working_days
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+# rows shown in the infeasible-deadline table
+MAX_LATE_ROWS = 20
+
+
+def _local_date(ts: str, local_tz) -> date:
+    dt = datetime.fromisoformat(ts)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(local_tz).date()
+
+
+def _cell(d: date, plan, blocked, late_days: set) -> str:
+    if d in blocked:
+        return f"[white on red]{d.day:2d} 🔒[/]"
+    load = plan.load.get(d, 0)
+    if d not in plan.load or not load:
+        return f"[dim]{d.day:2d}[/]"
+    mark = " [bold red]![/]" if d in late_days else ""
+    style = "bold yellow" if load >= plan.capacity else "green"
+    return f"[{style}]{d.day:2d} {load}m[/]{mark}"
+
+
+def _render_months(plan, start: date, end: date, blocked, late_days: set):
+    cal = _calendar.Calendar(firstweekday=0)
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        table = Table(title=f"{year}-{month:02d}")
+        for h in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]:
+            table.add_column(h)
+        for week in cal.monthdatescalendar(year, month):
+            table.add_row(*[
+                _cell(d, plan, blocked, late_days) if d.month == month and start <= d <= end else ""
+                for d in week
+            ])
+        legend = "[green]planned minutes[/green], [bold yellow]full[/bold yellow], [bold red]![/bold red] late finish, [white on red]blocked[/]"
+        console.print(Panel(table, title=f"Schedule: {year}-{month:02d}", subtitle=legend, expand=False))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def cmd_schedule(args):
+    db = get_database(os.environ.get(DB_ENV))
+    if args.days <= 0 or args.capacity <= 0:
+        console.print("--days and --capacity must be positive")
+        return 1
+    try:
+        where = filter_from_args(args)
+    except ValueError as e:
+        console.print(f"Invalid filter: {e}")
+        return 1
+    now_local = datetime.now().astimezone()
+    # resolved once: astimezone() without a tz looks the zone up again for every call
+    local_tz = now_local.tzinfo
+    start = now_local.date()
+    end = date.fromordinal(start.toordinal() + args.days - 1)
+    blocked = db.blocked_index(start, date.fromordinal(end.toordinal() + 1))
+    # leaves only: a parent's remaining work is its pending subtasks
+    tasks = db.get_quick_tasks(None, leaves_only=True, where=where, columns=SCORE_COLUMNS)
+    edge_rows = db.get_pending_dependency_edges()
+    with phase("schedule"):
+        # prerequisites are due when their earliest dependent is
+        inherited = effective_deadlines(edge_rows)
+        jobs = []
+        rows = {}
+        unestimated = 0
+        for t in tasks:
+            if not t["duration"]:
+                unestimated += 1
+                continue
+            due = _local_date(inherited[t.id], local_tz) if t.id in inherited else (
+                t.deadline_dt.astimezone(local_tz).date() if t.deadline_dt else None)
+            rows[t.id] = t
+            jobs.append(Job(t.id, t.duration, due))
+        edges = [(a, b) for a, b, _, _ in edge_rows]
+        plan = schedule(jobs, working_days(start, args.days, blocked), args.capacity, edges)
+
+    late_days = {finish for _, finish in plan.late if finish is not None}
+    _render_months(plan, start, end, blocked, late_days)
+
+    planned = sum(plan.load.values())
+    console.print(f"{len(plan.finish)} of {len(jobs)} task(s) scheduled, {planned} min over {len(plan.days)} working day(s) at {args.capacity} min/day")
+    if plan.unscheduled:
+        console.print(f"{len(plan.unscheduled)} task(s) do not fit in the next {args.days} day(s)")
+    if unestimated:
+        console.print(f"[dim]{unestimated} task(s) without a duration were not scheduled[/dim]")
+    if not plan.late:
+        console.print("[green]All deadlines are feasible.[/green]")
+        return
+    table = Table(title=f"Infeasible deadlines ({len(plan.late)})")
+    table.add_column("id", style="cyan")
+    table.add_column("title", style="bold")
+    table.add_column("due", style="magenta")
+    table.add_column("finishes")
+    table.add_column("late", justify="right", style="red")
+    for job, finish in plan.late[:MAX_LATE_ROWS]:
+        t = rows[job.key]
+        late = f"{(finish - job.due).days}d" if finish else "-"
+        table.add_row(str(t["id"]), t["title"], job.due.isoformat(), finish.isoformat() if finish else "not in horizon", late)
+    if len(plan.late) > MAX_LATE_ROWS:
+        table.add_row("", f"[dim]... {len(plan.late) - MAX_LATE_ROWS} more[/dim]", "", "", "")
+    console.print(table)
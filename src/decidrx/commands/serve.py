@@ -0,0 +1,36 @@
+import asyncio
+import os
+import socket
+from decidrx import client, daemon
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+
+
+def cmd_serve(args):
+    path = getattr(args, "socket", None) or client.socket_path()
+    if getattr(args, "stop", False):
+        if daemon.stop(path):
+            console.print(f"Stopped the daemon on {path}")
+        else:
+            console.print(f"No daemon on {path}")
+            return 1
+        return
+    if getattr(args, "status", False):
+        replies = client.request({"op": "ping"}, path, timeout=5)
+        if not replies:
+            console.print(f"No daemon on {path}")
+            return 1
+        info = replies[0]
+        console.print(f"Daemon pid {info['pong']} serving {info['db']} on {path} ({info['served']} commands)")
+        return
+    if not hasattr(socket, "AF_UNIX"):
+        console.print("decidrx serve needs UNIX domain sockets, which this platform does not have")
+        return 1
+    d = daemon.Daemon(os.environ.get(DB_ENV), path)
+    console.print(f"Serving {d.db_path} on {path} (Ctrl-C to stop)")
+    try:
+        asyncio.run(d.run())
+    except RuntimeError as e:
+        console.print(str(e))
+        return 1
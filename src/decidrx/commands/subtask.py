@@ -2,19 +2,19 @@ import os
 from typing import Optional
 from rich.prompt import Prompt, IntPrompt, Confirm
 from decidrx.prompt import parse_deadline, prompt_str, prompt_int
-from decidrx.db import Database
+from decidrx.db import get_database
 from decidrx.ui import console
 
 DB_ENV = "DECIDRX_DB"
 
 
 def cmd_subtask_add(args):
-    db = Database(os.environ.get(DB_ENV))
+    db = get_database(os.environ.get(DB_ENV))
     try:
         parent_id = int(args.parent_id)
     except Exception:
         console.print("Parent id must be an integer")
-        return
+        return 1
 
     # If title provided non-interactively
     if getattr(args, "title", None):
@@ -25,6 +25,7 @@ def cmd_subtask_add(args):
             console.print(f"Added subtask [bold]{args.title}[/bold] (id={child_id})")
         except ValueError as e:
             console.print(str(e))
+            return 1
         return
 
     # Interactive flow
@@ -66,15 +67,16 @@ def cmd_subtask_add(args):
         console.print(f"Added subtask [bold]{title}[/bold] (id={child_id})")
     except ValueError as e:
         console.print(str(e))
+        return 1
 
 
 def cmd_subtask_list(args):
-    db = Database(os.environ.get(DB_ENV))
+    db = get_database(os.environ.get(DB_ENV))
     try:
         parent_id = int(args.parent_id)
     except Exception:
         console.print("Parent id must be an integer")
-        return
+        return 1
 
     children = db.get_children(parent_id)
     from rich.table import Table
@@ -92,19 +94,19 @@ def cmd_subtask_list(args):
 
 
 def cmd_subtask_remove(args):
-    db = Database(os.environ.get(DB_ENV))
+    db = get_database(os.environ.get(DB_ENV))
     try:
         parent_id = int(args.parent_id)
         child_id = int(args.child_id)
     except Exception:
         console.print("parent_id and child_id must be integers")
-        return
+        return 1
 
     # verify relationship
     c = db.get_task(child_id)
     if not c or c["parent_id"] != parent_id:
         console.print("Child not found for the given parent")
-        return
+        return 1
 
     # confirm
     try:
@@ -113,7 +115,7 @@ def cmd_subtask_remove(args):
         ok = False
     if not ok:
         console.print("Aborted.")
-        return
+        return 1
 
     # delete
     try:
@@ -121,22 +123,23 @@ def cmd_subtask_remove(args):
         console.print(f"Deleted subtask {child_id}")
     except ValueError as e:
         console.print(str(e))
+        return 1
 
 
 def cmd_subtask_edit(args):
-    db = Database(os.environ.get(DB_ENV))
+    db = get_database(os.environ.get(DB_ENV))
     try:
         parent_id = int(args.parent_id)
         child_id = int(args.child_id)
     except Exception:
         console.print("parent_id and child_id must be integers")
-        return
+        return 1
 
     # verify relationship
     child = db.get_task(child_id)
     if not child or child["parent_id"] != parent_id:
         console.print("Child not found for the given parent")
-        return
+        return 1
 
     # accept similar flags to edit
     provided_flags = any(
@@ -239,34 +242,34 @@ def cmd_subtask_edit(args):
         if args.deadline is not None:
             if args.deadline < 0:
                 console.print("Deadline must be >= 0.")
-                return
+                return 1
             updates["deadline"] = parse_deadline(args.deadline)
         if args.description is not None:
             updates["description"] = args.description
         if args.duration is not None:
             if args.duration < 0:
                 console.print("Duration must be >= 0.")
-                return
+                return 1
             updates["duration"] = args.duration
         if args.reward is not None:
             if args.reward < 0 or args.reward > 10:
                 console.print("Reward must be 0-10.")
-                return
+                return 1
             updates["reward"] = args.reward
         if args.penalty is not None:
             if args.penalty < 0 or args.penalty > 10:
                 console.print("Penalty must be 0-10.")
-                return
+                return 1
             updates["penalty"] = args.penalty
         if args.effort is not None:
             if args.effort < 0 or args.effort > 10:
                 console.print("Effort must be 0-10.")
-                return
+                return 1
             updates["effort"] = args.effort
         if args.type is not None:
             if args.type not in ("deep", "shallow"):
                 console.print("Type must be 'deep' or 'shallow'.")
-                return
+                return 1
             updates["type"] = args.type
 
     if not updates:
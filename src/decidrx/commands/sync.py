@@ -0,0 +1,35 @@
+import os
+from decidrx import sync
+from decidrx.db import Database, get_database
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+
+
+def _describe(counts) -> str:
+    return f"{counts['created']} created, {counts['updated']} updated, {counts['deleted']} deleted"
+
+
+def cmd_sync(args):
+    other, folder = getattr(args, "other", None), getattr(args, "dir", None)
+    if bool(other) == bool(folder):
+        console.print("Give either another database file or --dir.")
+        return 1
+    db = get_database(os.environ.get(DB_ENV))
+    if folder:
+        sent, pulled = sync.sync_directory(db, folder)
+        console.print(f"Wrote {sent} changed task(s) to {folder}; received {_describe(pulled)}.")
+        return
+    if not os.path.exists(other):
+        # opening would silently create an empty database
+        console.print(f"No database at {other}")
+        return 1
+    if os.path.abspath(other) == os.path.abspath(db.path):
+        console.print("Cannot sync a database with itself.")
+        return 1
+    peer = Database(other)
+    try:
+        pushed, pulled = sync.sync_databases(db, peer)
+    finally:
+        peer.conn.close()
+    console.print(f"Sent to {other}: {_describe(pushed)}. Received: {_describe(pulled)}.")
@@ -0,0 +1,42 @@
+import os
+from rich.table import Table
+from decidrx.db import get_database
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+
+
+def cmd_tag_add(args):
+    db = get_database(os.environ.get(DB_ENV))
+    try:
+        added = db.add_tags(int(args.task_id), args.tags)
+    except ValueError as e:
+        console.print(str(e))
+        return 1
+    console.print(f"Tagged task {args.task_id} ({added} new tag link(s))")
+
+
+def cmd_tag_remove(args):
+    db = get_database(os.environ.get(DB_ENV))
+    try:
+        removed = db.remove_tags(int(args.task_id), args.tags)
+    except ValueError as e:
+        console.print(str(e))
+        return 1
+    console.print(f"Removed {removed} tag(s) from task {args.task_id}")
+
+
+def cmd_tag_list(args):
+    db = get_database(os.environ.get(DB_ENV))
+    if getattr(args, "task_id", None) is not None:
+        tags = db.get_tags(int(args.task_id))
+        console.print(", ".join(tags) if tags else f"Task {args.task_id} has no tags")
+        return
+    rows = db.tag_counts()
+    table = Table(title="Tags")
+    table.add_column("tag", style="cyan")
+    table.add_column("pending", justify="right")
+    table.add_column("total", justify="right")
+    for r in rows:
+        table.add_row(r["name"], str(r["pending"] or 0), str(r["total"]))
+    console.print(table)
@@ -2,24 +2,24 @@ import os
 from datetime import datetime
 from rich.panel import Panel
 from rich.table import Table
-from decidrx.db import Database
+from decidrx.db import get_database
 from decidrx.ui import console
 
 DB_ENV = "DECIDRX_DB"
 
 
 def cmd_view(args):
-    db = Database(os.environ.get(DB_ENV))
+    db = get_database(os.environ.get(DB_ENV))
     try:
         task_id = int(args.task_id)
     except Exception:
         console.print("task_id must be an integer")
-        return
+        return 1
 
     task = db.get_task(task_id)
     if not task:
         console.print(f"No task with id {task_id}")
-        return
+        return 1
 
     # format deadline and timestamps
     def fmt_iso(s):
@@ -38,6 +38,11 @@ def cmd_view(args):
     meta.append(f"effort={task['effort'] or 0}")
     if 'deadline' in task.keys() and task['deadline']:
         meta.append(f"deadline={fmt_iso(task['deadline'])}")
+    if 'recur' in task.keys() and task['recur']:
+        meta.append(f"recurs={task['recur']}")
+    tags = db.get_tags(task_id)
+    if tags:
+        meta.append(f"tags={','.join(tags)}")
     meta_line = " | ".join(meta)
 
     created = fmt_iso(task['created_at']) if 'created_at' in task.keys() and task['created_at'] else ""
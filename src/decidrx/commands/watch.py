@@ -0,0 +1,103 @@
+import os
+import time
+from datetime import date
+from decidrx.api import LiveRanking, Session
+from decidrx.ui import console
+
+DB_ENV = "DECIDRX_DB"
+
+
+def _now_view(session: Session, args):
+    ranking = LiveRanking(session, getattr(args, "where", None), getattr(args, "tag", None), getattr(args, "ready", False))
+    limit = getattr(args, "limit", 5) or 5
+
+    def render(full: bool):
+        if full:
+            ranking.refresh()
+        elif ranking.update() is None:
+            return None
+        from decidrx.commands.now import ranked_table
+
+        return ranked_table([(None, r) for r in ranking.top(limit)])
+
+    return render
+
+
+def _on_change(session: Session, build):
+    """Render with `build()` when the change feed moved (or on a full refresh)."""
+    seen = [None]
+
+    def render(full: bool):
+        latest = session.db.last_change()
+        if not full and latest == seen[0]:
+            return None
+        seen[0] = latest
+        return build()
+
+    return render
+
+
+def _period(args):
+    values = getattr(args, "period", None) or []
+    today = date.today()
+    if len(values) > 2:
+        raise ValueError("expected at most YEAR MONTH")
+    year = int(values[0]) if values else today.year
+    month = int(values[1]) if len(values) > 1 else (today.month if not values else 1)
+    if not 1 <= month <= 12:
+        raise ValueError("month must be 1-12")
+    return year, month
+
+
+def watch(render, interval: float = 1.0, rescore: float = 60.0, count=None, sleep=time.sleep, clock=time.monotonic):
+    """Yield a first rendering, then one per poll that found changes (or every `rescore` seconds)."""
+    yield render(True)
+    last_full = clock()
+    polls = 0
+    while count is None or polls < count:
+        sleep(interval)
+        polls += 1
+        # scores and "time left" drift with the clock even when nothing is written
+        full = clock() - last_full >= rescore
+        out = render(full)
+        if full:
+            last_full = clock()
+        if out is not None:
+            yield out
+
+
+def cmd_watch(args):
+    with Session(os.environ.get(DB_ENV)) as session:
+        try:
+            if args.view == "now":
+                render = _now_view(session, args)
+            elif args.view == "show":
+                from decidrx.commands.show import tree_table
+
+                where, tags, include_completed = getattr(args, "where", None), getattr(args, "tag", None), getattr(args, "all", False)
+                session.tree(where, tags)  # validate the filter before the first poll
+                render = _on_change(session, lambda: tree_table(session.tree(where, tags, include_completed=include_completed)))
+            else:
+                from decidrx.commands.calendar import _render_month
+
+                year, month = _period(args)
+                render = _on_change(session, lambda: _render_month(session.db, year, month, include_completed=getattr(args, "all", False)))
+            frames = watch(render, args.interval, args.rescore, getattr(args, "count", None))
+            first = next(frames)
+        except ValueError as e:
+            console.print(f"Invalid arguments: {e}")
+            return 1
+        try:
+            if console.is_terminal:
+                from rich.live import Live
+
+                with Live(first, console=console, auto_refresh=False) as live:
+                    for frame in frames:
+                        live.update(frame, refresh=True)
+            else:
+                # piped: append each new rendering
+                console.print(first)
+                for frame in frames:
+                    console.print(frame)
+        except KeyboardInterrupt:
+            pass
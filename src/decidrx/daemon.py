@@ -0,0 +1,270 @@
+"""Resident daemon behind a UNIX socket (`decidrx serve`).
+
+The daemon keeps one database connection open, with its read cache on, so pending
+tasks are loaded and their timestamps decoded once and reused until the database is
+written (by the daemon or any other process). Clients (`decidrx.client`) send argv and
+get the command's output streamed back line by line.
+
+Commands run one at a time on a single worker thread, each in its own transaction, so
+concurrent clients get the same results as running their commands one after another.
+The asyncio loop only reads requests and writes replies. A command that would prompt
+is rolled back and handed back to the client to run in-process.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import signal
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from rich.console import COLOR_SYSTEMS
+
+from decidrx import client
+from decidrx.commands.batch import InteractiveInputRequired, _NoInput
+from decidrx.db import USER_DB, Database, shared_database
+from decidrx.ui import console, err_console
+
+
+class _Failed(Exception):
+    """A command returned a failure status: its transaction is rolled back."""
+
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+
+class _LineStream(io.TextIOBase):
+    """Text stream handing complete lines to `emit`; a trailing partial line waits for `finish`.
+
+    Holding back partial lines keeps a prompt ("Title: ") from reaching the client when
+    the command is then handed back to run in-process.
+    """
+
+    def __init__(self, emit: Callable[[str], None]):
+        self._emit = emit
+        self._pending = ""
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    def write(self, s):
+        text = self._pending + s
+        cut = text.rfind("\n") + 1
+        if cut:
+            self._emit(text[:cut])
+        self._pending = text[cut:]
+        return len(s)
+
+    def flush(self):
+        pass
+
+    def finish(self):
+        if self._pending:
+            self._emit(self._pending)
+            self._pending = ""
+
+    def discard(self):
+        self._pending = ""
+
+
+@contextlib.contextmanager
+def _client_terminal(out, err, width: Optional[int], colors: Optional[str]):
+    """Point the shared rich consoles at the client's streams, rendered for its terminal."""
+    # `_file` rather than `file`: None means "whatever sys.stdout/stderr is at print time"
+    saved = [(c, c._file, c._width, c._force_terminal, c._color_system) for c in (console, err_console)]
+    try:
+        for c, stream in ((console, out), (err_console, err)):
+            c.file = stream
+            c.width = width or 80
+            # rich keeps these private; they decide whether ANSI styles are written
+            c._force_terminal = bool(colors)
+            c._color_system = COLOR_SYSTEMS.get(colors) if colors else None
+        yield
+    finally:
+        for c, file, w, force, system in saved:
+            c._file, c._width, c._force_terminal, c._color_system = file, w, force, system
+
+
+class Daemon:
+    """Serve decidrx commands for one database on a UNIX socket."""
+
+    def __init__(self, db_path: Optional[str] = None, socket_path: Optional[str] = None):
+        self.db_path = os.path.abspath(db_path or os.environ.get("DECIDRX_DB") or USER_DB)
+        self.socket_path = socket_path or client.socket_path()
+        self.tz = os.environ.get("TZ")
+        self.served = 0
+        self._stop: Optional[asyncio.Event] = None
+        # one worker: sqlite connections belong to the thread that opened them, and running
+        # commands in sequence is what keeps concurrent clients consistent
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decidrx-serve", initializer=self._open)
+        self.db: Optional[Database] = None
+
+    # -- worker thread -------------------------------------------------------
+    def _open(self):
+        from decidrx.cli import build_parser
+
+        # commands look the database up by $DECIDRX_DB; make that resolve to the shared connection
+        self._env_db = os.environ.get("DECIDRX_DB")
+        os.environ["DECIDRX_DB"] = self.db_path
+        self.db = Database(self.db_path)
+        self.db.enable_read_cache()
+        self._inode = self._current_inode()
+        self.parser = build_parser()
+        self._shared = contextlib.ExitStack()
+        self._shared.enter_context(shared_database(self.db))
+
+    def _close(self):
+        self._shared.close()
+        self.db.conn.close()
+        if self._env_db is None:
+            os.environ.pop("DECIDRX_DB", None)
+        else:
+            os.environ["DECIDRX_DB"] = self._env_db
+
+    def _current_inode(self):
+        try:
+            return os.stat(self.db_path).st_ino
+        except OSError:
+            return None
+
+    def _target(self, req) -> str:
+        db = req.get("db")
+        return os.path.abspath(os.path.join(req.get("cwd") or "", db)) if db else USER_DB
+
+    def execute(self, req: dict, emit: Callable[[dict], None]) -> dict:
+        """Run one request on the worker thread; returns the closing message."""
+        if self._target(req) != self.db_path:
+            return {"fallback": "the daemon serves another database"}
+        if req.get("tz") != self.tz:
+            return {"fallback": "the daemon runs in another timezone"}
+        argv = [str(a) for a in req.get("argv") or []]
+        if client.runs_locally(argv):
+            return {"fallback": "command runs in the client"}
+        if self._current_inode() != self._inode:
+            # the file was replaced (e.g. `decidrx reset` run without the daemon)
+            self._close()
+            self._open()
+        out = _LineStream(lambda s: emit({"out": s}))
+        err = _LineStream(lambda s: emit({"err": s}))
+        stdin = sys.stdin
+        sys.stdin = _NoInput()
+        code = 0
+        try:
+            with _client_terminal(out, err, req.get("width"), req.get("colors")), \
+                    contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                code = self._run(argv)
+        except InteractiveInputRequired:
+            out.discard()
+            err.discard()
+            return {"fallback": "command needs interactive input"}
+        except Exception as e:
+            err.write(f"decidrx: {e or type(e).__name__}\n")
+            traceback.print_exc(file=sys.__stderr__)
+            code = 1
+        finally:
+            sys.stdin = stdin
+        out.finish()
+        err.finish()
+        self.served += 1
+        return {"exit": code}
+
+    def _run(self, argv) -> int:
+        from decidrx.cli import run_command
+
+        try:
+            ns = self.parser.parse_args(argv)
+        except SystemExit as e:
+            # argparse already wrote the usage error (or --help) to the redirected streams
+            return e.code if isinstance(e.code, int) else 1
+        if not hasattr(ns, "func"):
+            self.parser.print_help()
+            return 0
+        # a failing command leaves nothing behind, whether it raises or returns a failure status
+        try:
+            with self.db.transaction():
+                status = run_command(ns)
+                if status:
+                    raise _Failed(status)
+        except _Failed as e:
+            return e.status
+        return 0
+
+    # -- event loop ----------------------------------------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+
+        def emit(message):
+            loop.call_soon_threadsafe(writer.write, client.encode(message))
+
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            req = json.loads(line)
+            op = req.get("op")
+            if op == "ping":
+                writer.write(client.encode({"pong": os.getpid(), "db": self.db_path, "served": self.served}))
+            elif op == "stop":
+                writer.write(client.encode({"stopping": os.getpid()}))
+                self._stop.set()
+            else:
+                writer.write(client.encode(await loop.run_in_executor(self._pool, self.execute, req, emit)))
+            await writer.drain()
+        except (ValueError, AttributeError) as e:
+            writer.write(client.encode({"err": f"decidrx: bad request: {e}\n"}))
+            writer.write(client.encode({"exit": 2}))
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, ready: Optional[threading.Event] = None):
+        """Serve until SIGINT/SIGTERM or a stop request; `ready` is set once clients can connect."""
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o700)
+        if not client.safe_directory(directory):
+            raise RuntimeError(f"{directory} can be changed by other users; pick a private socket path")
+        if os.path.lexists(self.socket_path):
+            if not client.owned_socket(self.socket_path):
+                raise RuntimeError(f"{self.socket_path} exists and is not a private socket of this user")
+            if client.request({"op": "ping"}, self.socket_path, timeout=2) is not None:
+                raise RuntimeError(f"a daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        # open the database before accepting clients so the first command is warm too
+        await loop.run_in_executor(self._pool, lambda: None)
+        # created 0600 from the start: no window in which another user could connect
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        finally:
+            os.umask(umask)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError, RuntimeError, ValueError):
+                loop.add_signal_handler(sig, self._stop.set)
+        if ready is not None:
+            ready.set()
+        try:
+            await self._stop.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            await loop.run_in_executor(self._pool, self._close)
+            self._pool.shutdown()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
+
+
+def stop(socket_path: Optional[str] = None) -> bool:
+    """Ask the daemon on `socket_path` to exit; False when none is running."""
+    return client.request({"op": "stop"}, socket_path, timeout=5) is not None
@@ -1,17 +1,224 @@
 import os
 import sqlite3
-from datetime import datetime, timezone
-from typing import Optional, List, Dict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional, List, Dict, Sequence, Tuple
+
+from decidrx import tracing
+from decidrx.blocked import BlockedIndex, BlockRule, parse_block_rule
+from decidrx.profiling import phase, timed
+from decidrx.recurrence import parse_rule, parse_timestamp
+from decidrx.records import TASK_FIELDS, Task, task_factory
+
+USER_DB = os.path.expanduser("~/.local/share/decidrx/decidrx.db")
+DEFAULT_DB = os.environ.get("DECIDRX_DB") or USER_DB
+
+_shared: Optional["Database"] = None
+
+# column sets for the `columns=` argument of the task queries (default: every column);
+# missing columns read as None on the returned records
+SCORE_COLUMNS = ("id", "title", "deadline", "duration", "reward", "penalty", "type", "created_at", "parent_id")
+DEADLINE_COLUMNS = ("id", "title", "deadline")
+# listing views show at most this many characters of a description
+DESCRIPTION_PREVIEW = 64
+LIST_COLUMNS = tuple(c for c in TASK_FIELDS if c != "description") + ("description_preview",)
+# tables whose writes are logged to `changes`, with the column recorded as `row_id`
+CHANGE_FEED = {"tasks": "id", "completions": "task_id", "blocked_days": "id", "blocked_rules": "id",
+               "task_tags": "task_id", "task_deps": "task_id"}
+# task columns merged field by field by `decidrx sync`; each edit stamps the field in `sync_stamps`
+SYNC_FIELDS = ("title", "deadline", "description", "duration", "reward", "penalty", "effort", "type",
+               "completed", "completed_at", "parent_id", "recur", "series_id")
+# link tables synced as one set-valued field per task: the tags and the prerequisites
+SYNC_SETS = {"task_tags": "tags", "task_deps": "deps"}
+# stored in PRAGMA user_version; bump it whenever a trigger body changes so that
+# existing databases drop and recreate their triggers on the next open
+SCHEMA_VERSION = 3
+# "<UTC time> <site>": later edits sort higher, the site id breaks ties between databases
+STAMP_SQL = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now') || ' ' || (SELECT value FROM sync_meta WHERE key = 'site')"
+
+
+# the UTC day and hour of a task's deadline: the key of `deadline_day_counts`
+_SLOT = "date({0}.deadline), CAST(strftime('%H', {0}.deadline) AS INTEGER)"
+
+
+def _count_sql(ref: str, sign: str) -> str:
+    """Trigger statements adding (`+`) or removing (`-`) row `ref` (NEW/OLD) from `deadline_day_counts`."""
+    if sign == "+":
+        return (
+            f"INSERT INTO deadline_day_counts SELECT {_SLOT.format(ref)}, {ref}.completed, 1, COALESCE({ref}.duration, 0)"
+            f" WHERE date({ref}.deadline) IS NOT NULL"
+            " ON CONFLICT DO UPDATE SET n = n + 1, minutes = minutes + excluded.minutes;"
+        )
+    key = f"(day, hour, completed) = ({_SLOT.format(ref)}, {ref}.completed)"
+    return (
+        f"UPDATE deadline_day_counts SET n = n - 1, minutes = minutes - COALESCE({ref}.duration, 0) WHERE {key};"
+        f" DELETE FROM deadline_day_counts WHERE {key} AND n <= 0;"
+    )
+
+
+def _offset_segments(start: datetime, end: datetime, tz=None) -> List[Tuple[datetime, str]]:
+    """(from, SQLite offset modifier) pairs covering [start, end) in `tz` (None: local time)."""
+    def offset(t: datetime) -> str:
+        return f"{int(t.astimezone(tz).utcoffset().total_seconds() // 60):+d} minutes"
+
+    segments = [(start, offset(start))]
+    t = start
+    while t < end:
+        # a day at a time: offsets change at most twice a year
+        last = min(t + timedelta(days=1), end) - timedelta(microseconds=1)
+        if offset(last) != segments[-1][1]:
+            # find the second the new offset took effect
+            lo, hi = 0, int((last - t).total_seconds()) + 1
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                lo, hi = (mid, hi) if offset(t + timedelta(seconds=mid)) == segments[-1][1] else (lo, mid)
+            segments.append((t + timedelta(seconds=hi), offset(last)))
+        t = last + timedelta(microseconds=1)
+    return segments
 
-DEFAULT_DB = os.environ.get("DECIDRX_DB") or os.path.expanduser("~/.local/share/decidrx/decidrx.db")
 
 class Database:
     def __init__(self, path: Optional[str] = None):
         self.path = path or DEFAULT_DB
+        # >0 inside `transaction()`: method-level commits are deferred to the outermost block
+        self._txn_depth = 0
+        # see `cached`; off unless `enable_read_cache()` is called
+        self._read_cache: Optional[dict] = None
+        self._cache_version = None
         self._ensure_dir()
-        self.conn = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES)
+        with phase("db.open"):
+            self._connect()
+        with phase("db.init"):
+            self.init_db()
+
+    def _connect(self):
+        self.conn = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, factory=tracing.connection_factory())
         self.conn.row_factory = sqlite3.Row
-        self.init_db()
+        tracer = tracing.active()
+        if tracer is not None:
+            tracer.attach(self.conn)
+
+    def _task_cursor(self) -> sqlite3.Cursor:
+        """Cursor whose rows are `records.Task` objects."""
+        cur = self.conn.cursor()
+        cur.row_factory = task_factory
+        return cur
+
+    def commit(self):
+        """Commit, unless inside `transaction()`, whose outermost block commits instead."""
+        if not self._txn_depth:
+            self.conn.commit()
+
+    @contextmanager
+    def transaction(self):
+        """Group several method calls into one transaction; rolled back if the block raises."""
+        if not self._txn_depth and not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        self._txn_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._txn_depth -= 1
+            if not self._txn_depth:
+                self.conn.rollback()
+            raise
+        self._txn_depth -= 1
+        if not self._txn_depth:
+            self.conn.commit()
+
+    @contextmanager
+    def savepoint(self, name: str = "sp"):
+        """Nested unit inside a transaction: undone on its own if the block raises."""
+        self.conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute(f"ROLLBACK TO {name}")
+            self.conn.execute(f"RELEASE {name}")
+            raise
+        self.conn.execute(f"RELEASE {name}")
+
+    def last_change(self) -> int:
+        """Sequence number of the newest `changes` row (0 for none)."""
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def changes_since(self, seq: int) -> List[sqlite3.Row]:
+        """`changes` rows newer than `seq`, oldest first."""
+        return self.conn.execute("SELECT * FROM changes WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+
+    def changes_horizon(self) -> int:
+        """The newest seq `compact_changes` removed (0 if none): readers behind it must reload in full."""
+        return self.conn.execute("SELECT COALESCE(MIN(seq), 1) - 1 FROM changes").fetchone()[0]
+
+    @timed("db.write")
+    def compact_changes(self) -> int:
+        """Delete the `changes` rows every sync peer already has; returns the number removed.
+
+        The cut is the lowest `sent` watermark in `sync_peers` (everything but the newest
+        row when there are no peers; it is always kept so `last_change` never goes back).
+        A peer or a `LiveRanking` left behind the cut is not missing anything: a sync from
+        before the horizon sends every task, and the ranking reloads. Deletion tombstones
+        are kept (see `prune_tombstones`).
+        """
+        with self.transaction():
+            cut = self.last_change() - 1
+            peers = self.conn.execute("SELECT MIN(sent) FROM sync_peers WHERE sent > 0").fetchone()[0]
+            if peers is not None:
+                cut = min(cut, peers)
+            return self.conn.execute("DELETE FROM changes WHERE seq <= ?", (cut,)).rowcount
+
+    @timed("db.write")
+    def prune_tombstones(self, days: int) -> int:
+        """Forget deletions older than `days` days that every known sync peer was sent; returns the number removed.
+
+        A tombstone is what stops another copy from bringing a deleted task back, and a
+        copy of the file that never synced is not a known peer, so they are only pruned
+        on request. The newest pruned deletion time is kept in `sync_meta`: a full batch
+        (see `sync.apply_changes`) does not create tasks unknown here whose last edit is
+        older than that, since they may be among the deletions forgotten.
+        """
+        if days < 0:
+            raise ValueError("days must be >= 0")
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+        with self.transaction():
+            peers = self.conn.execute("SELECT MIN(sent) FROM sync_peers WHERE sent > 0").fetchone()[0]
+            if peers is None:
+                return 0
+            where = "seq <= ? AND COALESCE(deleted_at, '') < ?"
+            newest = self.conn.execute(f"SELECT MAX(COALESCE(deleted_at, '')) FROM sync_tombstones WHERE {where}",
+                                       (peers, cutoff)).fetchone()[0]
+            if newest is None:
+                return 0
+            self.conn.execute(
+                "INSERT INTO sync_meta VALUES ('pruned_deletions', ?) ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                (newest,),
+            )
+            return self.conn.execute(f"DELETE FROM sync_tombstones WHERE {where}", (peers, cutoff)).rowcount
+
+    def write_version(self) -> tuple:
+        """A value that changes whenever the database is written, by this connection or any other."""
+        # data_version moves on commits from other connections, total_changes on our own writes
+        return self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes
+
+    def enable_read_cache(self):
+        """Let `cached` keep query results between calls (used by the long-lived `decidrx serve`)."""
+        if self._read_cache is None:
+            self._read_cache = {}
+
+    def cached(self, key, load):
+        """Return `load()`, reusing the result stored under `key` until the next write when the read cache is on.
+
+        Callers must treat the result as read-only: it is shared with later calls.
+        """
+        if self._read_cache is None:
+            return load()
+        version = self.write_version()
+        if version != self._cache_version:
+            self._read_cache.clear()
+            self._cache_version = version
+        if key not in self._read_cache:
+            self._read_cache[key] = load()
+        return self._read_cache[key]
 
     def _ensure_dir(self):
         d = os.path.dirname(self.path)
@@ -42,15 +249,31 @@ class Database:
         cols = [r[1] for r in cur.fetchall()]
         if "description" not in cols:
             cur.execute("ALTER TABLE tasks ADD COLUMN description TEXT")
-            self.conn.commit()
+            self.commit()
         if "completed_at" not in cols:
             cur.execute("ALTER TABLE tasks ADD COLUMN completed_at TEXT")
-            self.conn.commit()
+            self.commit()
         if "parent_id" not in cols:
             cur.execute("ALTER TABLE tasks ADD COLUMN parent_id INTEGER")
-            self.conn.commit()
+            self.commit()
+        # recurring tasks: `recur` holds the rule, `series_id` the id of the first occurrence
+        if "recur" not in cols:
+            cur.execute("ALTER TABLE tasks ADD COLUMN recur TEXT")
+            self.commit()
+        if "series_id" not in cols:
+            cur.execute("ALTER TABLE tasks ADD COLUMN series_id INTEGER")
+            self.commit()
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_series ON tasks(series_id) WHERE series_id IS NOT NULL")
         # create an index on parent_id for faster child lookups
         cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_parent_id ON tasks(parent_id)")
+        # range scans by deadline (calendar, agenda) read in order instead of sorting the range
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks(deadline) WHERE deadline IS NOT NULL")
+        # pending recurring series (calendar, agenda, forecast): a handful of rows, found without a table scan
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_pending_recur ON tasks(deadline) WHERE recur IS NOT NULL AND completed = 0")
+        # quick-win lookups: partial index over pending tasks only, so `completed = 0` alone
+        # never looks selective to the planner and id-driven filters (tags, subtrees) win
+        cur.execute("DROP INDEX IF EXISTS idx_tasks_completed_duration")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_pending_duration ON tasks(duration) WHERE completed = 0")
         cur.execute("""
         CREATE TABLE IF NOT EXISTS completions (
             task_id INTEGER,
@@ -67,12 +290,183 @@ class Database:
         )
         """)
         cur.execute("CREATE INDEX IF NOT EXISTS idx_blocked_days_date ON blocked_days(date)")
-        self.conn.commit()
+        # blocked_rules: repeating blocked days and date ranges, expanded per query window (see blocked.py)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS blocked_rules (
+            id INTEGER PRIMARY KEY,
+            rule TEXT NOT NULL,
+            start TEXT NOT NULL,
+            until TEXT,
+            reason TEXT,
+            created_at TEXT NOT NULL
+        )
+        """)
+        # tags: many-to-many via task_tags; (tag_id, task_id) serves tag filters, (task_id, tag_id) per-task lookups
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+        """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS task_tags (
+            tag_id INTEGER NOT NULL,
+            task_id INTEGER NOT NULL,
+            PRIMARY KEY (tag_id, task_id)
+        ) WITHOUT ROWID
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_task_tags_task ON task_tags(task_id, tag_id)")
+        # dependencies: task_id cannot start until depends_on is done; kept acyclic by add_dependency
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS task_deps (
+            task_id INTEGER NOT NULL,
+            depends_on INTEGER NOT NULL,
+            PRIMARY KEY (task_id, depends_on)
+        ) WITHOUT ROWID
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_task_deps_depends_on ON task_deps(depends_on, task_id)")
+        # change feed: one row per written row, appended by triggers and pruned by
+        # `compact_changes`; AUTOINCREMENT keeps `seq` increasing after old rows are gone.
+        # `origin` names the database a `decidrx sync` copied the change from (NULL for local edits).
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tbl TEXT NOT NULL,
+            row_id INTEGER,
+            op TEXT NOT NULL,
+            changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            origin TEXT
+        )
+        """)
+        if "origin" not in [r[1] for r in cur.execute("PRAGMA table_info(changes)").fetchall()]:
+            cur.execute("ALTER TABLE changes ADD COLUMN origin TEXT")
+        self._init_sync(cur)
+        if "deleted_at" not in [r[1] for r in cur.execute("PRAGMA table_info(sync_tombstones)").fetchall()]:
+            cur.execute("ALTER TABLE sync_tombstones ADD COLUMN deleted_at TEXT")
+        self._init_day_counts(cur)
+        if cur.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._upgrade_triggers(cur)
+        self.commit()
 
-    def add_task(self, title: str, deadline: Optional[datetime], description: Optional[str] = None, duration: int = 0, reward: int = 0, penalty: int = 0, effort: int = 0, type: str = "shallow", parent_id: Optional[int] = None) -> int:
-        """Create a task. Optional `parent_id` links this task as a subtask of an existing task."""
+    def _upgrade_triggers(self, cur):
+        """Drop every trigger and create the current ones, then record SCHEMA_VERSION.
+
+        `CREATE TRIGGER IF NOT EXISTS` would keep an old body forever, so triggers are
+        versioned instead; on an up-to-date database this costs one PRAGMA per open.
+        """
+        began = not self.conn.in_transaction
+        if began:
+            # another process may be upgrading the same file
+            cur.execute("BEGIN IMMEDIATE")
+        try:
+            if cur.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                for (name,) in cur.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+                    cur.execute(f"DROP TRIGGER {name}")
+                self._create_triggers(cur)
+                cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except BaseException:
+            if began:
+                self.conn.rollback()
+            raise
+        if began:
+            self.conn.commit()
+
+    def _create_triggers(self, cur):
+        cur.execute(f"CREATE TRIGGER trg_tasks_insert_counts AFTER INSERT ON tasks BEGIN {_count_sql('NEW', '+')} END")
+        cur.execute(f"CREATE TRIGGER trg_tasks_delete_counts AFTER DELETE ON tasks BEGIN {_count_sql('OLD', '-')} END")
+        cur.execute(
+            "CREATE TRIGGER trg_tasks_update_counts AFTER UPDATE OF deadline, completed, duration ON tasks"
+            " WHEN OLD.deadline IS NOT NEW.deadline OR OLD.completed IS NOT NEW.completed OR OLD.duration IS NOT NEW.duration"
+            f" BEGIN {_count_sql('OLD', '-')} {_count_sql('NEW', '+')} END"
+        )
+        for table, key in CHANGE_FEED.items():
+            for op, ref in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+                body = f"INSERT INTO changes (tbl, row_id, op) VALUES ('{table}', {ref}.{key}, '{op}');"
+                if table == "tasks" and op == "insert":
+                    body += " INSERT OR IGNORE INTO sync_ids (task_id, uid) VALUES (NEW.id, lower(hex(randomblob(16))));"
+                elif table == "tasks" and op == "delete":
+                    # keyed by the feed row just written, so `decidrx sync` can send the deletion
+                    body += (
+                        " INSERT INTO sync_tombstones (seq, uid, deleted_at)"
+                        " SELECT last_insert_rowid(), uid, strftime('%Y-%m-%dT%H:%M:%fZ', 'now') FROM sync_ids WHERE task_id = OLD.id;"
+                        " DELETE FROM sync_ids WHERE task_id = OLD.id; DELETE FROM sync_stamps WHERE task_id = OLD.id;"
+                    )
+                cur.execute(f"CREATE TRIGGER trg_{table}_{op} AFTER {op.upper()} ON {table} BEGIN {body} END")
+        # one trigger per field: an UPDATE only fires those of the columns it sets, and only
+        # the fields whose value changed write a stamp
+        for f in SYNC_FIELDS:
+            cur.execute(
+                f"CREATE TRIGGER trg_tasks_stamp_{f} AFTER UPDATE OF {f} ON tasks WHEN OLD.{f} IS NOT NEW.{f} BEGIN"
+                f" INSERT OR REPLACE INTO sync_stamps VALUES (NEW.id, '{f}', {STAMP_SQL}); END"
+            )
+        for table, field in SYNC_SETS.items():
+            for op, ref in (("insert", "NEW"), ("delete", "OLD")):
+                cur.execute(
+                    f"CREATE TRIGGER trg_{table}_{op}_stamp AFTER {op.upper()} ON {table} BEGIN"
+                    f" INSERT OR REPLACE INTO sync_stamps SELECT {ref}.task_id, '{field}', {STAMP_SQL}"
+                    f" WHERE EXISTS (SELECT 1 FROM tasks WHERE id = {ref}.task_id); END"
+                )
+
+    def _init_day_counts(self, cur):
+        """Pending and completed deadlines per UTC hour, kept current by triggers for the calendar views."""
+        fresh = not cur.execute("PRAGMA table_info(deadline_day_counts)").fetchall()
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS deadline_day_counts (
+            day TEXT NOT NULL,
+            hour INTEGER NOT NULL,
+            completed INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            minutes INTEGER NOT NULL,
+            PRIMARY KEY (day, hour, completed)
+        ) WITHOUT ROWID
+        """)
+        # its triggers are created with the others, in `_create_triggers`
+        if fresh:
+            # a database from before the summary table: count what is already there
+            self._fill_day_counts(cur)
+
+    def _init_sync(self, cur):
+        """Create the tables behind `decidrx sync` (see `decidrx.sync`) once per database."""
+        if cur.execute("PRAGMA table_info(sync_ids)").fetchall():
+            return
+        # `site` identifies this database in stamps and change origins; `path` tells a copy of
+        # the file apart from the original (see `sync.claim_site`)
+        cur.execute("CREATE TABLE IF NOT EXISTS sync_meta (key TEXT PRIMARY KEY, value TEXT)")
+        cur.execute("INSERT OR IGNORE INTO sync_meta VALUES ('site', lower(hex(randomblob(8))))")
+        cur.execute("INSERT OR IGNORE INTO sync_meta VALUES ('path', ?)", (os.path.abspath(self.path),))
+        # when each field of a task was last edited; a field without a row is unchanged since creation
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS sync_stamps (
+            task_id INTEGER NOT NULL,
+            field TEXT NOT NULL,
+            stamp TEXT NOT NULL,
+            PRIMARY KEY (task_id, field)
+        ) WITHOUT ROWID
+        """)
+        cur.execute("CREATE TABLE IF NOT EXISTS sync_tombstones (seq INTEGER PRIMARY KEY, uid TEXT NOT NULL, deleted_at TEXT)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_sync_tombstones_uid ON sync_tombstones(uid)")
+        # per peer: `sent` is our last change seq it has, `received` the last batch we applied from it
+        cur.execute("CREATE TABLE IF NOT EXISTS sync_peers (peer TEXT PRIMARY KEY, sent INTEGER NOT NULL DEFAULT 0,"
+                    " received INTEGER NOT NULL DEFAULT 0)")
+        # global task ids: the same task has the same uid in every synced copy. Tasks from before
+        # sync existed derive theirs from the row, so copies of one file agree. They are not logged
+        # in `changes`: a first sync with a peer sends every task anyway (see `sync.export_changes`).
+        cur.execute("CREATE TABLE sync_ids (task_id INTEGER PRIMARY KEY, uid TEXT NOT NULL UNIQUE)")
+        cur.execute("INSERT INTO sync_ids SELECT id, 'legacy-' || id || '-' || COALESCE(created_at, '') FROM tasks")
+
+    @timed("db.write")
+    def add_task(self, title: str, deadline: Optional[datetime], description: Optional[str] = None, duration: int = 0, reward: int = 0, penalty: int = 0, effort: int = 0, type: str = "shallow", parent_id: Optional[int] = None, recur: Optional[str] = None) -> int:
+        """Create a task. Optional `parent_id` links this task as a subtask of an existing task.
+
+        With a `recur` rule (see `decidrx.recurrence`) the task becomes the template of a
+        series; only its next occurrence is created, when this one is marked done.
+        """
         created_at = datetime.now(timezone.utc).isoformat()
         deadline_s = deadline.isoformat() if deadline else None
+        if recur is not None:
+            if deadline is None:
+                raise ValueError("A recurring task needs a deadline")
+            recur = str(parse_rule(recur))
         cur = self.conn.cursor()
         # validate parent exists if provided
         if parent_id is not None:
@@ -80,12 +474,16 @@ class Database:
             if cur.fetchone() is None:
                 raise ValueError(f"parent_id {parent_id} does not exist")
         cur.execute(
-            "INSERT INTO tasks (title, deadline, description, duration, reward, penalty, effort, type, created_at, parent_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (title, deadline_s, description, duration, reward, penalty, effort, type, created_at, parent_id),
+            "INSERT INTO tasks (title, deadline, description, duration, reward, penalty, effort, type, created_at, parent_id, recur) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (title, deadline_s, description, duration, reward, penalty, effort, type, created_at, parent_id, recur),
         )
-        self.conn.commit()
-        return cur.lastrowid
+        task_id = cur.lastrowid
+        if recur is not None:
+            cur.execute("UPDATE tasks SET series_id = ? WHERE id = ?", (task_id, task_id))
+        self.commit()
+        return task_id
 
+    @timed("db.write")
     def update_task(self, task_id: int, **fields):
         """Update provided fields for a task. Accepts same keys as columns.
         If 'deadline' is a datetime it will be converted to ISO string; if None it will be cleared.
@@ -110,36 +508,177 @@ class Database:
         vals.append(task_id)
         sql = f"UPDATE tasks SET {', '.join(cols)} WHERE id = ?"
         cur.execute(sql, tuple(vals))
-        self.conn.commit()
+        self.commit()
         return cur.rowcount
 
-    def get_task(self, task_id: int) -> Optional[sqlite3.Row]:
-        cur = self.conn.cursor()
+    @timed("db.query")
+    def get_task(self, task_id: int) -> Optional[Task]:
+        cur = self._task_cursor()
         cur.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
         return cur.fetchone()
 
-    def get_pending_tasks(self) -> List[sqlite3.Row]:
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM tasks WHERE completed = 0")
+    @staticmethod
+    def _columns_sql(columns: Optional[Sequence[str]], alias: Optional[str] = None) -> str:
+        """Select list for a task query: `*`, or the given columns.
+
+        `description_preview` selects the first DESCRIPTION_PREVIEW characters of the
+        description (as `description`).
+        """
+        prefix = f"{alias}." if alias else ""
+        if columns is None:
+            return prefix + "*"
+        out = []
+        for c in columns:
+            if c == "description_preview":
+                out.append(f"substr({prefix}description, 1, {DESCRIPTION_PREVIEW}) AS description")
+            elif c in TASK_FIELDS:
+                out.append(prefix + c)
+            else:
+                raise ValueError(f"Unknown task column {c!r}")
+        return ", ".join(out)
+
+    @staticmethod
+    def _filter_sql(where, alias: Optional[str] = None):
+        """Render an optional `filters.Filter` as an ` AND (...)` suffix plus params."""
+        if where is None:
+            return "", []
+        clause, params = where.sql(alias)
+        return f" AND ({clause})", params
+
+    @timed("db.query")
+    def get_pending_tasks(self, where=None, columns: Optional[Sequence[str]] = None) -> List[Task]:
+        """Return pending tasks, optionally narrowed by a `filters.Filter`."""
+        extra, params = self._filter_sql(where)
+        cur = self._task_cursor()
+        cur.execute(f"SELECT {self._columns_sql(columns)} FROM tasks WHERE completed = 0" + extra, params)
+        return cur.fetchall()
+
+    @timed("db.query")
+    def find_tasks(self, where=None, include_completed: bool = False, order_by: str = "id",
+                   columns: Optional[Sequence[str]] = None) -> List[Task]:
+        """Return tasks matching an optional `filters.Filter`, pending only unless include_completed."""
+        extra, params = self._filter_sql(where)
+        sql = f"SELECT {self._columns_sql(columns)} FROM tasks WHERE " + ("1" if include_completed else "completed = 0") + extra
+        cur = self._task_cursor()
+        cur.execute(f"{sql} ORDER BY {order_by}", params)
+        return cur.fetchall()
+
+    @timed("db.query")
+    def get_quick_tasks(self, max_duration: Optional[int] = 20, leaves_only: bool = False, where=None,
+                        columns: Optional[Sequence[str]] = None) -> List[Task]:
+        """Return pending tasks with duration <= max_duration (NULL counts as 0), using the duration index.
+
+        `max_duration=None` drops the duration limit (e.g. every pending leaf for `schedule`).
+
+        With `leaves_only`, tasks that still have pending subtasks are skipped, since their
+        remaining work is larger than their own duration; their quick leaf subtasks are kept.
+        Each row carries a `parent_title` column (NULL for top-level tasks).
+        """
+        sql = (
+            f"SELECT {self._columns_sql(columns, 't')}, p.title AS parent_title FROM tasks t"
+            " LEFT JOIN tasks p ON p.id = t.parent_id"
+            " WHERE t.completed = 0"
+        )
+        params = []
+        if max_duration is not None:
+            sql += " AND (t.duration <= ? OR t.duration IS NULL)"
+            params.append(max_duration)
+        if leaves_only:
+            sql += " AND NOT EXISTS (SELECT 1 FROM tasks c WHERE c.parent_id = t.id AND c.completed = 0)"
+        extra, where_params = self._filter_sql(where, "t")
+        cur = self._task_cursor()
+        cur.execute(sql + extra, params + where_params)
         return cur.fetchall()
 
     # Date-range and blocked-days helpers
-    def get_tasks_between(self, start_dt: datetime, end_dt: datetime, include_completed: bool = False) -> List[sqlite3.Row]:
+    @timed("db.query")
+    def get_tasks_between(self, start_dt: datetime, end_dt: datetime, include_completed: bool = False,
+                          columns: Optional[Sequence[str]] = None) -> List[Task]:
         """Return tasks with a non-null deadline where deadline >= start_dt and deadline < end_dt.
         Expects start_dt and end_dt to be timezone-aware datetimes. Will compare ISO strings.
         By default this excludes completed tasks unless include_completed=True.
         """
-        cur = self.conn.cursor()
+        cur = self._task_cursor()
         start_s = start_dt.isoformat()
         end_s = end_dt.isoformat()
-        sql = "SELECT * FROM tasks WHERE deadline IS NOT NULL AND deadline >= ? AND deadline < ?"
+        sql = f"SELECT {self._columns_sql(columns)} FROM tasks WHERE deadline IS NOT NULL AND deadline >= ? AND deadline < ?"
         if not include_completed:
             sql += " AND completed = 0"
         sql += " ORDER BY deadline"
         cur.execute(sql, (start_s, end_s))
         return cur.fetchall()
 
-    def get_tasks_on(self, date_obj, tzinfo=None, include_completed: bool = False) -> List[sqlite3.Row]:
+    @timed("db.query")
+    def get_day_totals(self, start_dt: datetime, end_dt: datetime, tz=None,
+                       include_completed: bool = False) -> Dict["date", Tuple[int, int]]:
+        """Deadline count and summed duration (minutes) per local day, for deadlines in [start_dt, end_dt).
+
+        Days are bucketed in SQL with one GROUP BY: `date(deadline, '<offset> minutes')`,
+        with the offset picked by a CASE over the UTC offsets `tz` has in the range (None:
+        the system's local time, daylight-saving changes included). When the range and
+        every offset are whole hours, the hourly `deadline_day_counts` rows are summed
+        instead of reading `tasks` at all.
+        """
+        from datetime import date as _date
+        start_utc, end_utc = start_dt.astimezone(timezone.utc), end_dt.astimezone(timezone.utc)
+        segments = _offset_segments(start_utc, end_utc, tz)
+        shift, params = "?", [segments[-1][1]]
+        if len(segments) > 1:
+            shift = "CASE " + "WHEN deadline < ? THEN ? " * (len(segments) - 1) + "ELSE ? END"
+            params = [v for (_, off), (until, _) in zip(segments, segments[1:]) for v in (until.isoformat(), off)] + params
+        hourly = all(t.minute == t.second == t.microsecond == 0 for t in [end_utc] + [t for t, _ in segments]) and all(
+            int(off.split()[0]) % 60 == 0 for _, off in segments)
+        if hourly:
+            # each summary row stands for its UTC hour, written the way deadlines are stored
+            source = ("(SELECT printf('%sT%02d:00:00+00:00', day, hour) AS deadline, completed, n, minutes"
+                      " FROM deadline_day_counts WHERE day >= ? AND day <= ?)")
+            params += [start_utc.date().isoformat(), end_utc.date().isoformat()]
+            sql = f"SELECT date(deadline, {shift}) AS local_day, SUM(n), SUM(minutes) FROM {source} WHERE deadline >= ? AND deadline < ?"
+        else:
+            sql = (f"SELECT date(deadline, {shift}) AS local_day, COUNT(*), COALESCE(SUM(duration), 0) FROM tasks"
+                   " WHERE deadline IS NOT NULL AND deadline >= ? AND deadline < ?")
+        if not include_completed:
+            sql += " AND completed = 0"
+        cur = self.conn.cursor()
+        cur.execute(sql + " GROUP BY local_day", params + [start_utc.isoformat(), end_utc.isoformat()])
+        return {_date.fromisoformat(day): (n, minutes) for day, n, minutes in cur.fetchall()}
+
+    @timed("db.query")
+    def get_due_before(self, end_dt: datetime) -> Tuple[int, int]:
+        """Count and summed duration (minutes) of pending deadlines before `end_dt`: the overdue backlog."""
+        row = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(duration), 0) FROM tasks WHERE deadline IS NOT NULL AND deadline < ? AND completed = 0",
+            (end_dt.astimezone(timezone.utc).isoformat(),),
+        ).fetchone()
+        return row[0], row[1]
+
+    @timed("db.write")
+    def rebuild_day_counts(self) -> int:
+        """Recompute `deadline_day_counts` from `tasks`; returns the number of summary rows."""
+        with self.transaction():
+            self._fill_day_counts(self.conn.cursor())
+        return self.conn.execute("SELECT COUNT(*) FROM deadline_day_counts").fetchone()[0]
+
+    def _fill_day_counts(self, cur):
+        cur.execute("DELETE FROM deadline_day_counts")
+        cur.execute(
+            f"INSERT INTO deadline_day_counts SELECT {_SLOT.format('tasks')}, completed, COUNT(*), COALESCE(SUM(duration), 0)"
+            " FROM tasks WHERE date(deadline) IS NOT NULL GROUP BY 1, 2, 3"
+        )
+
+    def iter_tasks_between(self, start_dt: datetime, end_dt: datetime, include_completed: bool = False, where=None,
+                           columns: Optional[Sequence[str]] = None) -> Iterator[Task]:
+        """`get_tasks_between` as a stream: rows come off the deadline index in order, one at a time,
+        so a range of any length never holds more than the row being read."""
+        extra, params = self._filter_sql(where)
+        sql = f"SELECT {self._columns_sql(columns)} FROM tasks WHERE deadline IS NOT NULL AND deadline >= ? AND deadline < ?"
+        if not include_completed:
+            sql += " AND completed = 0"
+        cur = self._task_cursor()
+        cur.execute(sql + extra + " ORDER BY deadline", [start_dt.isoformat(), end_dt.isoformat()] + params)
+        yield from cur
+
+    def get_tasks_on(self, date_obj, tzinfo=None, include_completed: bool = False) -> List[Task]:
         """Return tasks whose deadlines fall on the provided date (date or YYYY-MM-DD string).
         The date is interpreted in the provided tzinfo (defaults to UTC). Excludes completed tasks by default.
         """
@@ -153,7 +692,7 @@ class Database:
         end = (start + __import__('datetime').timedelta(days=1))
         return self.get_tasks_between(start, end, include_completed=include_completed)
 
-    def get_tasks_for_month(self, year: int, month: int, tzinfo=None, include_completed: bool = False) -> List[sqlite3.Row]:
+    def get_tasks_for_month(self, year: int, month: int, tzinfo=None, include_completed: bool = False) -> List[Task]:
         from datetime import datetime as _datetime, timezone
         tz = tzinfo or timezone.utc
         start_local = _datetime(year, month, 1, 0, 0, 0, tzinfo=tz)
@@ -166,6 +705,7 @@ class Database:
         end_utc = next_local.astimezone(timezone.utc)
         return self.get_tasks_between(start_utc, end_utc, include_completed=include_completed)
 
+    @timed("db.write")
     def add_blocked_day(self, date_obj, reason: Optional[str] = None) -> int:
         """Add a blocked day. `date_obj` may be a date or a YYYY-MM-DD string. Returns inserted row id."""
         from datetime import datetime as _datetime
@@ -178,9 +718,10 @@ class Database:
         created_at = _datetime.now(timezone.utc).isoformat()
         cur = self.conn.cursor()
         cur.execute("INSERT INTO blocked_days (date, reason, created_at) VALUES (?, ?, ?)", (date_s, reason, created_at))
-        self.conn.commit()
+        self.commit()
         return cur.lastrowid
 
+    @timed("db.write")
     def remove_blocked_day(self, date_obj) -> int:
         """Remove blocked day(s) matching the date. Returns number of rows deleted."""
         if isinstance(date_obj, str):
@@ -189,9 +730,192 @@ class Database:
             date_s = date_obj.isoformat()
         cur = self.conn.cursor()
         cur.execute("DELETE FROM blocked_days WHERE date = ?", (date_s,))
-        self.conn.commit()
+        self.commit()
+        return cur.rowcount
+
+    @timed("db.write")
+    def add_blocked_rule(self, rule: str, start, until=None, reason: Optional[str] = None) -> int:
+        """Add a repeating blocked-day rule (see blocked.py) from `start` through `until` (dates
+        or YYYY-MM-DD strings; no `until` repeats forever). Returns the rule id."""
+        from datetime import date as _date
+        start = start if isinstance(start, _date) else _date.fromisoformat(start)
+        if until is not None and not isinstance(until, _date):
+            until = _date.fromisoformat(until)
+        parsed = parse_block_rule(rule, start, until)
+        cur = self.conn.cursor()
+        cur.execute(
+            "INSERT INTO blocked_rules (rule, start, until, reason, created_at) VALUES (?, ?, ?, ?, ?)",
+            (str(parsed), start.isoformat(), until.isoformat() if until else None, reason, datetime.now(timezone.utc).isoformat()),
+        )
+        self.commit()
+        return cur.lastrowid
+
+    @timed("db.write")
+    def remove_blocked_rule(self, rule_id: int) -> int:
+        cur = self.conn.cursor()
+        cur.execute("DELETE FROM blocked_rules WHERE id = ?", (rule_id,))
+        self.commit()
+        return cur.rowcount
+
+    @timed("db.query")
+    def get_blocked_rules(self, start_date=None, end_date=None) -> List[BlockRule]:
+        """Blocked-day rules, optionally only those active somewhere in [start_date, end_date)."""
+        from datetime import date as _date
+        sql, params = "SELECT * FROM blocked_rules", []
+        if start_date is not None and end_date is not None:
+            sql += " WHERE start < ? AND (until IS NULL OR until >= ?)"
+            params = [str(end_date), str(start_date)]
+        cur = self.conn.cursor()
+        cur.execute(sql + " ORDER BY id", params)
+        return [
+            parse_block_rule(r["rule"], _date.fromisoformat(r["start"]), _date.fromisoformat(r["until"]) if r["until"] else None,
+                             r["reason"], r["id"])
+            for r in cur.fetchall()
+        ]
+
+    def blocked_index(self, start_date, end_date) -> BlockedIndex:
+        """One-off blocked days and rule occurrences in [start_date, end_date) (dates), as a `BlockedIndex`."""
+        from datetime import date as _date, timedelta as _timedelta
+        days = (
+            (d, d + _timedelta(days=1), r["reason"], str(r["id"]))
+            for d, r in ((_date.fromisoformat(r["date"]), r) for r in self.get_blocked_days_between(start_date, end_date))
+        )
+        rules = [rule.intervals(start_date, end_date) for rule in self.get_blocked_rules(start_date, end_date)]
+        return BlockedIndex.merge(days, *rules)
+
+    # Tags
+    @staticmethod
+    def normalize_tag(name: str) -> str:
+        tag = (name or "").strip().lower()
+        if not tag or any(ch.isspace() or ch == "," for ch in tag):
+            raise ValueError(f"Invalid tag {name!r}: tags are single words without commas")
+        return tag
+
+    @timed("db.write")
+    def add_tags(self, task_id: int, names: List[str]) -> int:
+        """Attach tags to a task, creating unknown tags. Returns number of new links."""
+        tags = sorted({self.normalize_tag(n) for n in names})
+        cur = self.conn.cursor()
+        if cur.execute("SELECT id FROM tasks WHERE id = ?", (task_id,)).fetchone() is None:
+            raise ValueError(f"Task {task_id} does not exist")
+        cur.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(t,) for t in tags])
+        cur.executemany(
+            "INSERT OR IGNORE INTO task_tags (tag_id, task_id) SELECT id, ? FROM tags WHERE name = ?",
+            [(task_id, t) for t in tags],
+        )
+        # rowcount, unlike total_changes, leaves out the `changes` rows written by triggers
+        added = cur.rowcount
+        self.commit()
+        return added
+
+    @timed("db.write")
+    def remove_tags(self, task_id: int, names: List[str]) -> int:
+        """Detach tags from a task. Returns number of links removed."""
+        tags = sorted({self.normalize_tag(n) for n in names})
+        cur = self.conn.cursor()
+        cur.execute(
+            f"DELETE FROM task_tags WHERE task_id = ? AND tag_id IN (SELECT id FROM tags WHERE name IN ({','.join(['?'] * len(tags))}))",
+            [task_id] + tags,
+        )
+        self.commit()
         return cur.rowcount
 
+    @timed("db.query")
+    def get_tags(self, task_id: int) -> List[str]:
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT g.name FROM task_tags tt JOIN tags g ON g.id = tt.tag_id WHERE tt.task_id = ? ORDER BY g.name",
+            (task_id,),
+        )
+        return [r[0] for r in cur.fetchall()]
+
+    @timed("db.query")
+    def get_tags_map(self) -> Dict[int, List[str]]:
+        """Return {task_id: [tag names]} for every tagged task, in one query."""
+        cur = self.conn.cursor()
+        cur.execute("SELECT tt.task_id, g.name FROM task_tags tt JOIN tags g ON g.id = tt.tag_id ORDER BY tt.task_id, g.name")
+        tags: Dict[int, List[str]] = {}
+        for task_id, name in cur.fetchall():
+            tags.setdefault(task_id, []).append(name)
+        return tags
+
+    @timed("db.query")
+    def tag_counts(self) -> List[sqlite3.Row]:
+        """Return rows of (name, pending, total) for every tag."""
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT g.name, SUM(t.completed = 0) AS pending, COUNT(t.id) AS total FROM tags g"
+            " LEFT JOIN task_tags tt ON tt.tag_id = g.id LEFT JOIN tasks t ON t.id = tt.task_id"
+            " GROUP BY g.id ORDER BY g.name"
+        )
+        return cur.fetchall()
+
+    # Dependencies
+    @timed("db.write")
+    def add_dependency(self, task_id: int, depends_on: int) -> bool:
+        """Record that `task_id` cannot start until `depends_on` is done.
+
+        Raises ValueError for unknown tasks, self-dependencies, or edges that would close a
+        cycle. The cycle check only walks the prerequisites reachable from `depends_on`.
+        Returns False if the edge already existed.
+        """
+        if task_id == depends_on:
+            raise ValueError("A task cannot depend on itself")
+        cur = self.conn.cursor()
+        found = {r[0] for r in cur.execute("SELECT id FROM tasks WHERE id IN (?, ?)", (task_id, depends_on)).fetchall()}
+        for tid in (task_id, depends_on):
+            if tid not in found:
+                raise ValueError(f"Task {tid} does not exist")
+        cycle = cur.execute(
+            """
+            WITH RECURSIVE reach(id) AS (
+                SELECT ?
+                UNION
+                SELECT d.depends_on FROM task_deps d JOIN reach ON d.task_id = reach.id
+            )
+            SELECT 1 FROM reach WHERE id = ? LIMIT 1
+            """,
+            (depends_on, task_id),
+        ).fetchone()
+        if cycle:
+            raise ValueError(f"Task {depends_on} already depends (transitively) on {task_id}; this would create a cycle")
+        cur.execute("INSERT OR IGNORE INTO task_deps (task_id, depends_on) VALUES (?, ?)", (task_id, depends_on))
+        self.commit()
+        return cur.rowcount > 0
+
+    @timed("db.write")
+    def remove_dependency(self, task_id: int, depends_on: int) -> int:
+        cur = self.conn.cursor()
+        cur.execute("DELETE FROM task_deps WHERE task_id = ? AND depends_on = ?", (task_id, depends_on))
+        self.commit()
+        return cur.rowcount
+
+    @timed("db.query")
+    def get_dependencies(self, task_id: int) -> List[Task]:
+        """Return the direct prerequisites of a task."""
+        cur = self._task_cursor()
+        cur.execute("SELECT t.* FROM task_deps d JOIN tasks t ON t.id = d.depends_on WHERE d.task_id = ? ORDER BY t.id", (task_id,))
+        return cur.fetchall()
+
+    @timed("db.query")
+    def get_dependents(self, task_id: int) -> List[Task]:
+        """Return the tasks that directly depend on a task."""
+        cur = self._task_cursor()
+        cur.execute("SELECT t.* FROM task_deps d JOIN tasks t ON t.id = d.task_id WHERE d.depends_on = ? ORDER BY t.id", (task_id,))
+        return cur.fetchall()
+
+    @timed("db.query")
+    def get_pending_dependency_edges(self) -> List[tuple]:
+        """Return (task_id, depends_on, task_deadline, depends_on_deadline) for edges between pending tasks."""
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT d.task_id, d.depends_on, a.deadline, b.deadline FROM task_deps d"
+            " JOIN tasks a ON a.id = d.task_id JOIN tasks b ON b.id = d.depends_on"
+            " WHERE a.completed = 0 AND b.completed = 0"
+        )
+        return [tuple(r) for r in cur.fetchall()]
+
+    @timed("db.query")
     def get_blocked_days_in_month(self, year: int, month: int) -> List[sqlite3.Row]:
         from datetime import date as _date
         start = _date(year, month, 1).isoformat()
@@ -203,24 +927,79 @@ class Database:
         cur.execute("SELECT * FROM blocked_days WHERE date >= ? AND date < ? ORDER BY date", (start, end))
         return cur.fetchall()
 
-    def mark_done(self, task_id: int):
+    @timed("db.query")
+    def get_blocked_days_between(self, start_date, end_date) -> List[sqlite3.Row]:
+        """Return blocked days with start_date <= date < end_date (dates or YYYY-MM-DD strings)."""
+        start = start_date if isinstance(start_date, str) else start_date.isoformat()
+        end = end_date if isinstance(end_date, str) else end_date.isoformat()
         cur = self.conn.cursor()
-        completed_at = datetime.now(timezone.utc).isoformat()
+        cur.execute("SELECT * FROM blocked_days WHERE date >= ? AND date < ? ORDER BY date", (start, end))
+        return cur.fetchall()
+
+    @timed("db.write")
+    def mark_done(self, task_id: int) -> Optional[int]:
+        """Mark a task done, propagating to parents.
+
+        For a recurring task the next occurrence is created in the same transaction;
+        its id is returned (None otherwise).
+        """
+        cur = self.conn.cursor()
+        now = datetime.now(timezone.utc)
+        completed_at = now.isoformat()
         cur.execute("UPDATE tasks SET completed = 1, completed_at = ? WHERE id = ?", (completed_at, task_id))
         cur.execute("INSERT INTO completions (task_id, completed_at) VALUES (?, ?)", (task_id, completed_at))
-        self.conn.commit()
+        next_id = self._materialize_next(task_id, now)
+        self.commit()
         # propagate up to parents: if all siblings are completed, mark parent done
         parent = cur.execute("SELECT parent_id FROM tasks WHERE id = ?", (task_id,)).fetchone()
         if parent:
             parent_id = parent[0]
             if parent_id is not None:
                 self._propagate_done_up(parent_id)
+        return next_id
 
+    def _materialize_next(self, task_id: int, now: datetime) -> Optional[int]:
+        """Insert the occurrence following `task_id` if it recurs (no commit)."""
+        cur = self.conn.cursor()
+        row = cur.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None or not row["recur"] or not row["deadline"]:
+            return None
+        series_id = row["series_id"] or task_id
+        # done -> undone -> done must not create a second successor
+        if cur.execute("SELECT 1 FROM tasks WHERE series_id = ? AND id > ? LIMIT 1", (series_id, task_id)).fetchone():
+            return None
+        anchor = cur.execute("SELECT deadline FROM tasks WHERE id = ?", (series_id,)).fetchone()
+        deadline = parse_timestamp(row["deadline"])
+        # completing late skips the occurrences that were missed meanwhile
+        nxt = parse_rule(row["recur"]).next_after(parse_timestamp(anchor[0]) if anchor and anchor[0] else deadline, max(deadline, now))
+        cur.execute(
+            "INSERT INTO tasks (title, deadline, description, duration, reward, penalty, effort, type, created_at, parent_id, recur, series_id)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (row["title"], nxt.isoformat(), row["description"], row["duration"], row["reward"], row["penalty"],
+             row["effort"], row["type"], now.isoformat(), row["parent_id"], row["recur"], series_id),
+        )
+        next_id = cur.lastrowid
+        cur.execute("INSERT INTO task_tags (tag_id, task_id) SELECT tag_id, ? FROM task_tags WHERE task_id = ?", (next_id, task_id))
+        return next_id
+
+    @timed("db.query")
+    def get_recurring_series(self, columns: Optional[Sequence[str]] = None, where=None) -> List[Task]:
+        """Return the pending occurrence of every recurring series, with its series `anchor` deadline."""
+        extra, params = self._filter_sql(where, "t")
+        cur = self._task_cursor()
+        cur.execute(
+            f"SELECT {self._columns_sql(columns, 't')}, s.deadline AS anchor FROM tasks t LEFT JOIN tasks s ON s.id = t.series_id"
+            " WHERE t.completed = 0 AND t.recur IS NOT NULL AND t.deadline IS NOT NULL" + extra,
+            params,
+        )
+        return cur.fetchall()
+
+    @timed("db.write")
     def mark_undone(self, task_id: int):
         """Mark a task as not completed and clear completed_at. Unmarks parents if necessary."""
         cur = self.conn.cursor()
         cur.execute("UPDATE tasks SET completed = 0, completed_at = NULL WHERE id = ?", (task_id,))
-        self.conn.commit()
+        self.commit()
         # propagate up: if parent was marked completed, unmark it
         parent = cur.execute("SELECT parent_id FROM tasks WHERE id = ?", (task_id,)).fetchone()
         if parent:
@@ -230,11 +1009,79 @@ class Database:
         return True
 
     # Helper methods for parent/child traversal and propagation
-    def get_children(self, parent_id: int) -> List[sqlite3.Row]:
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM tasks WHERE parent_id = ? ORDER BY id", (parent_id,))
+    @timed("db.children")
+    def get_children(self, parent_id: int, columns: Optional[Sequence[str]] = None) -> List[Task]:
+        cur = self._task_cursor()
+        cur.execute(f"SELECT {self._columns_sql(columns)} FROM tasks WHERE parent_id = ? ORDER BY id", (parent_id,))
+        return cur.fetchall()
+
+    @timed("db.query")
+    def get_root_tasks(self, include_completed: bool = False, order_by: str = "completed, id",
+                       columns: Optional[Sequence[str]] = None) -> List[Task]:
+        """Top-level tasks (no parent); pending only unless include_completed."""
+        cur = self._task_cursor()
+        sql = f"SELECT {self._columns_sql(columns)} FROM tasks WHERE parent_id IS NULL" + ("" if include_completed else " AND completed = 0")
+        cur.execute(f"{sql} ORDER BY {order_by}")
         return cur.fetchall()
 
+    @timed("db.children")
+    def get_children_map(self, where=None, columns: Optional[Sequence[str]] = None) -> Dict[int, List[Task]]:
+        """Return {parent_id: [child rows ordered by id]} for every task that has children, in one query.
+
+        Use this instead of calling `get_children` per row when rendering or scoring many tasks.
+        With a `filters.Filter`, only children of pending tasks matching it are returned.
+        """
+        if columns is not None and "parent_id" not in columns:
+            columns = (*columns, "parent_id")
+        select = self._columns_sql(columns)
+        cur = self._task_cursor()
+        if where is None:
+            cur.execute(f"SELECT {select} FROM tasks WHERE parent_id IS NOT NULL ORDER BY id")
+        else:
+            extra, params = self._filter_sql(where)
+            cur.execute(
+                f"SELECT {select} FROM tasks WHERE parent_id IN (SELECT id FROM tasks WHERE completed = 0" + extra + ") ORDER BY id",
+                params,
+            )
+        children: Dict[int, List[Task]] = {}
+        for r in cur.fetchall():
+            children.setdefault(r["parent_id"], []).append(r)
+        return children
+
+    @timed("db.children")
+    def get_subtree(self, task_id: int, columns: Optional[Sequence[str]] = None) -> List[Task]:
+        """The task and all of its descendants, ordered by id, in one recursive query."""
+        if columns is not None and "parent_id" not in columns:
+            columns = (*columns, "parent_id")
+        cur = self._task_cursor()
+        cur.execute(
+            # UNION (not UNION ALL) stops at ids already seen, so a parent cycle cannot loop
+            "WITH RECURSIVE sub(id) AS (SELECT ? UNION SELECT t.id FROM tasks t JOIN sub ON t.parent_id = sub.id)"
+            f" SELECT {self._columns_sql(columns, 't')} FROM tasks t JOIN sub ON t.id = sub.id ORDER BY t.id",
+            (task_id,),
+        )
+        return cur.fetchall()
+
+    def _lineage_ids(self, ids, seed: str, step: str) -> List[int]:
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        cur = self.conn.execute(
+            f"WITH RECURSIVE rel(id) AS ({seed.format(marks=marks)} UNION {step}) SELECT id FROM rel WHERE id IS NOT NULL",
+            tuple(ids),
+        )
+        return [r[0] for r in cur.fetchall()]
+
+    def get_ancestor_ids(self, ids) -> List[int]:
+        """Ids of every ancestor of the given tasks, in one recursive query."""
+        return self._lineage_ids(ids, "SELECT parent_id FROM tasks WHERE id IN ({marks})",
+                                 "SELECT t.parent_id FROM tasks t JOIN rel ON t.id = rel.id")
+
+    def get_descendant_ids(self, ids) -> List[int]:
+        """Ids of every descendant of the given tasks, in one recursive query."""
+        return self._lineage_ids(ids, "SELECT id FROM tasks WHERE parent_id IN ({marks})",
+                                 "SELECT t.id FROM tasks t JOIN rel ON t.parent_id = rel.id")
+
     def get_task_with_children(self, task_id: int) -> Dict:
         t = self.get_task(task_id)
         if t is None:
@@ -251,7 +1098,7 @@ class Database:
                 completed_at = datetime.now(timezone.utc).isoformat()
                 cur.execute("UPDATE tasks SET completed = 1, completed_at = ? WHERE id = ?", (completed_at, parent_id))
                 cur.execute("INSERT INTO completions (task_id, completed_at) VALUES (?, ?)", (parent_id, completed_at))
-                self.conn.commit()
+                self.commit()
                 # move to parent's parent
                 row = cur.execute("SELECT parent_id FROM tasks WHERE id = ?", (parent_id,)).fetchone()
                 parent_id = row[0] if row else None
@@ -269,11 +1116,12 @@ class Database:
             next_parent = row[1]
             if completed:
                 cur.execute("UPDATE tasks SET completed = 0, completed_at = NULL WHERE id = ?", (parent_id,))
-                self.conn.commit()
+                self.commit()
                 parent_id = next_parent
             else:
                 break
 
+    @timed("db.write")
     def delete_task(self, task_id: int, cascade: bool = False):
         """Delete a task. If cascade is True, delete all descendants as well.
 
@@ -304,11 +1152,15 @@ class Database:
         to_delete = [task_id] + descendants
         # delete completions entries
         cur.execute(f"DELETE FROM completions WHERE task_id IN ({','.join(['?']*len(to_delete))})", tuple(to_delete))
+        cur.execute(f"DELETE FROM task_tags WHERE task_id IN ({','.join(['?']*len(to_delete))})", tuple(to_delete))
+        marks = ','.join(['?'] * len(to_delete))
+        cur.execute(f"DELETE FROM task_deps WHERE task_id IN ({marks}) OR depends_on IN ({marks})", tuple(to_delete) * 2)
         # delete tasks
         cur.execute(f"DELETE FROM tasks WHERE id IN ({','.join(['?']*len(to_delete))})", tuple(to_delete))
-        self.conn.commit()
+        self.commit()
         return len(to_delete)
 
+    @timed("db.query")
     def stats(self) -> Dict[str, int]:
         cur = self.conn.cursor()
         cur.execute("SELECT COUNT(*) as total FROM tasks")
@@ -317,11 +1169,20 @@ class Database:
         done = cur.fetchone()[0]
         return {"total": total, "done": done}
 
-    def reset(self):
+    def reset(self, snapshot: bool = True) -> Optional[str]:
         """Reset the database by removing the file and creating a fresh DB.
 
         This is destructive. Callers should confirm with the user before invoking.
+        Unless `snapshot` is False, the current contents are first saved with
+        `decidrx.backup.snapshot`; the backup's path is returned.
         """
+        saved = None
+        if snapshot and os.path.exists(self.path):
+            from decidrx import backup
+
+            if self.conn.in_transaction:
+                self.conn.commit()
+            saved = backup.snapshot(self.path)
         # Close existing connection
         try:
             self.conn.close()
@@ -334,8 +1195,32 @@ class Database:
         except Exception:
             pass
         # Recreate connection and schema
+        self._cache_version = None
         self._ensure_dir()
-        self.conn = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES)
-        self.conn.row_factory = sqlite3.Row
+        self._connect()
         self.init_db()
-        return True
+        return saved
+
+
+def shared() -> Optional[Database]:
+    """The database installed by `shared_database()`, if any."""
+    return _shared
+
+
+def get_database(path: Optional[str] = None) -> Database:
+    """Database for a command: the shared one inside `shared_database()`, else a new connection."""
+    if _shared is not None and (path or DEFAULT_DB) == _shared.path:
+        return _shared
+    return Database(path)
+
+
+@contextmanager
+def shared_database(db: Database):
+    """Make `get_database` hand out `db` for the enclosed block (used by `decidrx batch`)."""
+    global _shared
+    prev = _shared
+    _shared = db
+    try:
+        yield db
+    finally:
+        _shared = prev
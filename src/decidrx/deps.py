@@ -0,0 +1,60 @@
+"""Dependency-graph helpers used for dependency-aware ranking."""
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def _parse(ts: Optional[str]) -> Optional[datetime]:
+    if not ts:
+        return None
+    try:
+        dt = datetime.fromisoformat(ts)
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def effective_deadlines(rows: Iterable[Tuple[int, int, Optional[str], Optional[str]]]) -> Dict[int, str]:
+    """Propagate deadlines over the rows of `Database.get_pending_dependency_edges`.
+
+    Returns only the tasks whose deadline got earlier because of a dependent.
+    """
+    deadlines: Dict[int, Optional[str]] = {}
+    edges = []
+    for task_id, depends_on, task_deadline, dep_deadline in rows:
+        deadlines[task_id] = task_deadline
+        deadlines[depends_on] = dep_deadline
+        edges.append((task_id, depends_on))
+    if not edges:
+        return {}
+    propagated = propagate_deadlines(deadlines, edges)
+    return {tid: dl for tid, dl in propagated.items() if dl is not None and _parse(deadlines[tid]) != _parse(dl)}
+
+
+def propagate_deadlines(deadlines: Dict[int, Optional[str]], edges: Iterable[Tuple[int, int]]) -> Dict[int, Optional[str]]:
+    """Return effective deadlines where each prerequisite inherits the earliest deadline of its dependents.
+
+    `deadlines` maps task id -> ISO deadline (or None) for the pending tasks; `edges` are
+    (task_id, depends_on) pairs. Runs Kahn's algorithm from dependents towards prerequisites,
+    so the cost is O(tasks + edges). Tasks caught in a (legacy) cycle keep their own deadline.
+    """
+    prereqs = defaultdict(list)
+    indegree = defaultdict(int)  # number of pending dependents still to be processed
+    for task_id, depends_on in edges:
+        if task_id in deadlines and depends_on in deadlines:
+            prereqs[task_id].append(depends_on)
+            indegree[depends_on] += 1
+
+    effective = {tid: _parse(dl) for tid, dl in deadlines.items()}
+    queue = deque(tid for tid in deadlines if indegree[tid] == 0)
+    while queue:
+        tid = queue.popleft()
+        mine = effective[tid]
+        for p in prereqs.get(tid, ()):
+            if mine is not None and (effective[p] is None or mine < effective[p]):
+                effective[p] = mine
+            indegree[p] -= 1
+            if indegree[p] == 0:
+                queue.append(p)
+
+    return {tid: (dt.isoformat() if dt is not None else None) for tid, dt in effective.items()}
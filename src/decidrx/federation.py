@@ -0,0 +1,98 @@
+"""Run read commands over several DecidRX databases at once.
+
+`now`, `quick` and `calendar` accept repeated ``--db PATH`` (or a
+``DECIDRX_DBS`` list separated by ``os.pathsep``). Each database is opened
+on a worker thread with its own connection and queried through an
+:class:`~decidrx.api.Session`; SQLite releases the GIL while it reads, so on a
+multi-core machine the sources overlap instead of adding up. Scoring itself
+holds the GIL, so the pool never has more workers than CPUs. Results are merged
+in the calling thread and task ids are qualified by source (``work:12``).
+"""
+import heapq
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from decidrx.api import Session
+from decidrx.db import Database
+
+DBS_ENV = "DECIDRX_DBS"
+MAX_WORKERS = 8
+
+
+def db_paths(args) -> List[str]:
+    """Databases named by repeated --db, else by $DECIDRX_DBS; empty means the usual single database."""
+    paths = list(getattr(args, "db", None) or [])
+    if not paths:
+        paths = [p for p in os.environ.get(DBS_ENV, "").split(os.pathsep) if p]
+    return paths
+
+
+def source_names(paths: Sequence[str]) -> List[str]:
+    """Short unique labels for `paths`: the file stem, prefixed with its directory when stems clash."""
+    stems = [os.path.splitext(os.path.basename(p))[0] or p for p in paths]
+    full = [os.path.abspath(p) for p in paths]
+    names = []
+    for path, stem in zip(full, stems):
+        if any(s == stem and f != path for s, f in zip(stems, full)):
+            stem = f"{os.path.basename(os.path.dirname(path))}/{stem}"
+        names.append(stem)
+    # identical paths given twice
+    seen = {}
+    for i, name in enumerate(names):
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            names[i] = f"{name}#{seen[name]}"
+    return names
+
+
+def qualify(source: str, task_id) -> str:
+    return f"{source}:{task_id}"
+
+
+def _run(path: str, fn: Callable[[Session], Any]):
+    if not os.path.exists(path):
+        # opening would silently create an empty database
+        raise FileNotFoundError(f"no database at {path}")
+    # a private connection: sqlite3 connections stay on the thread that opened them
+    db = Database(path)
+    try:
+        return fn(Session(db=db))
+    finally:
+        db.conn.close()
+
+
+def fan_out(paths: Sequence[str], fn: Callable[[Session], Any],
+            max_workers: Optional[int] = None) -> List[Tuple[str, Any, Optional[Exception]]]:
+    """Call `fn(session)` for every database concurrently.
+
+    Returns (source name, result, error) per path, in the order given; a failing
+    source has result None and the exception as error.
+    """
+    names = source_names(paths)
+    # more threads than cores only adds GIL contention to the Python scoring
+    workers = max_workers or max(1, min(len(paths), MAX_WORKERS, os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="decidrx-db") as pool:
+        futures = [pool.submit(_run, p, fn) for p in paths]
+        out = []
+        for name, fut in zip(names, futures):
+            try:
+                out.append((name, fut.result(), None))
+            except Exception as e:
+                out.append((name, None, e))
+    return out
+
+
+def merge_top(results, key: Callable[[Any], float], limit: Optional[int] = None) -> List[Tuple[str, Any]]:
+    """Merge per-source lists that are sorted by `key` descending into one (source, item) list.
+
+    Only the first `limit` entries are produced, so each source only needs its own top `limit`.
+    """
+    streams = [[(name, item) for item in items] for name, items, err in results if err is None]
+    merged = heapq.merge(*streams, key=lambda pair: key(pair[1]), reverse=True)
+    return list(itertools.islice(merged, limit) if limit else merged)
+
+
+def errors(results) -> List[Tuple[str, Exception]]:
+    return [(name, err) for name, _, err in results if err is not None]
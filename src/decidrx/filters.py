@@ -0,0 +1,343 @@
+"""`--where` filter expressions compiled to parameterized SQL over the tasks table.
+
+Grammar (keywords are case-insensitive)::
+
+    expr       := term ("or" term)*
+    term       := factor ("and" factor)*
+    factor     := "not" factor | "(" expr ")" | "under" ID | "tag" (=|!=) NAME | "blocked"
+                | FIELD OP VALUE
+
+    OP         := = | == | != | < | <= | > | >= | ~      (~ is "contains", text only)
+    FIELD      := id title description deadline|due duration reward penalty effort
+                  type created_at|created completed|done completed_at parent_id|parent
+
+Values are numbers, quoted or bare strings, true/false, or null (``= null`` /
+``!= null`` become IS NULL / IS NOT NULL). Date fields accept ISO dates or
+datetimes (local time when naive), relative offsets such as ``3d``, ``-12h``,
+``2w``, and the keywords now, today, tomorrow, yesterday and eow (start of next
+week). ``under 12`` matches all descendants of task 12, ``tag = home``
+tasks carrying that tag and ``blocked`` tasks with an unfinished prerequisite.
+
+Example: ``type = deep and reward > 6 and due < eow and under 12``
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+FIELDS = {
+    "id": ("id", "int"),
+    "title": ("title", "text"),
+    "description": ("description", "text"),
+    "deadline": ("deadline", "date"),
+    "due": ("deadline", "date"),
+    "duration": ("duration", "int"),
+    "reward": ("reward", "int"),
+    "penalty": ("penalty", "int"),
+    "effort": ("effort", "int"),
+    "type": ("type", "text"),
+    "created_at": ("created_at", "date"),
+    "created": ("created_at", "date"),
+    "completed": ("completed", "bool"),
+    "done": ("completed", "bool"),
+    "completed_at": ("completed_at", "date"),
+    "parent_id": ("parent_id", "int"),
+    "parent": ("parent_id", "int"),
+}
+
+_OPS = {"=": "=", "==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "~": "LIKE"}
+_KEYWORDS = ("and", "or", "not", "under", "blocked")
+
+_TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<paren>[()])
+      | (?P<op><=|>=|!=|==|=|<|>|~)
+      | (?P<str>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<word>[^\s()<>=!~'"]+)
+    )""",
+    re.VERBOSE,
+)
+_RELATIVE_RE = re.compile(r"^([+-]?\d+)([hdw])$")
+
+
+class FilterError(ValueError):
+    """Raised for malformed `--where` expressions."""
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise FilterError(f"Unexpected character at position {pos}: {text[pos:pos + 10]!r}")
+        kind = m.lastgroup
+        val = m.group(kind)
+        if kind == "str":
+            val = re.sub(r"\\(.)", r"\1", val[1:-1])
+        elif kind == "word" and val.lower() in _KEYWORDS:
+            kind, val = "kw", val.lower()
+        tokens.append((kind, val))
+        pos = m.end()
+    return tokens
+
+
+def _local_midnight(now: datetime, days: int = 0) -> datetime:
+    local = now.astimezone()
+    start = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start + timedelta(days=days)
+
+
+def parse_date_value(token: str, now: Optional[datetime] = None) -> str:
+    """Resolve a date token to the UTC ISO string format used for stored deadlines."""
+    now = now or datetime.now(timezone.utc)
+    low = token.lower()
+    m = _RELATIVE_RE.match(low)
+    if m:
+        n, unit = int(m.group(1)), m.group(2)
+        delta = {"h": timedelta(hours=n), "d": timedelta(days=n), "w": timedelta(weeks=n)}[unit]
+        dt = now + delta
+    elif low == "now":
+        dt = now
+    elif low == "today":
+        dt = _local_midnight(now)
+    elif low == "tomorrow":
+        dt = _local_midnight(now, 1)
+    elif low == "yesterday":
+        dt = _local_midnight(now, -1)
+    elif low == "eow":
+        dt = _local_midnight(now, 7 - now.astimezone().weekday())
+    else:
+        try:
+            dt = datetime.fromisoformat(token)
+        except ValueError:
+            raise FilterError(f"Invalid date value: {token!r}")
+        if dt.tzinfo is None:
+            dt = dt.astimezone()
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+class Filter:
+    """A parsed `--where` expression; `sql()` renders it as a WHERE fragment plus parameters."""
+
+    def __init__(self, text: str, now: Optional[datetime] = None):
+        self.text = text
+        self._now = now or datetime.now(timezone.utc)
+        self._tokens = _tokenize(text)
+        self._pos = 0
+        if not self._tokens:
+            raise FilterError("Empty filter expression")
+        self._ast = self._expr()
+        if self._pos != len(self._tokens):
+            raise FilterError(f"Unexpected token: {self._tokens[self._pos][1]!r}")
+
+    # -- parsing -----------------------------------------------------------
+    def _peek(self):
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else (None, None)
+
+    def _next(self):
+        tok = self._peek()
+        if tok[0] is None:
+            raise FilterError("Unexpected end of filter expression")
+        self._pos += 1
+        return tok
+
+    def _expr(self):
+        node = self._term()
+        while self._peek() == ("kw", "or"):
+            self._pos += 1
+            node = ("or", node, self._term())
+        return node
+
+    def _term(self):
+        node = self._factor()
+        while self._peek() == ("kw", "and"):
+            self._pos += 1
+            node = ("and", node, self._factor())
+        return node
+
+    def _factor(self):
+        kind, val = self._next()
+        if (kind, val) == ("kw", "not"):
+            return ("not", self._factor())
+        if (kind, val) == ("paren", "("):
+            node = self._expr()
+            if self._next() != ("paren", ")"):
+                raise FilterError("Expected ')'")
+            return node
+        if (kind, val) == ("kw", "under"):
+            _, ident = self._next()
+            try:
+                return ("under", int(ident))
+            except ValueError:
+                raise FilterError(f"`under` expects a task id, got {ident!r}")
+        if (kind, val) == ("kw", "blocked"):
+            return ("blocked",)
+        if kind == "word" and val.lower() == "tag":
+            op_kind, op = self._next()
+            if op_kind != "op" or op not in ("=", "==", "!="):
+                raise FilterError("tag can only be compared with = or !=")
+            _, name = self._next()
+            node = ("tags", (name.strip().lower(),))
+            return ("not", node) if op == "!=" else node
+        if kind != "word" or val.lower() not in FIELDS:
+            raise FilterError(f"Unknown field: {val!r} (known: {', '.join(sorted(FIELDS))})")
+        column, ftype = FIELDS[val.lower()]
+        op_kind, op = self._next()
+        if op_kind != "op":
+            raise FilterError(f"Expected an operator after {val!r}, got {op!r}")
+        v_kind, raw = self._next()
+        if v_kind not in ("word", "str"):
+            raise FilterError(f"Expected a value after {val} {op}")
+        return ("cmp", column, _OPS[op], self._value(ftype, op, raw, v_kind == "str"))
+
+    def _value(self, ftype: str, op: str, raw: str, quoted: bool):
+        if not quoted and raw.lower() in ("null", "none"):
+            if op not in ("=", "==", "!="):
+                raise FilterError("null can only be compared with = or !=")
+            return None
+        if op == "~":
+            if ftype != "text":
+                raise FilterError("~ (contains) only applies to text fields")
+            escaped = raw.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            return f"%{escaped}%"
+        if ftype == "int":
+            try:
+                return int(raw)
+            except ValueError:
+                try:
+                    return float(raw)
+                except ValueError:
+                    raise FilterError(f"Expected a number, got {raw!r}")
+        if ftype == "bool":
+            low = raw.lower()
+            if low in ("true", "yes", "1"):
+                return 1
+            if low in ("false", "no", "0"):
+                return 0
+            raise FilterError(f"Expected true/false, got {raw!r}")
+        if ftype == "date":
+            return parse_date_value(raw, self._now)
+        return raw
+
+    # -- compilation -------------------------------------------------------
+    def sql(self, alias: Optional[str] = None) -> Tuple[str, list]:
+        params: list = []
+        clause = self._compile(self._ast, (alias + ".") if alias else "", params)
+        return clause, params
+
+    def _compile(self, node, prefix: str, params: list) -> str:
+        kind = node[0]
+        if kind in ("and", "or"):
+            left = self._compile(node[1], prefix, params)
+            right = self._compile(node[2], prefix, params)
+            return f"({left} {kind.upper()} {right})"
+        if kind == "not":
+            return f"(NOT {self._compile(node[1], prefix, params)})"
+        if kind == "under":
+            params.append(node[1])
+            return (
+                f"{prefix}id IN (WITH RECURSIVE sub(id) AS ("
+                "SELECT id FROM tasks WHERE parent_id = ?"
+                " UNION ALL SELECT t2.id FROM tasks t2 JOIN sub ON t2.parent_id = sub.id"
+                ") SELECT id FROM sub)"
+            )
+        if kind == "tags":
+            return _tags_sql(node[1], prefix, params)
+        if kind == "blocked":
+            return _blocked_sql(prefix)
+        _, column, op, value = node
+        if value is None:
+            return f"{prefix}{column} IS {'NOT ' if op == '!=' else ''}NULL"
+        params.append(value)
+        if op == "LIKE":
+            return f"{prefix}{column} LIKE ? ESCAPE '\\'"
+        return f"{prefix}{column} {op} ?"
+
+
+def _tags_sql(names, prefix: str, params: list) -> str:
+    # set intersection inside SQLite: one (tag_id, task_id) primary-key range per tag, INTERSECTed
+    arm = "SELECT task_id FROM task_tags WHERE tag_id = (SELECT id FROM tags WHERE name = ?)"
+    params.extend(names)
+    return f"{prefix}id IN ({' INTERSECT '.join([arm] * len(names))})"
+
+
+def _blocked_sql(prefix: str) -> str:
+    # the subquery has its own `id` columns, so the outer task must be qualified
+    prefix = prefix or "tasks."
+    return (
+        "EXISTS (SELECT 1 FROM task_deps d JOIN tasks pre ON pre.id = d.depends_on"
+        f" WHERE d.task_id = {prefix}id AND pre.completed = 0)"
+    )
+
+
+class ReadyFilter:
+    """Matches tasks whose prerequisites are all done (`now --ready`)."""
+
+    def sql(self, alias: Optional[str] = None) -> Tuple[str, list]:
+        return f"NOT {_blocked_sql((alias + '.') if alias else '')}", []
+
+
+class TagFilter:
+    """Matches tasks carrying all of the given tags (`--tag a --tag b`)."""
+
+    def __init__(self, names):
+        self.names = tuple(sorted({n.strip().lower() for n in names if n and n.strip()}))
+        if not self.names:
+            raise FilterError("Empty tag")
+
+    def sql(self, alias: Optional[str] = None) -> Tuple[str, list]:
+        params: list = []
+        return _tags_sql(self.names, (alias + ".") if alias else "", params), params
+
+
+class IdFilter:
+    """Matches the given task ids (e.g. the rows a change touched)."""
+
+    def __init__(self, ids):
+        self.ids = tuple(sorted(set(ids)))
+
+    def sql(self, alias: Optional[str] = None) -> Tuple[str, list]:
+        if not self.ids:
+            return "0", []
+        return f"{(alias + '.') if alias else ''}id IN ({','.join('?' * len(self.ids))})", list(self.ids)
+
+
+class AllOf:
+    """Conjunction of filters exposing the same `sql()` interface."""
+
+    def __init__(self, *filters):
+        self.filters = [f for f in filters if f is not None]
+
+    def sql(self, alias: Optional[str] = None) -> Tuple[str, list]:
+        clauses, params = [], []
+        for f in self.filters:
+            c, p = f.sql(alias)
+            clauses.append(f"({c})")
+            params.extend(p)
+        return " AND ".join(clauses), params
+
+
+def parse_filter(text: Optional[str], now: Optional[datetime] = None) -> Optional[Filter]:
+    """Parse a `--where` option value; returns None when no filter was given."""
+    if text is None or not text.strip():
+        return None
+    return Filter(text, now=now)
+
+
+def build_filter(where: Optional[str] = None, tags=None, ready: bool = False):
+    """Combine a `--where` expression, required tags and the ready predicate into one filter (or None)."""
+    filters = [parse_filter(where)]
+    if tags:
+        filters.append(TagFilter(tags))
+    if ready:
+        filters.append(ReadyFilter())
+    filters = [f for f in filters if f is not None]
+    if not filters:
+        return None
+    return filters[0] if len(filters) == 1 else AllOf(*filters)
+
+
+def filter_from_args(args):
+    """Combine a command's `--where`, repeated `--tag` and `--ready` options into one filter (or None)."""
+    return build_filter(getattr(args, "where", None), getattr(args, "tag", None), getattr(args, "ready", False))
@@ -0,0 +1,352 @@
+"""Local HTTP/JSON API (`decidrx http`), standard library only.
+
+Read endpoints (GET)::
+
+    /now?limit=5&where=...&tag=a&tag=b&ready=1     ranked tasks
+    /quick?max_duration=20&limit=10&leaves=1        quick wins
+    /tasks?where=...&tag=...&all=1                  task list
+    /tasks/<id>                                     one task with its tags
+    /tasks/<id>/tree                                the task and its subtasks
+    /calendar/<year>/<month>?all=1&utc=1            deadline counts and blocked days
+
+Writes: ``POST /tasks`` (JSON body with the fields of `Session.add`), ``PATCH
+/tasks/<id>`` (fields of `Session.edit`), ``POST /tasks/<id>/done`` and ``DELETE
+/tasks/<id>?cascade=1``. Write requests must send ``Content-Type: application/json``, so a
+web page cannot forge them with a plain form post. Requests must also name this server
+in ``Host`` (``127.0.0.1``, ``localhost``, ``[::1]`` or the ``--host`` address, with the
+port), so a page whose domain was re-pointed at 127.0.0.1 (DNS rebinding) gets a 403.
+
+Every GET answer carries an ETag built from the database write version (plus the minute
+for `/now`, `/quick` and `where` filters, which depend on the time; scores are computed
+for that minute).
+A poller that sends it back in ``If-None-Match`` gets an empty 304 until something is
+written, by this server or any other process. Bodies are cached under the same version,
+so identical polls without an ETag are not recomputed either.
+
+Like `decidrx serve`, all database work runs on one worker thread holding a single
+connection; the asyncio loop parses requests and writes responses, with keep-alive.
+"""
+import asyncio
+import json
+import secrets
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from decidrx import db as _db
+from decidrx.api import Session, TreeNode
+from decidrx.db import Database
+
+# names a browser may use for this server; anything else in Host is a rebound domain
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "[::1]")
+MAX_BODY = 1 << 20
+MAX_HEADERS = 100
+# GET routes whose answer depends on the current time (as does any `where`, e.g. "due < eow")
+TIMED = ("now", "quick")
+ADD_FIELDS = ("description", "duration", "reward", "penalty", "effort", "type", "parent_id", "tags", "recur")
+# JSON types accepted for task fields in POST/PATCH bodies (None is accepted too)
+FIELD_TYPES = {
+    "title": str, "description": str, "type": str, "recur": str, "deadline": (int, float, str),
+    "duration": int, "reward": int, "penalty": int, "effort": int, "parent_id": int, "tags": list,
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _task_json(t, fields=None) -> dict:
+    return {k: t[k] for k in (fields or t.keys())}
+
+
+_LIST_FIELDS = tuple(c for c in _db.LIST_COLUMNS if c != "description_preview") + ("description",)
+
+
+def _tree_json(node: TreeNode) -> dict:
+    out = _task_json(node.task, _LIST_FIELDS)
+    out["children"] = [_tree_json(c) for c in node.children]
+    return out
+
+
+def _int(query, name: str, default=None):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return int(values[-1])
+    except ValueError:
+        raise HttpError(400, f"{name} must be an integer")
+
+
+def _flag(query, name: str) -> bool:
+    return (query.get(name) or ["0"])[-1].lower() in ("1", "true", "yes")
+
+
+def _one(query, name: str) -> Optional[str]:
+    values = query.get(name)
+    return values[-1] if values else None
+
+
+class ApiServer:
+    """Serve the JSON API for one database."""
+
+    def __init__(self, db_path: Optional[str] = None, host: str = "127.0.0.1", port: int = 8765):
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        # ETags from an earlier run must not match: the write version restarts with the connection
+        self.instance = secrets.token_hex(4)
+        self.requests = 0
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decidrx-http", initializer=self._open)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    def _open(self):
+        self.db = Database(self.db_path)
+        self.db.enable_read_cache()
+        self.session = Session(db=self.db)
+
+    def _close(self):
+        self.db.conn.close()
+
+    def _host_allowed(self, host: str) -> bool:
+        names = set(LOCAL_HOSTS)
+        if self.host not in ("", "0.0.0.0", "::"):
+            names.add(f"[{self.host}]" if ":" in self.host else self.host)
+        host = host.lower()
+        return any(host == f"{n}:{self.port}" or (self.port == 80 and host == n) for n in names)
+
+    # -- worker thread -------------------------------------------------------
+    def respond(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, dict, bytes]:
+        """Answer one request: (status, extra headers, body)."""
+        self.requests += 1
+        if not self._host_allowed(headers.get("host", "")):
+            return 403, {}, json.dumps({"error": "unexpected Host header"}).encode()
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        try:
+            if method in ("GET", "HEAD"):
+                return self._get(parts, query, target, headers)
+            if method in ("POST", "PATCH", "DELETE"):
+                if method != "DELETE" and "application/json" not in headers.get("content-type", ""):
+                    raise HttpError(415, "send the body as application/json")
+                data = json.loads(body or b"{}") if method != "DELETE" else {}
+                if not isinstance(data, dict):
+                    raise HttpError(400, "the body must be a JSON object")
+                _check_types(data)
+                with self.db.transaction():
+                    status, payload = self._write(method, parts, query, data)
+                return status, {}, json.dumps(payload).encode()
+            raise HttpError(405, f"{method} is not supported")
+        except HttpError as e:
+            return e.status, {}, json.dumps({"error": str(e)}).encode()
+        except json.JSONDecodeError as e:
+            return 400, {}, json.dumps({"error": f"invalid JSON: {e}"}).encode()
+        except ValueError as e:
+            status = 404 if str(e).startswith("No task with id") else 400
+            return status, {}, json.dumps({"error": str(e)}).encode()
+        except Exception as e:
+            traceback.print_exc()
+            return 500, {}, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()
+
+    def _get(self, parts: List[str], query, target: str, headers) -> Tuple[int, dict, bytes]:
+        route = parts[0] if parts else ""
+        minute = None
+        if route in TIMED or "where" in query:
+            minute = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        version = self.db.write_version()
+        etag = f'"{self.instance}-{version[0]}-{version[1]}' + (f'-{minute:%Y%m%d%H%M}"' if minute else '"')
+        cache = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+            return 304, cache, b""
+        body = self.db.cached(("http", target, minute), lambda: json.dumps(self._read(parts, query, minute)).encode())
+        return 200, cache, body
+
+    def _read(self, parts: List[str], query, minute: Optional[datetime]):
+        s = self.session
+        route, rest = (parts[0] if parts else ""), parts[1:]
+        where, tags = _one(query, "where"), query.get("tag")
+        if route == "now" and not rest:
+            ranked = s.rank(_int(query, "limit", 5), where, tags, _flag(query, "ready"), now=minute)
+            return [{"task": _task_json(r.task, _db.SCORE_COLUMNS), "score": r.score, "aggregate": r.aggregate,
+                     "children": [c.id for c in r.children]} for r in ranked]
+        if route == "quick" and not rest:
+            wins = s.quick(_int(query, "max_duration", 20), _int(query, "limit", 10), _flag(query, "leaves"), where, tags,
+                           now=minute)
+            return [{"task": _task_json(q.task, _db.SCORE_COLUMNS), "score": q.score, "parent_title": q.parent_title}
+                    for q in wins]
+        if route == "tasks" and not rest:
+            return [_task_json(t, _LIST_FIELDS) for t in s.tasks(where, tags, _flag(query, "all"))]
+        if route == "tasks" and len(rest) == 1:
+            task = s.get(self._path_int(rest[0]))
+            if task is None:
+                raise HttpError(404, f"No task with id {rest[0]}")
+            return dict(_task_json(task), tags=self.db.get_tags(task.id))
+        if route == "tasks" and len(rest) == 2 and rest[1] == "tree":
+            return _tree_json(s.subtree(self._path_int(rest[0])))
+        if route == "calendar" and len(rest) == 2:
+            year, month = self._path_int(rest[0]), self._path_int(rest[1])
+            if not 1 <= month <= 12:
+                raise HttpError(400, "month must be 1-12")
+            view = s.calendar_month(year, month, _flag(query, "all"), use_local=not _flag(query, "utc"))
+            return {
+                "year": view.year,
+                "month": view.month,
+                "counts": {d.isoformat(): n for d, n in sorted(view.counts.items())},
+                "minutes": {d.isoformat(): n for d, n in sorted(view.minutes.items())},
+                "blocked": {d.isoformat(): reason for d, reason in sorted(view.blocked.items())},
+            }
+        raise HttpError(404, "no such endpoint")
+
+    def _write(self, method: str, parts: List[str], query, data: dict) -> Tuple[int, object]:
+        s = self.session
+        route, rest = (parts[0] if parts else ""), parts[1:]
+        if route != "tasks":
+            raise HttpError(404, "no such endpoint")
+        if method == "POST" and not rest:
+            if not isinstance(data.get("title"), str):
+                raise HttpError(400, "title is required")
+            unknown = set(data) - set(ADD_FIELDS) - {"title", "deadline"}
+            if unknown:
+                raise HttpError(400, f"unknown fields: {', '.join(sorted(unknown))}")
+            deadline = data.get("deadline")
+            if isinstance(deadline, str):
+                deadline = _parse_deadline(deadline)
+            task = s.add(data["title"], deadline, **{k: data[k] for k in ADD_FIELDS if k in data})
+            return 201, _task_json(task)
+        task_id = self._path_int(rest[0]) if rest else None
+        if method == "PATCH" and len(rest) == 1:
+            fields = dict(data)
+            if isinstance(fields.get("deadline"), str):
+                fields["deadline"] = _parse_deadline(fields["deadline"])
+            return 200, _task_json(s.edit(task_id, **fields))
+        if method == "POST" and len(rest) == 2 and rest[1] == "done":
+            result = s.done(task_id)
+            return 200, {"id": result.task_id, "next": _task_json(result.next) if result.next else None}
+        if method == "DELETE" and len(rest) == 1:
+            return 200, {"deleted": s.remove(task_id, cascade=_flag(query, "cascade"))}
+        raise HttpError(404, "no such endpoint")
+
+    @staticmethod
+    def _path_int(text: str) -> int:
+        try:
+            return int(text)
+        except ValueError:
+            raise HttpError(404, "no such endpoint")
+
+    # -- event loop ----------------------------------------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HttpError as e:
+                    writer.write(_response(e.status, {}, json.dumps({"error": str(e)}).encode(), False, False))
+                    break
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                status, extra, payload = await loop.run_in_executor(
+                    self._pool, self.respond, method, target, headers, body)
+                keep = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(_response(status, extra, payload, keep, method == "HEAD"))
+                await writer.drain()
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._pool, lambda: None)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # with port 0 the system picked one
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._loop = loop
+        self._stop = asyncio.Event()
+        return self
+
+    async def serve_forever(self):
+        """Serve until `stop()`, then close the listener and the database connection."""
+        try:
+            await self._stop.wait()
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+            await self._loop.run_in_executor(self._pool, self._close)
+            self._pool.shutdown()
+
+    def stop(self):
+        """Make `serve_forever` return; safe to call from any thread."""
+        self._loop.call_soon_threadsafe(self._stop.set)
+
+
+def _check_types(data: dict):
+    for name, value in data.items():
+        expected = FIELD_TYPES.get(name)
+        if expected is None or value is None:
+            continue
+        # bool is an int subclass but never a sensible field value
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise HttpError(400, f"{name} has the wrong type")
+        if name == "tags" and not all(isinstance(t, str) for t in value):
+            raise HttpError(400, "tags must be a list of strings")
+
+
+def _parse_deadline(text: str) -> datetime:
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        raise HttpError(400, f"deadline must be an ISO timestamp or a number of days, not {text!r}")
+    # stored as UTC like every other deadline, so range queries and day counts agree
+    return dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """Parse one request; None when the client closed a kept-alive connection."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "malformed request line")
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HttpError(431, "too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", ""):
+        raise HttpError(411, "send a Content-Length")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "bad Content-Length")
+    if length > MAX_BODY:
+        raise HttpError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, version, headers, body
+
+
+def _response(status: int, extra: dict, body: bytes, keep_alive: bool, head: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    if status != 304:
+        lines.append("Content-Type: application/json")
+        lines.append(f"Content-Length: {len(body)}")
+    lines += [f"{k}: {v}" for k, v in extra.items()]
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    head_bytes = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return head_bytes if head or status == 304 else head_bytes + body
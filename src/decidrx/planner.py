@@ -0,0 +1,201 @@
+"""Capacity-constrained task selection for `decidrx plan`.
+
+Picking the most valuable set of tasks that fits a minutes budget is a 0/1
+knapsack. :func:`solve` runs a depth-first branch and bound over items sorted
+by value density, pruning with the Dantzig (fractional) bound computed from
+prefix sums in O(log n). Optional per-type minute caps (deep/shallow mix) are
+enforced while branching and by the bound, and items that cannot beat the
+incumbent are fixed out before each search round. If the search exceeds its time limit the best plan
+found so far is returned (never worse than the greedy-by-density seed) and
+marked as not proven optimal.
+"""
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence
+
+_EPS = 1e-9
+
+
+class Item:
+    """A candidate task: `value` to maximize, `minutes` it costs, `kind` for mix caps."""
+
+    __slots__ = ("key", "value", "minutes", "kind")
+
+    def __init__(self, key, value: float, minutes: int, kind: Optional[str] = None):
+        self.key = key
+        self.value = value
+        self.minutes = minutes
+        self.kind = kind
+
+
+class Plan:
+    """Solver result: chosen items (in density order), their totals, and whether optimality was proven."""
+
+    def __init__(self, items: List[Item], optimal: bool, nodes: int):
+        self.items = items
+        self.value = sum(i.value for i in items)
+        self.minutes = sum(i.minutes for i in items)
+        self.optimal = optimal
+        self.nodes = nodes
+
+
+def _greedy(items: Sequence[Item], budget: int, caps: Dict[str, int]) -> List[int]:
+    left = budget
+    kind_left = dict(caps)
+    chosen = []
+    for idx, it in enumerate(items):
+        if it.minutes > left:
+            continue
+        if it.kind in kind_left:
+            if it.minutes > kind_left[it.kind]:
+                continue
+            kind_left[it.kind] -= it.minutes
+        left -= it.minutes
+        chosen.append(idx)
+    return chosen
+
+
+class _Bounds:
+    """Dantzig bounds over `cands` (sorted by density), overall and per capped kind."""
+
+    def __init__(self, cands: Sequence[Item], kinds: List[str]):
+        self.kinds = kinds
+        self.kind_idx = [kinds.index(it.kind) if it.kind in kinds else -1 for it in cands]
+        self.everything = self._prefix(cands)
+        # one group per capped kind, the last group holds the uncapped items
+        self.groups = [self._prefix([it for it, k in zip(cands, self.kind_idx) if k == g]) for g in range(len(kinds))]
+        self.groups.append(self._prefix([it for it, k in zip(cands, self.kind_idx) if k < 0]))
+        # gstart[i][g]: how many items of group g precede position i
+        self.gstart = [[0] * len(self.groups)]
+        for k in self.kind_idx:
+            row = list(self.gstart[-1])
+            row[k] += 1  # k == -1 is the uncapped group
+            self.gstart.append(row)
+
+    @staticmethod
+    def _prefix(seq):
+        pw, pv = [0], [0.0]
+        for it in seq:
+            pw.append(pw[-1] + it.minutes)
+            pv.append(pv[-1] + it.value)
+        return seq, pw, pv
+
+    @staticmethod
+    def _frac(group, start: int, cap: int) -> float:
+        # take items in density order, the last one fractionally
+        seq, pw, pv = group
+        target = pw[start] + cap
+        j = bisect_right(pw, target, start) - 1
+        b = pv[j] - pv[start]
+        if j < len(seq):
+            b += (target - pw[j]) * seq[j].value / seq[j].minutes
+        return b
+
+    def bound(self, i: int, cap: int, kcap: tuple) -> float:
+        """LP bound on the value obtainable from items i.. with `cap` minutes and per-kind caps.
+
+        The caps form a laminar family, so the fractional optimum takes items in density
+        order while each group stays under its cap; the cut-off position is binary-searched.
+        """
+        if not self.kinds:
+            return self._frac(self.everything, i, cap)
+        groups = self.groups
+        starts = self.gstart[i]
+        gcap = [min(c, cap) for c in kcap] + [cap]
+        base = [groups[g][1][starts[g]] for g in range(len(groups))]
+
+        def taken(t):
+            row = self.gstart[t]
+            return [min(gcap[g], groups[g][1][row[g]] - base[g]) for g in range(len(groups))]
+
+        lo, hi = i, len(self.kind_idx)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if sum(taken(mid)) <= cap:
+                lo = mid
+            else:
+                hi = mid - 1
+        used = taken(lo)
+        b = sum(self._frac(groups[g], starts[g], used[g]) for g in range(len(groups)))
+        if lo < len(self.kind_idx):
+            it = self.everything[0][lo]
+            b += (cap - sum(used)) * it.value / it.minutes
+        return b
+
+
+def _reduce(cands: List[Item], budget: int, caps: Dict[str, int], kinds: List[str], best: List[Item]) -> List[Item]:
+    """Drop items that cannot be part of any plan better than `best` (variable fixing)."""
+    bounds = _Bounds(cands, kinds)
+    best_value = sum(it.value for it in best)
+    keep = set(map(id, best))
+    kcap0 = tuple(caps[k] for k in kinds)
+    out = []
+    for it, k in zip(cands, bounds.kind_idx):
+        kcap = kcap0 if k < 0 else kcap0[:k] + (kcap0[k] - it.minutes,) + kcap0[k + 1:]
+        # bound with `it` forced in (over all items, so it stays a valid upper bound)
+        if id(it) in keep or it.value + bounds.bound(0, budget - it.minutes, kcap) > best_value + _EPS:
+            out.append(it)
+    return out
+
+
+def _branch_and_bound(cands: List[Item], budget: int, caps: Dict[str, int], kinds: List[str], best: List[Item], deadline: float, max_nodes: int):
+    """Depth-first search; returns (best items, search finished, nodes visited)."""
+    n = len(cands)
+    bounds = _Bounds(cands, kinds)
+    kind_idx = bounds.kind_idx
+    best_value = sum(it.value for it in best)
+    best_link = None
+    nodes = 0
+    # state: (next index, minutes left, per-kind minutes left, value, chosen as a linked list)
+    stack = [(0, budget, tuple(caps[k] for k in kinds), 0.0, None)]
+    while stack:
+        nodes += 1
+        if nodes > max_nodes or (nodes & 1023 == 0 and time.perf_counter() > deadline):
+            break
+        i, cap, kcap, value, link = stack.pop()
+        if value > best_value + _EPS:
+            best_value, best_link = value, link
+        if i == n or value + bounds.bound(i, cap, kcap) <= best_value + _EPS:
+            continue
+        it = cands[i]
+        stack.append((i + 1, cap, kcap, value, link))
+        if it.minutes <= cap:
+            k = kind_idx[i]
+            if k < 0:
+                stack.append((i + 1, cap - it.minutes, kcap, value + it.value, (i, link)))
+            elif it.minutes <= kcap[k]:
+                kcap2 = kcap[:k] + (kcap[k] - it.minutes,) + kcap[k + 1:]
+                stack.append((i + 1, cap - it.minutes, kcap2, value + it.value, (i, link)))
+    if best_link is not None:
+        best = []
+        while best_link is not None:
+            best.append(cands[best_link[0]])
+            best_link = best_link[1]
+    return best, not stack, nodes
+
+
+def solve(items: Sequence[Item], budget: int, caps: Optional[Dict[str, int]] = None, time_limit: float = 0.5) -> Plan:
+    """Choose items maximizing total value with total minutes <= budget.
+
+    `caps` maps a kind (e.g. "deep") to the most minutes items of that kind may use.
+    Items with non-positive minutes or value, or longer than the budget, are ignored.
+    """
+    caps = dict(caps or {})
+    cands = [it for it in items if 0 < it.minutes <= budget and it.value > 0 and caps.get(it.kind, budget) >= it.minutes]
+    cands.sort(key=lambda it: it.value / it.minutes, reverse=True)
+    kinds = sorted(caps)
+    best = [cands[i] for i in _greedy(cands, budget, caps)]
+
+    deadline = time.perf_counter() + time_limit
+    nodes = 0
+    max_nodes = 4096
+    while True:
+        # every improvement of the incumbent lets more items be fixed out before searching again
+        cands = _reduce(cands, budget, caps, kinds, best)
+        best, finished, visited = _branch_and_bound(cands, budget, caps, kinds, best, deadline, max_nodes)
+        nodes += visited
+        if finished or time.perf_counter() > deadline:
+            break
+        max_nodes *= 4
+    order = {id(it): i for i, it in enumerate(cands)}
+    return Plan(sorted(best, key=lambda it: order[id(it)]), finished, nodes)
@@ -0,0 +1,133 @@
+"""Per-phase wall-clock/CPU timing behind the global ``--profile`` flag.
+
+Instrumentation points call :func:`phase` (or decorate with :func:`timed`).
+When no profiler is active these are near no-ops, so the hooks can stay in
+hot paths such as ``Database`` query methods.
+"""
+import cProfile
+import functools
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+_NULL = nullcontext()
+_active: Optional["Profiler"] = None
+
+
+class Profiler:
+    """Accumulates call count, wall time and CPU time per named phase."""
+
+    def __init__(self, dump_path: Optional[str] = None):
+        self.dump_path = dump_path
+        # name -> [calls, wall_seconds, cpu_seconds]; dicts keep first-seen order
+        self.phases: Dict[str, List[float]] = {}
+        self._cprofile = cProfile.Profile() if dump_path else None
+        self._wall0 = 0.0
+        self._cpu0 = 0.0
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    @contextmanager
+    def phase(self, name: str):
+        w0 = time.perf_counter()
+        c0 = time.process_time()
+        try:
+            yield
+        finally:
+            rec = self.phases.get(name)
+            if rec is None:
+                rec = self.phases[name] = [0, 0.0, 0.0]
+            rec[0] += 1
+            rec[1] += time.perf_counter() - w0
+            rec[2] += time.process_time() - c0
+
+    def start(self):
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.dump_path)
+        self.wall = time.perf_counter() - self._wall0
+        self.cpu = time.process_time() - self._cpu0
+
+    def report(self, out=None):
+        """Print a compact breakdown table (stderr by default)."""
+        from rich.table import Table
+        from decidrx.ui import err_console
+
+        out = out or err_console
+        table = Table(title="Profile", title_justify="left", box=None, pad_edge=False)
+        table.add_column("phase")
+        table.add_column("calls", justify="right")
+        table.add_column("wall ms", justify="right")
+        table.add_column("cpu ms", justify="right")
+        for name, (calls, wall, cpu) in self.phases.items():
+            table.add_row(name, str(int(calls)), f"{wall * 1000:.2f}", f"{cpu * 1000:.2f}")
+        table.add_row("[bold]total[/bold]", "", f"{self.wall * 1000:.2f}", f"{self.cpu * 1000:.2f}")
+        out.print(table)
+        if self.dump_path:
+            out.print(f"[dim]pstats written to {self.dump_path}[/dim]")
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+def phase(name: str):
+    """Context manager timing `name` on the active profiler (no-op when profiling is off)."""
+    if _active is None:
+        return _NULL
+    return _active.phase(name)
+
+
+def timed(name: str):
+    """Decorator form of :func:`phase`."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return fn(*args, **kwargs)
+            with _active.phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+@contextmanager
+def profile_session(dump_path: Optional[str] = None, console=None):
+    """Activate a profiler for the enclosed block and print its report on exit.
+
+    If `console` is given its ``print`` is wrapped so rendering time shows up
+    as the ``render`` phase without commands having to instrument themselves.
+    """
+    global _active
+    prof = Profiler(dump_path)
+    prev = _active
+    _active = prof
+    orig_print = None
+    own_print = False
+    if console is not None:
+        orig_print = console.print
+        own_print = "print" in vars(console)
+
+        def print_timed(*args, **kwargs):
+            with prof.phase("render"):
+                return orig_print(*args, **kwargs)
+
+        console.print = print_timed
+    prof.start()
+    try:
+        yield prof
+    finally:
+        prof.stop()
+        if console is not None:
+            if own_print:
+                console.print = orig_print
+            else:
+                del console.print
+        _active = prev
+        prof.report()
@@ -0,0 +1,158 @@
+"""Compact task records produced straight from SQLite rows.
+
+`Database` task queries set :func:`task_factory` as the cursor's row factory,
+so each row becomes a :class:`Task` with ``__slots__`` instead of a
+``sqlite3.Row`` that callers then copy into a dict. A Task still reads like a
+row or a mapping (``t["title"]``, ``t.get("reward")``, ``keys()``,
+``dict(t)``), so rendering and scoring code accepts either. Stored ISO
+timestamps are decoded at most once per record via :attr:`Task.deadline_dt`
+and :attr:`Task.created_dt`.
+"""
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Optional
+
+# tasks table columns, in the order Task.__init__ takes them
+TASK_FIELDS = (
+    "id", "title", "deadline", "description", "duration", "reward", "penalty", "effort",
+    "type", "created_at", "completed", "completed_at", "parent_id", "recur", "series_id",
+)
+_FIELD_SET = frozenset(TASK_FIELDS)
+_UNSET = object()
+
+
+def _decode(ts: Optional[str]) -> Optional[datetime]:
+    if not ts:
+        return None
+    try:
+        dt = datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class Task:
+    """One row of the tasks table.
+
+    Columns a query did not select are None; other selected columns (e.g. a joined
+    `parent_title`) are kept in `extra` and reachable by key. Treat records as
+    read-only: use :meth:`replace` to derive a changed copy.
+    """
+
+    __slots__ = TASK_FIELDS + ("extra", "_deadline_dt", "_created_dt")
+
+    def __init__(self, id=None, title=None, deadline=None, description=None, duration=None, reward=None, penalty=None,
+                 effort=None, type=None, created_at=None, completed=None, completed_at=None, parent_id=None, recur=None,
+                 series_id=None, extra=None):
+        self.id = id
+        self.title = title
+        self.deadline = deadline
+        self.description = description
+        self.duration = duration
+        self.reward = reward
+        self.penalty = penalty
+        self.effort = effort
+        self.type = type
+        self.created_at = created_at
+        self.completed = completed
+        self.completed_at = completed_at
+        self.parent_id = parent_id
+        self.recur = recur
+        self.series_id = series_id
+        self.extra = extra
+        self._deadline_dt = self._created_dt = _UNSET
+
+    @classmethod
+    def from_row(cls, row) -> "Task":
+        """Build a Task from any mapping-like row (sqlite3.Row, dict, Task)."""
+        keys = row.keys()
+        fields = {k: row[k] for k in TASK_FIELDS if k in keys}
+        extra = {k: row[k] for k in keys if k not in _FIELD_SET}
+        return cls(extra=extra or None, **fields)
+
+    @property
+    def deadline_dt(self) -> Optional[datetime]:
+        """`deadline` as an aware datetime (naive values are UTC), decoded once."""
+        value = self._deadline_dt
+        if value is _UNSET:
+            self._deadline_dt = value = _decode(self.deadline)
+        return value
+
+    @property
+    def created_dt(self) -> Optional[datetime]:
+        """`created_at` as an aware datetime, decoded once."""
+        value = self._created_dt
+        if value is _UNSET:
+            self._created_dt = value = _decode(self.created_at)
+        return value
+
+    def replace(self, **changes) -> "Task":
+        """A copy with some fields changed."""
+        values = {k: getattr(self, k) for k in TASK_FIELDS}
+        values.update(changes)
+        return Task(extra=self.extra, **values)
+
+    # row / mapping protocol
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return value
+
+    def keys(self):
+        return list(TASK_FIELDS) + list(self.extra or ())
+
+    def to_dict(self) -> dict:
+        return {k: self[k] for k in self.keys()}
+
+    def __eq__(self, other):
+        return isinstance(other, Task) and self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Task(id={self.id!r}, title={self.title!r}, completed={self.completed!r})"
+
+
+# the last cursor.description seen and its row builder; the tuple is swapped in one
+# assignment so concurrent connections never pair a description with another's builder
+_layout = (None, None)
+
+
+def _builder(description):
+    names = [d[0] for d in description]
+    if tuple(names) == TASK_FIELDS:
+        # SELECT * on a table with the current column order
+        return lambda row: Task(*row)
+    width = len(names)
+    # positions of TASK_FIELDS in the row; a missing column reads the None appended at `width`
+    getter = itemgetter(*[names.index(f) if f in names else width for f in TASK_FIELDS])
+    extras = [(i, n) for i, n in enumerate(names) if n not in _FIELD_SET]
+    padded = len(set(names) & _FIELD_SET) < len(TASK_FIELDS)
+
+    def build(row):
+        values = getter(row + (None,) if padded else row)
+        t = Task(*values)
+        if extras:
+            t.extra = {n: row[i] for i, n in extras}
+        return t
+
+    return build
+
+
+def task_factory(cursor, row) -> Task:
+    """sqlite3 row factory returning :class:`Task` records."""
+    global _layout
+    layout = _layout
+    description = cursor.description
+    if layout[0] is not description:
+        layout = _layout = (description, _builder(description))
+    return layout[1](row)
@@ -0,0 +1,101 @@
+"""Recurrence rules for repeating tasks.
+
+A rule is stored as text on the task (``tasks.recur``), e.g. ``daily``,
+``weekly``, ``monthly``, ``yearly``, ``every 2 weeks`` or the short forms
+``3d``, ``2w``, ``1m``, ``1y``. Occurrences are always computed from the
+series anchor (the first occurrence's deadline), so monthly rules do not
+drift when a month is shorter than the anchor day.
+"""
+import calendar as _calendar
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+_NAMED = {"daily": (1, "d"), "weekly": (1, "w"), "biweekly": (2, "w"), "monthly": (1, "m"), "yearly": (1, "y")}
+_UNITS = {"d": "d", "day": "d", "days": "d", "w": "w", "week": "w", "weeks": "w",
+          "m": "m", "month": "m", "months": "m", "y": "y", "year": "y", "years": "y"}
+_RULE_RE = re.compile(r"^(?:every\s+)?(\d+)?\s*([a-z]+)$")
+
+
+class Rule:
+    """A fixed-interval recurrence: every `interval` days, weeks, months or years."""
+
+    def __init__(self, interval: int, unit: str):
+        if interval < 1:
+            raise ValueError("Recurrence interval must be at least 1")
+        self.interval = interval
+        self.unit = unit
+
+    def __str__(self):
+        names = {"d": "day", "w": "week", "m": "month", "y": "year"}
+        return f"every {self.interval} {names[self.unit]}{'s' if self.interval != 1 else ''}"
+
+    def _nth(self, anchor: datetime, k: int) -> datetime:
+        if self.unit == "d":
+            return anchor + timedelta(days=k * self.interval)
+        if self.unit == "w":
+            return anchor + timedelta(weeks=k * self.interval)
+        months = k * self.interval * (12 if self.unit == "y" else 1)
+        y, m = divmod(anchor.month - 1 + months, 12)
+        year, month = anchor.year + y, m + 1
+        day = min(anchor.day, _calendar.monthrange(year, month)[1])
+        return anchor.replace(year=year, month=month, day=day)
+
+    def _first_index_after(self, anchor: datetime, after: datetime) -> int:
+        if after < anchor:
+            return 0
+        if self.unit in ("d", "w"):
+            step = timedelta(days=self.interval * (7 if self.unit == "w" else 1))
+            return (after - anchor) // step + 1
+        months = self.interval * (12 if self.unit == "y" else 1)
+        k = max(0, ((after.year - anchor.year) * 12 + after.month - anchor.month) // months - 1)
+        while self._nth(anchor, k) <= after:
+            k += 1
+        return k
+
+    def occurrences(self, anchor: datetime, after: Optional[datetime] = None) -> Iterator[datetime]:
+        """Yield occurrences of the series starting at `anchor`, strictly after `after` if given.
+
+        The generator is unbounded; callers stop consuming once past their window.
+        """
+        k = 0 if after is None else self._first_index_after(anchor, after)
+        while True:
+            yield self._nth(anchor, k)
+            k += 1
+
+    def next_after(self, anchor: datetime, after: datetime) -> datetime:
+        return next(self.occurrences(anchor, after))
+
+
+def parse_rule(text: str) -> Rule:
+    """Parse a recurrence rule; raises ValueError for unknown forms."""
+    low = (text or "").strip().lower()
+    if low in _NAMED:
+        return Rule(*_NAMED[low])
+    m = _RULE_RE.match(low)
+    if not m or m.group(2) not in _UNITS:
+        raise ValueError(f"Invalid recurrence rule: {text!r} (e.g. daily, weekly, monthly, every 2 weeks, 3d)")
+    return Rule(int(m.group(1) or 1), _UNITS[m.group(2)])
+
+
+def parse_timestamp(ts: str) -> datetime:
+    """Parse a stored ISO timestamp; naive values are taken as UTC."""
+    dt = datetime.fromisoformat(ts)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def expand_series(series, start: datetime, end: datetime) -> Iterator[tuple]:
+    """Yield (row, occurrence) for future occurrences of recurring tasks within [start, end).
+
+    `series` are rows from `Database.get_recurring_series`: the pending occurrence of each
+    series plus its `anchor` deadline. Only occurrences after the pending one are virtual;
+    nothing is written to the database.
+    """
+    for row in series:
+        rule = parse_rule(row["recur"])
+        anchor = parse_timestamp(row["anchor"] or row["deadline"])
+        after = max(parse_timestamp(row["deadline"]), start - timedelta(microseconds=1))
+        for occ in rule.occurrences(anchor, after):
+            if occ >= end:
+                break
+            yield row, occ
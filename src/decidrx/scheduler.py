@@ -0,0 +1,107 @@
+"""Earliest-deadline-first assignment of tasks to working days for `decidrx schedule`.
+
+Days are filled in order up to a daily capacity (in minutes) from a heap of
+ready tasks keyed by deadline; a task may continue on the next working day.
+With dependency edges a task only becomes ready once all its prerequisites
+are finished. Runs in O(T log T + D) for T tasks and D days.
+"""
+import heapq
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class Job:
+    """A task to place: `minutes` of work due by the end of `due` (a local date, or None)."""
+
+    __slots__ = ("key", "minutes", "due")
+
+    def __init__(self, key, minutes: int, due: Optional[date] = None):
+        self.key = key
+        self.minutes = minutes
+        self.due = due
+
+
+class Schedule:
+    """Result of :func:`schedule`.
+
+    `assignments` maps each working day to [(job, minutes)], `finish` maps job keys to
+    the day they complete, `late` lists (job, finish day or None) for missed deadlines
+    and `unscheduled` the jobs that did not fit in the horizon. An unscheduled job only
+    counts as late when it is due by the last working day; one due later may still make it.
+    """
+
+    def __init__(self, days: List[date], capacity: int):
+        self.days = days
+        self.capacity = capacity
+        self.assignments: Dict[date, List[Tuple[Job, int]]] = defaultdict(list)
+        self.load: Dict[date, int] = defaultdict(int)
+        self.finish: Dict[object, date] = {}
+        self.late: List[Tuple[Job, Optional[date]]] = []
+        self.unscheduled: List[Job] = []
+
+
+def working_days(start: date, count: int, blocked: Iterable[date]) -> List[date]:
+    """The days in [start, start + count) that are not blocked."""
+    blocked = set(blocked)
+    return [d for d in (start + timedelta(days=i) for i in range(count)) if d not in blocked]
+
+
+def schedule(jobs: Sequence[Job], days: List[date], capacity: int, edges: Iterable[Tuple[object, object]] = ()) -> Schedule:
+    """Assign `jobs` to `days` earliest-deadline-first, `capacity` minutes per day.
+
+    `edges` are (job key, prerequisite key) pairs; pairs naming unknown jobs are ignored.
+    """
+    result = Schedule(days, capacity)
+    by_key = {j.key: j for j in jobs}
+    waiting: Dict[object, int] = defaultdict(int)
+    dependents = defaultdict(list)
+    for key, pre in edges:
+        if key in by_key and pre in by_key:
+            waiting[key] += 1
+            dependents[pre].append(key)
+
+    no_due = date.max
+    heap = []
+    seq = 0
+    for j in jobs:
+        if not waiting[j.key]:
+            heap.append((j.due or no_due, seq, j))
+            seq += 1
+    heapq.heapify(heap)
+    remaining = {j.key: j.minutes for j in jobs}
+
+    for day in days:
+        left = capacity
+        while left > 0 and heap:
+            due, s, job = heap[0]
+            work = min(left, remaining[job.key])
+            if work:
+                result.assignments[day].append((job, work))
+            left -= work
+            remaining[job.key] -= work
+            if remaining[job.key]:
+                break  # the day is full; continue this task tomorrow
+            heapq.heappop(heap)
+            result.finish[job.key] = day
+            for dep in dependents.get(job.key, ()):
+                waiting[dep] -= 1
+                if not waiting[dep]:
+                    d = by_key[dep]
+                    heapq.heappush(heap, (d.due or no_due, seq, d))
+                    seq += 1
+        result.load[day] = capacity - left
+        if not heap:
+            break
+
+    last = days[-1] if days else date.min
+    for j in jobs:
+        done = result.finish.get(j.key)
+        if done is None:
+            result.unscheduled.append(j)
+            if j.due is not None and j.due <= last:
+                result.late.append((j, None))
+        elif j.due is not None and done > j.due:
+            result.late.append((j, done))
+    result.late.sort(key=lambda x: (x[0].due, x[1] or date.max))
+    return result
@@ -1,6 +1,23 @@
 from datetime import datetime, timezone
 from typing import List, Dict, Optional
 
+from decidrx.records import Task
+
+
+def _when(item, key: str) -> Optional[datetime]:
+    """`deadline`/`created_at` of a Task or dict as an aware datetime (None if missing or invalid)."""
+    if isinstance(item, Task):
+        # decoded once per record
+        return item.deadline_dt if key == "deadline" else item.created_dt
+    value = item.get(key)
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except Exception:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
 
 def aggregate_task_for_scoring(task: Dict, children: List[Dict]) -> Dict:
     """Return an aggregated task dict that combines parent and its children for scoring.
@@ -16,19 +33,17 @@ def aggregate_task_for_scoring(task: Dict, children: List[Dict]) -> Dict:
     deadlines = []
     createds = []
 
-    if agg.get("deadline"):
-        deadlines.append(agg["deadline"])
-    if agg.get("created_at"):
-        createds.append(agg["created_at"])
-
+    for item in [task, *children]:
+        when = _when(item, "deadline")
+        if when is not None:
+            deadlines.append(when)
+        when = _when(item, "created_at")
+        if when is not None:
+            createds.append(when)
     for c in children:
         total_duration += c.get("duration") or 0
         total_reward += c.get("reward") or 0
         total_penalty += c.get("penalty") or 0
-        if c.get("deadline"):
-            deadlines.append(c["deadline"])
-        if c.get("created_at"):
-            createds.append(c["created_at"])
 
     agg["duration"] = total_duration
     agg["reward"] = total_reward
@@ -55,40 +70,10 @@ def aggregate_task_for_scoring(task: Dict, children: List[Dict]) -> Dict:
             quick_sum += 1.0 / max(cd, 1)
     agg["_quick_win"] = quick_sum
 
-    # pick earliest deadline (minimum datetime)
-    earliest_deadline: Optional[str] = None
-    if deadlines:
-        try:
-            parsed = []
-            for d in deadlines:
-                try:
-                    parsed.append(datetime.fromisoformat(d))
-                except Exception:
-                    pass
-            if parsed:
-                earliest = min(parsed)
-                earliest_deadline = earliest.isoformat()
-        except Exception:
-            earliest_deadline = None
-    agg["deadline"] = earliest_deadline
-
-    # pick earliest created_at
-    earliest_created: Optional[str] = None
+    # pick earliest deadline and created_at
+    agg["deadline"] = min(deadlines).isoformat() if deadlines else None
     if createds:
-        try:
-            parsed = []
-            for d in createds:
-                try:
-                    parsed.append(datetime.fromisoformat(d))
-                except Exception:
-                    pass
-            if parsed:
-                earliest = min(parsed)
-                earliest_created = earliest.isoformat()
-        except Exception:
-            earliest_created = None
-    if earliest_created:
-        agg["created_at"] = earliest_created
+        agg["created_at"] = min(createds).isoformat()
 
     # marker so callers can detect aggregated value if desired
     agg["_aggregated"] = True
@@ -98,25 +83,26 @@ def aggregate_task_for_scoring(task: Dict, children: List[Dict]) -> Dict:
 def score_task(task: dict, now: datetime = None) -> float:
     """Calculate score according to PRD v0 formula.
 
-    task: expects keys 'deadline' (ISO string or None), 'duration' (int), 'reward', 'penalty', 'created_at' (ISO string)
+    task: a `records.Task` or a dict with keys 'deadline' (ISO string or None), 'duration' (int), 'reward', 'penalty', 'created_at' (ISO string)
     """
     now = now or datetime.now(timezone.utc)
 
-    # parse times
-    deadline = None
-    if task.get("deadline"):
-        try:
-            deadline = datetime.fromisoformat(task["deadline"]).replace(tzinfo=timezone.utc)
-        except Exception:
-            deadline = None
-    created = None
-    if task.get("created_at"):
-        try:
-            created = datetime.fromisoformat(task["created_at"]).replace(tzinfo=timezone.utc)
-        except Exception:
-            created = now
+    if isinstance(task, Task):
+        # attribute access and cached timestamps instead of mapping lookups
+        deadline = task.deadline_dt
+        created = task.created_dt or now
+        value = (task.reward or 0) + (task.penalty or 0)
+        quick_win = 1.0 / max(task.duration or 1, 1)
     else:
-        created = now
+        deadline = _when(task, "deadline")
+        created = _when(task, "created_at") or now
+        value = (task.get("reward", 0) or 0) + (task.get("penalty", 0) or 0)
+        duration = task.get("duration") or 1
+        # allow callers to inject a precomputed quick_win (sum of per-item 1/duration), used for aggregated parents
+        if task.get("_quick_win") is not None:
+            quick_win = float(task["_quick_win"])
+        else:
+            quick_win = 1.0 / max(duration, 1)
 
     # hours_left
     if deadline:
@@ -125,13 +111,6 @@ def score_task(task: dict, now: datetime = None) -> float:
         hours_left = 24 * 365  # effectively very low urgency
 
     urgency = 1.0 / max(hours_left, 1.0)
-    value = (task.get("reward", 0) or 0) + (task.get("penalty", 0) or 0)
-    duration = task.get("duration") or 1
-    # allow callers to inject a precomputed quick_win (sum of per-item 1/duration), used for aggregated parents
-    if task.get("_quick_win") is not None:
-        quick_win = float(task["_quick_win"])
-    else:
-        quick_win = 1.0 / max(duration, 1)
     age = ((now - created).total_seconds() / 3600.0) / 24.0
 
     score = urgency * value + quick_win + age
@@ -0,0 +1,308 @@
+"""Two-way sync between copies of a DecidRX database, driven by the change feed.
+
+Every task has a global id (``sync_ids.uid``) that all copies share, and triggers
+stamp each field an edit changes (``sync_stamps``). A sync sends only the tasks
+named in ``changes`` rows newer than the peer's watermark: their current values,
+per-field stamps, tags and prerequisites, plus the uids of deleted tasks. The
+receiver keeps, field by field, whichever side has the later stamp (last writer
+wins); the tag set and the prerequisite set count as one field each. A deletion
+wins over edits made elsewhere. Only changed rows are read and written, so the
+cost of a sync follows the number of changes, not the size of the database.
+
+Two transports:
+
+* :func:`sync_databases` merges two database files directly (``decidrx sync other.db``).
+* :func:`sync_directory` exchanges batch files through a shared directory (a synced
+  folder, a USB stick): each database writes its own changes to ``<dir>/<site>/`` and
+  applies the batches of every other site that it has not applied yet.
+
+Blocked days are not synced.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from decidrx.db import SYNC_FIELDS, SYNC_SETS, Database
+
+# fields holding task ids; batches carry the uid of the referenced task instead
+REF_FIELDS = ("parent_id", "series_id")
+SET_FIELDS = tuple(SYNC_SETS.values())
+# keep IN lists under the host parameter limit of older SQLite builds
+CHUNK = 900
+
+
+def _select_in(db: Database, sql: str, ids: Iterable) -> list:
+    """Run `sql`, whose `{marks}` is an IN list, over `ids` in chunks."""
+    ids = list(ids)
+    rows = []
+    for i in range(0, len(ids), CHUNK):
+        part = ids[i:i + CHUNK]
+        rows.extend(db.conn.execute(sql.format(marks=",".join("?" * len(part))), part).fetchall())
+    return rows
+
+
+def site_id(db: Database) -> str:
+    """The id this database puts in its stamps and batches."""
+    return db.conn.execute("SELECT value FROM sync_meta WHERE key = 'site'").fetchone()[0]
+
+
+def claim_site(db: Database) -> str:
+    """`site_id`, replaced by a fresh one first when the file is a copy made after its site was set."""
+    path = os.path.abspath(db.path)
+    recorded = db.conn.execute("SELECT value FROM sync_meta WHERE key = 'path'").fetchone()
+    if recorded is None or recorded[0] != path:
+        db.conn.execute("UPDATE sync_meta SET value = lower(hex(randomblob(8))) WHERE key = 'site'")
+        db.conn.execute("INSERT OR REPLACE INTO sync_meta VALUES ('path', ?)", (path,))
+        db.commit()
+    return site_id(db)
+
+
+def reset_site(db: Database) -> str:
+    """Give `db` a fresh site id and forget every peer's watermarks; returns the new id.
+
+    For a database whose contents were replaced (see `backup.restore`): peers that
+    synced with it before would otherwise take it to hold changes it no longer has.
+    Under a new id every next sync is a full first exchange.
+    """
+    db.conn.execute("UPDATE sync_meta SET value = lower(hex(randomblob(8))) WHERE key = 'site'")
+    db.conn.execute("INSERT OR REPLACE INTO sync_meta VALUES ('path', ?)", (os.path.abspath(db.path),))
+    db.conn.execute("DELETE FROM sync_peers")
+    db.commit()
+    return site_id(db)
+
+
+def watermark(db: Database, peer: str) -> Tuple[int, int]:
+    """(sent, received) for `peer`: our last change seq it has, and the last batch of its we applied."""
+    row = db.conn.execute("SELECT sent, received FROM sync_peers WHERE peer = ?", (peer,)).fetchone()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def _set_watermark(db: Database, peer: str, column: str, value: int):
+    db.conn.execute("INSERT OR IGNORE INTO sync_peers (peer) VALUES (?)", (peer,))
+    db.conn.execute(f"UPDATE sync_peers SET {column} = ? WHERE peer = ?", (value, peer))
+    db.commit()
+
+
+def export_changes(db: Database, since: int = 0, peer: Optional[str] = None) -> dict:
+    """A batch with the current state of every task changed after change seq `since`.
+
+    Without `peer` only local edits are included. With it, changes this database got
+    from other sites are relayed too, except those that came from `peer` itself. A first
+    sync (`since` 0) or one from behind `Database.changes_horizon` sends every task and
+    tombstone instead, whatever their origin; applying what a site already has is a no-op.
+    """
+    seq = db.last_change()
+    full = not since or since < db.changes_horizon()
+    if full:
+        # a first sync, or the rows after `since` were compacted away: send everything, the
+        # merge keeps what is newer
+        ids = {r[0] for r in db.conn.execute("SELECT id FROM tasks")}
+        deleted = [r[0] for r in db.conn.execute("SELECT seq FROM sync_tombstones")]
+    else:
+        rows = db.conn.execute(
+            "SELECT seq, tbl, row_id, op FROM changes WHERE seq > ? AND seq <= ? AND tbl NOT IN ('blocked_days', 'blocked_rules')"
+            " AND (origin IS NULL OR (? IS NOT NULL AND origin != ?))",
+            (since, seq, peer, peer),
+        ).fetchall()
+        ids = {r["row_id"] for r in rows if not (r["tbl"] == "tasks" and r["op"] == "delete")}
+        deleted = [r["seq"] for r in rows if r["tbl"] == "tasks" and r["op"] == "delete"]
+
+    tasks = _select_in(db, "SELECT * FROM tasks WHERE id IN ({marks}) ORDER BY id", ids)
+    ids = [t["id"] for t in tasks]
+    stamps: Dict[int, dict] = {}
+    for task_id, field, stamp in _select_in(db, "SELECT task_id, field, stamp FROM sync_stamps WHERE task_id IN ({marks})", ids):
+        stamps.setdefault(task_id, {})[field] = stamp
+    tags: Dict[int, list] = {}
+    for task_id, name in _select_in(db, "SELECT tt.task_id, g.name FROM task_tags tt JOIN tags g ON g.id = tt.tag_id"
+                                        " WHERE tt.task_id IN ({marks}) ORDER BY g.name", ids):
+        tags.setdefault(task_id, []).append(name)
+    deps: Dict[int, list] = {}
+    for task_id, depends_on in _select_in(db, "SELECT task_id, depends_on FROM task_deps WHERE task_id IN ({marks})", ids):
+        deps.setdefault(task_id, []).append(depends_on)
+    referenced = set(ids) | {t[f] for t in tasks for f in REF_FIELDS if t[f] is not None}
+    referenced.update(d for ds in deps.values() for d in ds)
+    uids = dict(_select_in(db, "SELECT task_id, uid FROM sync_ids WHERE task_id IN ({marks})", referenced))
+
+    records = []
+    for t in tasks:
+        fields = {f: t[f] for f in SYNC_FIELDS}
+        for f in REF_FIELDS:
+            fields[f] = uids.get(fields[f])
+        records.append({
+            "uid": uids[t["id"]],
+            "created_at": t["created_at"],
+            "fields": fields,
+            "stamps": stamps.get(t["id"], {}),
+            "tags": tags.get(t["id"], []),
+            "deps": sorted(uids[d] for d in deps.get(t["id"], []) if d in uids),
+        })
+    gone = [r[0] for r in _select_in(db, "SELECT uid FROM sync_tombstones WHERE seq IN ({marks})", deleted)]
+    return {"site": site_id(db), "seq": seq, "tasks": records, "deleted": gone, "full": full}
+
+
+def apply_changes(db: Database, batch: dict) -> Dict[str, int]:
+    """Merge a batch from `export_changes` into `db` in one transaction.
+
+    Returns the number of tasks created, updated and deleted. Applying a batch twice
+    changes nothing the second time. The feed rows the merge writes are tagged with
+    the batch's site, so they are not sent back to it. A full batch does not create a
+    task last edited before the newest deletion `Database.prune_tombstones` forgot:
+    it may be one of those deletions.
+    """
+    counts = {"created": 0, "updated": 0, "deleted": 0}
+    records = batch.get("tasks", [])
+    wanted = {r["uid"] for r in records} | set(batch.get("deleted", []))
+    for r in records:
+        wanted.update(u for u in (r["fields"][f] for f in REF_FIELDS) if u)
+        wanted.update(r["deps"])
+    with db.transaction():
+        before = db.last_change()
+        local = {uid: tid for tid, uid in _select_in(db, "SELECT task_id, uid FROM sync_ids WHERE uid IN ({marks})", wanted)}
+        # deleted here: a deletion beats the other side's edits
+        gone = {r[0] for r in _select_in(db, "SELECT uid FROM sync_tombstones WHERE uid IN ({marks})", [r["uid"] for r in records])}
+        pruned = db.conn.execute("SELECT value FROM sync_meta WHERE key = 'pruned_deletions'").fetchone()
+        if pruned and batch.get("full"):
+            gone.update(r["uid"] for r in records if r["uid"] not in local and _last_edit(r) <= pruned[0][:19])
+        mine: Dict[int, dict] = {}
+        for task_id, field, stamp in _select_in(db, "SELECT task_id, field, stamp FROM sync_stamps WHERE task_id IN ({marks})",
+                                                [local[r["uid"]] for r in records if r["uid"] in local]):
+            mine.setdefault(task_id, {})[field] = stamp
+
+        plan = []
+        for rec in records:
+            if rec["uid"] in gone:
+                continue
+            task_id = local.get(rec["uid"])
+            if task_id is None:
+                task_id = local[rec["uid"]] = _insert(db, rec)
+                won = list(SYNC_FIELDS + SET_FIELDS)
+                counts["created"] += 1
+            else:
+                ours = mine.get(task_id, {})
+                won = [f for f in SYNC_FIELDS + SET_FIELDS if rec["stamps"].get(f, "") > ours.get(f, "")]
+                if not won:
+                    continue
+                counts["updated"] += 1
+                _update(db, task_id, rec, won)
+            plan.append((task_id, rec, won))
+        # second pass: references may point at tasks created above
+        for task_id, rec, won in plan:
+            _link(db, task_id, rec, won, local)
+        # the triggers stamped what was just written with our clock; restore the winning stamps
+        for task_id, rec, won in plan:
+            db.conn.execute(f"DELETE FROM sync_stamps WHERE task_id = ? AND field IN ({','.join('?' * len(won))})", (task_id, *won))
+            db.conn.executemany("INSERT INTO sync_stamps VALUES (?, ?, ?)",
+                                [(task_id, f, rec["stamps"][f]) for f in won if f in rec["stamps"]])
+
+        for uid in batch.get("deleted", []):
+            task_id = local.get(uid)
+            if task_id is None or db.get_task(task_id) is None:
+                continue
+            # subtasks added here since are kept, as top-level tasks
+            db.conn.execute("UPDATE tasks SET parent_id = NULL WHERE parent_id = ?", (task_id,))
+            db.delete_task(task_id)
+            counts["deleted"] += 1
+        db.conn.execute("UPDATE changes SET origin = ? WHERE seq > ?", (batch["site"], before))
+    return counts
+
+
+def _last_edit(rec: dict) -> str:
+    """The UTC time, to the second, of the newest edit in a batch record."""
+    # stamps are "<YYYY-MM-DDTHH:MM:SS.fffZ> <site>", created_at an ISO UTC time
+    return max([(rec["created_at"] or "")[:19]] + [s[:19] for s in rec["stamps"].values()])
+
+
+def _insert(db: Database, rec: dict) -> int:
+    cols = ["created_at"] + [f for f in SYNC_FIELDS if f not in REF_FIELDS]
+    vals = [rec["created_at"]] + [rec["fields"][f] for f in cols[1:]]
+    cur = db.conn.execute(f"INSERT INTO tasks ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", vals)
+    db.conn.execute("UPDATE sync_ids SET uid = ? WHERE task_id = ?", (rec["uid"], cur.lastrowid))
+    if rec["fields"]["completed"]:
+        db.conn.execute("INSERT INTO completions (task_id, completed_at) VALUES (?, ?)", (cur.lastrowid, rec["fields"]["completed_at"]))
+    return cur.lastrowid
+
+
+def _update(db: Database, task_id: int, rec: dict, won: List[str]):
+    plain = [f for f in won if f in SYNC_FIELDS and f not in REF_FIELDS]
+    if not plain:
+        return
+    if "completed" in plain and rec["fields"]["completed"]:
+        db.conn.execute("INSERT INTO completions (task_id, completed_at) SELECT id, ? FROM tasks WHERE id = ? AND completed = 0",
+                        (rec["fields"]["completed_at"], task_id))
+    db.conn.execute(f"UPDATE tasks SET {', '.join(f + ' = ?' for f in plain)} WHERE id = ?",
+                    [rec["fields"][f] for f in plain] + [task_id])
+
+
+def _link(db: Database, task_id: int, rec: dict, won: List[str], local: Dict[str, int]):
+    """Apply the winning reference and set fields; drops from `won` a parent that would form a cycle."""
+    for f in REF_FIELDS:
+        if f not in won:
+            continue
+        target = local.get(rec["fields"][f]) if rec["fields"][f] else None
+        if f == "parent_id" and target is not None and (target == task_id or target in db.get_descendant_ids([task_id])):
+            # both sides moved tasks under each other: keep ours
+            won.remove(f)
+            continue
+        db.conn.execute(f"UPDATE tasks SET {f} = ? WHERE id = ? AND {f} IS NOT ?", (target, task_id, target))
+    if "tags" in won:
+        db.conn.execute("DELETE FROM task_tags WHERE task_id = ?", (task_id,))
+        if rec["tags"]:
+            db.add_tags(task_id, rec["tags"])
+    if "deps" in won:
+        db.conn.execute("DELETE FROM task_deps WHERE task_id = ?", (task_id,))
+        for uid in rec["deps"]:
+            if uid in local:
+                try:
+                    db.add_dependency(task_id, local[uid])
+                except ValueError:
+                    pass  # would close a cycle with edges added here
+
+
+def sync_databases(db: Database, other: Database) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Two-way sync of two databases; returns the counts applied to `other` and to `db`."""
+    site, peer = claim_site(db), claim_site(other)
+    ours = export_changes(db, watermark(db, peer)[0], peer=peer)
+    theirs = export_changes(other, watermark(other, site)[0], peer=site)
+    pulled = apply_changes(db, theirs)
+    pushed = apply_changes(other, ours)
+    _set_watermark(db, peer, "sent", ours["seq"])
+    _set_watermark(other, site, "sent", theirs["seq"])
+    return pushed, pulled
+
+
+def sync_directory(db: Database, path: str) -> Tuple[int, Dict[str, int]]:
+    """Publish our changes to `path` and apply the other sites' new batches from it.
+
+    Returns the number of tasks written (changed or deleted) and the counts applied here.
+    """
+    site = claim_site(db)
+    outbox = os.path.join(path, site)
+    os.makedirs(outbox, exist_ok=True)
+    key = "dir:" + os.path.abspath(path)
+    batch = export_changes(db, watermark(db, key)[0])
+    sent = len(batch["tasks"]) + len(batch["deleted"])
+    if sent:
+        target = os.path.join(outbox, f"{batch['seq']:012d}.json")
+        with open(target + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(batch, f)
+        # readers never see a half-written batch
+        os.replace(target + ".tmp", target)
+    _set_watermark(db, key, "sent", batch["seq"])
+
+    pulled = {"created": 0, "updated": 0, "deleted": 0}
+    for name in sorted(os.listdir(path)):
+        inbox = os.path.join(path, name)
+        if name == site or not os.path.isdir(inbox):
+            continue
+        done = watermark(db, name)[1]
+        for fname in sorted(os.listdir(inbox)):
+            stem, ext = os.path.splitext(fname)
+            if ext != ".json" or not stem.isdigit() or int(stem) <= done:
+                continue
+            with open(os.path.join(inbox, fname), encoding="utf-8") as f:
+                incoming = json.load(f)
+            with db.transaction():
+                for k, n in apply_changes(db, incoming).items():
+                    pulled[k] += n
+                _set_watermark(db, name, "received", int(stem))
+    return sent, pulled
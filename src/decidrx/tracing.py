@@ -0,0 +1,163 @@
+"""SQL statement tracing behind the global ``--trace-sql`` flag.
+
+Statements are counted with ``sqlite3.Connection.set_trace_callback``. When a
+tracer is active while a ``Database`` is opened, the connection also uses a
+cursor subclass that times ``execute`` and the following fetches, attributing
+the time to the statement last reported by the trace callback.
+"""
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+_active: Optional["SQLTracer"] = None
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+# transaction control and the idempotent schema setup every `Database` runs on open;
+# not counted as queries for budgets
+_UNCOUNTED_PREFIXES = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "CREATE ", "DROP ", "PRAGMA ")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and replace literals with `?` so equal statements group together."""
+    s = _STRING_RE.sub("?", sql)
+    s = _NUMBER_RE.sub("?", s)
+    return _SPACE_RE.sub(" ", s).strip()
+
+
+class SQLTracer:
+    """Counts and times statements per normalized SQL text."""
+
+    def __init__(self):
+        # normalized sql -> [count, seconds]
+        self.statements: Dict[str, List[float]] = {}
+        self.total = 0
+        self.queries = 0
+        self._last: Optional[List[float]] = None
+        self._last_sql: Optional[str] = None
+
+    def callback(self, sql: str):
+        # SQLite reports a statement again at the start of each trigger subprogram it runs
+        # (e.g. the `changes` feed), with the same expanded text
+        if sql == self._last_sql:
+            return
+        self._last_sql = sql
+        key = normalize_sql(sql)
+        rec = self.statements.get(key)
+        if rec is None:
+            rec = self.statements[key] = [0, 0.0]
+        rec[0] += 1
+        self.total += 1
+        if not key.upper().startswith(_UNCOUNTED_PREFIXES):
+            self.queries += 1
+        self._last = rec
+
+    def add_time(self, seconds: float):
+        if self._last is not None:
+            self._last[1] += seconds
+
+    def attach(self, conn: sqlite3.Connection):
+        conn.set_trace_callback(self.callback)
+        if isinstance(conn, TracedConnection):
+            conn.tracer = self
+
+    def report(self, out=None, limit: int = 15):
+        """Print statement counts and timings, most frequent first (stderr by default)."""
+        from rich.table import Table
+        from decidrx.ui import err_console
+
+        out = out or err_console
+        total_ms = sum(r[1] for r in self.statements.values()) * 1000
+        table = Table(title=f"SQL: {self.queries} queries, {self.total} statements, {total_ms:.2f} ms",
+                      title_justify="left", box=None, pad_edge=False)
+        table.add_column("count", justify="right", no_wrap=True, min_width=5)
+        table.add_column("ms", justify="right", no_wrap=True, min_width=7)
+        table.add_column("statement", overflow="ellipsis", no_wrap=True)
+        ranked = sorted(self.statements.items(), key=lambda kv: (kv[1][0], kv[1][1]), reverse=True)
+        for sql, (count, seconds) in ranked[:limit]:
+            table.add_row(str(int(count)), f"{seconds * 1000:.2f}", sql)
+        if len(ranked) > limit:
+            table.add_row("", "", f"[dim]... {len(ranked) - limit} more[/dim]")
+        out.print(table)
+
+
+class TracedCursor(sqlite3.Cursor):
+    def _timed(self, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            tracer = self.connection.tracer
+            if tracer is not None:
+                tracer.add_time(time.perf_counter() - t0)
+
+    def execute(self, *args):
+        return self._timed(super().execute, *args)
+
+    def executemany(self, *args):
+        return self._timed(super().executemany, *args)
+
+    def fetchone(self):
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+
+class TracedConnection(sqlite3.Connection):
+    tracer: Optional[SQLTracer] = None
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+
+def active() -> Optional[SQLTracer]:
+    return _active
+
+
+def connection_factory():
+    """Connection class `Database` should use: timed cursors only while tracing."""
+    return TracedConnection if _active is not None else sqlite3.Connection
+
+
+@contextmanager
+def trace_sql(*dbs):
+    """Activate a tracer for the enclosed block.
+
+    Every ``Database`` opened inside the block is traced automatically;
+    already-open databases can be passed in to be traced as well.
+    """
+    global _active
+    tracer = SQLTracer()
+    prev = _active
+    _active = tracer
+    for db in dbs:
+        tracer.attach(db.conn)
+    try:
+        yield tracer
+    finally:
+        _active = prev
+        for db in dbs:
+            db.conn.set_trace_callback(prev.callback if prev else None)
+
+
+@contextmanager
+def max_queries(limit: int, *dbs):
+    """Fail with AssertionError if the block runs more than `limit` queries.
+
+    Transaction control (BEGIN/COMMIT/...) and schema setup (CREATE/DROP/PRAGMA)
+    are not counted. Intended for tests
+    guarding against per-row query regressions.
+    """
+    with trace_sql(*dbs) as tracer:
+        yield tracer
+    if tracer.queries > limit:
+        lines = [f"{int(c):5d}  {sql}" for sql, (c, _) in
+                 sorted(tracer.statements.items(), key=lambda kv: kv[1][0], reverse=True)]
+        raise AssertionError(f"expected at most {limit} queries, ran {tracer.queries}:\n" + "\n".join(lines))
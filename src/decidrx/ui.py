@@ -1,3 +1,5 @@
 from rich.console import Console
 
 console = Console()
+# diagnostics (profiling, tracing) go to stderr so they never mix with command output
+err_console = Console(stderr=True)
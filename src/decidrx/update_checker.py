@@ -1,34 +1,225 @@
-import urllib.request
-import urllib.error
+"""Upstream release check with strict timeouts and an on-disk cache.
+
+The latest release tag is cached (with its ETag) for `CACHE_TTL` seconds, so
+most invocations never touch the network, and refreshes use If-None-Match.
+`decidrx update` runs the request on a worker thread that it joins with a hard
+deadline. The opportunistic check around other commands never waits: it starts
+a daemon thread and leaves it behind at exit. Failed attempts are recorded as
+well, so an offline machine retries once per `CACHE_TTL`, not on every command.
+`urllib` is only imported on the worker thread so command startup stays fast.
+"""
 import json
+import os
+import re
+import threading
+import time
+from typing import Optional, Tuple
+
 from . import __version__
 
-def check_for_updates():
+RELEASES_URL = "https://api.github.com/repos/amanasci/DecidRX_py/releases/latest"
+DEFAULT_TIMEOUT = 3.0
+CACHE_TTL = 24 * 3600
+
+URL_ENV = "DECIDRX_UPDATE_URL"
+CACHE_ENV = "DECIDRX_UPDATE_CACHE"
+DISABLE_ENV = "DECIDRX_NO_UPDATE_CHECK"
+
+_VERSION_RE = re.compile(r"^\s*v?(\d+(?:\.\d+)*)(.*)$")
+
+
+def parse_version(v: str) -> Tuple:
+    """Return a sortable key for a version string like 'v0.10.1' or '1.2.0rc1'.
+
+    Numeric components compare as integers (so 0.10 > 0.9), trailing zeros are
+    ignored (1.0 == 1.0.0) and a pre-release suffix sorts before the release.
+    """
+    m = _VERSION_RE.match(v or "")
+    if not m:
+        return ((), 0, v or "")
+    nums = [int(p) for p in m.group(1).split(".")]
+    while len(nums) > 1 and nums[-1] == 0:
+        nums.pop()
+    suffix = m.group(2).strip().lstrip("-.")
+    return (tuple(nums), 0 if suffix else 1, suffix)
+
+
+def is_newer(latest: str, current: str) -> bool:
+    return parse_version(latest) > parse_version(current)
+
+
+def default_cache_path() -> str:
+    return os.environ.get(CACHE_ENV) or os.path.expanduser("~/.cache/decidrx/update.json")
+
+
+def _load_cache(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path: str, data: dict):
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _checked_recently(cache: dict, ttl: float, now: float) -> bool:
+    """True when the last attempt, successful or not, is less than `ttl` seconds old."""
+    return now - cache.get("checked_at", 0) < ttl
+
+
+def _cache_fresh(cache: dict, ttl: float, now: float) -> bool:
+    return bool(cache.get("tag")) and _checked_recently(cache, ttl, now)
+
+
+def _record_failure(cache_path: str, cache: dict, url: str, now: float):
+    """Stamp the attempt in the cache, keeping any tag known for `url`."""
+    cache = dict(cache) if cache.get("url") == url else {"url": url}
+    cache["checked_at"] = now
+    try:
+        _save_cache(cache_path, cache)
+    except OSError:
+        pass
+
+
+def fetch_latest(url: str, cache_path: str, timeout: float = DEFAULT_TIMEOUT, ttl: float = CACHE_TTL, force: bool = False) -> str:
+    """Return the latest release tag, from cache when fresh, else via a conditional request.
+
+    Raises urllib errors (HTTPError, URLError, timeouts) on failure, after recording
+    the attempt so background checks do not retry before `ttl` has passed.
+    """
+    import urllib.error
+    import urllib.request
+
+    now = time.time()
+    cache = _load_cache(cache_path)
+    if not force and cache.get("url") == url and _cache_fresh(cache, ttl, now):
+        return cache["tag"]
+
+    headers = {"Accept": "application/vnd.github+json", "User-Agent": f"decidrx/{__version__}"}
+    if cache.get("url") == url and cache.get("etag") and cache.get("tag"):
+        headers["If-None-Match"] = cache["etag"]
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            data = json.loads(response.read().decode())
+            tag = data.get("tag_name")
+            if not tag:
+                raise ValueError("Release has no tag_name")
+            cache = {"url": url, "tag": tag, "etag": response.headers.get("ETag"), "checked_at": now}
+    except urllib.error.HTTPError as e:
+        if e.code != 304:
+            _record_failure(cache_path, cache, url, now)
+            raise
+        # not modified: the cached tag is still current
+        cache["checked_at"] = now
+    except Exception:
+        _record_failure(cache_path, cache, url, now)
+        raise
+    try:
+        _save_cache(cache_path, cache)
+    except OSError:
+        pass
+    return cache["tag"]
+
+
+def _run_with_deadline(fn, timeout: float):
+    """Run `fn` on a daemon thread; return (done, result, error) after at most `timeout` seconds."""
+    box = {}
+
+    def target():
+        try:
+            box["result"] = fn()
+        except BaseException as e:  # reported to the caller
+            box["error"] = e
+
+    t = threading.Thread(target=target, name="decidrx-update-check", daemon=True)
+    t.start()
+    t.join(timeout)
+    if t.is_alive():
+        return False, None, None
+    return True, box.get("result"), box.get("error")
+
+
+def check_for_updates(url: Optional[str] = None, cache_path: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT, force: bool = False):
     """
     Checks for updates from the upstream GitHub repository.
     Returns:
         tuple: (is_update_available, latest_version, current_version)
+        is_update_available is None on error, with latest_version holding the message.
     """
-    repo_url = "https://api.github.com/repos/amanasci/DecidRX_py/releases/latest"
-    try:
-        with urllib.request.urlopen(repo_url) as response:
-            if response.status == 200:
-                data = json.loads(response.read().decode())
-                latest_version = data.get("tag_name")
-                if latest_version:
-                    # Remove 'v' prefix if present for comparison
-                    clean_latest = latest_version.lstrip("v")
-                    clean_current = __version__.lstrip("v")
-                    
-                    if clean_latest > clean_current:
-                        return True, latest_version, __version__
-                    else:
-                        return False, latest_version, __version__
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
+    import urllib.error
+
+    url = url or os.environ.get(URL_ENV) or RELEASES_URL
+    cache_path = cache_path or default_cache_path()
+    done, latest_version, err = _run_with_deadline(
+        lambda: fetch_latest(url, cache_path, timeout=timeout, force=force), timeout
+    )
+    # the socket timeout and the join deadline are equal, so either may fire first
+    if isinstance(err, urllib.error.URLError) and isinstance(err.reason, TimeoutError):
+        err = err.reason
+    if not done or isinstance(err, TimeoutError):
+        return None, f"Timed out after {timeout:g}s", __version__
+    if isinstance(err, urllib.error.HTTPError):
+        if err.code == 404:
             return None, "No releases found on upstream repository", __version__
-        return None, f"HTTP Error {e.code}: {e.reason}", __version__
-    except Exception as e:
-        return None, str(e), __version__
-    
-    return None, "Unknown error", __version__
+        return None, f"HTTP Error {err.code}: {err.reason}", __version__
+    if err is not None:
+        return None, str(err), __version__
+    return is_newer(latest_version, __version__), latest_version, __version__
+
+
+class StartupCheck:
+    """Opportunistic check run around a normal command.
+
+    Uses only the cache to decide whether to show a notice. When the last attempt
+    is older than `ttl` it refreshes the cache on a daemon thread that nobody waits
+    for: a refresh still running when the command ends is simply abandoned.
+    """
+
+    def __init__(self, url: Optional[str] = None, cache_path: Optional[str] = None, ttl: float = CACHE_TTL):
+        self.url = url or os.environ.get(URL_ENV) or RELEASES_URL
+        self.cache_path = cache_path or default_cache_path()
+        self.ttl = ttl
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> Optional[str]:
+        """Start a refresh if needed; return a newer cached tag to announce, if any."""
+        cache = _load_cache(self.cache_path)
+        if cache.get("url") != self.url or not _checked_recently(cache, self.ttl, time.time()):
+            self.thread = threading.Thread(target=self._refresh, name="decidrx-update-check", daemon=True)
+            self.thread.start()
+        tag = cache.get("tag")
+        if tag and cache.get("url") == self.url and is_newer(tag, __version__):
+            return tag
+        return None
+
+    def _refresh(self):
+        try:
+            fetch_latest(self.url, self.cache_path, timeout=DEFAULT_TIMEOUT, ttl=self.ttl)
+        except Exception:
+            pass
+
+
+def startup_check() -> Optional[StartupCheck]:
+    """Begin the opportunistic check unless disabled via DECIDRX_NO_UPDATE_CHECK."""
+    if os.environ.get(DISABLE_ENV):
+        return None
+    check = StartupCheck()
+    try:
+        tag = check.start()
+    except Exception:
+        return None
+    if tag:
+        from .ui import err_console
+
+        err_console.print(f"[dim]decidrx {tag} is available (current: {__version__}). Run `decidrx update` for details.[/dim]")
+    return check
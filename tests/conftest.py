@@ -1,6 +1,12 @@
+import os
 import sys
 from pathlib import Path
 
+import pytest
+
+# Never reach the network from the opportunistic startup update check
+os.environ.setdefault("DECIDRX_NO_UPDATE_CHECK", "1")
+
 # Ensure local `src` is preferred over any installed package for all tests
 ROOT = Path(__file__).resolve().parents[1]
 SRC = str(ROOT / "src")
@@ -10,3 +16,21 @@ if SRC not in sys.path:
 # tests use the local package from `src`.
 if "decidrx" in sys.modules:
     del sys.modules["decidrx"]
+
+
+@pytest.fixture
+def printed(monkeypatch):
+    """Plain text of each `console.print` call a command makes, in order."""
+    from rich.console import Console
+
+    from decidrx.ui import console
+
+    printed = []
+
+    def fake_print(obj, *args, **kwargs):
+        c = Console(record=True, width=200)
+        c.print(obj)
+        printed.append(c.export_text())
+
+    monkeypatch.setattr(console, "print", fake_print)
+    return printed
@@ -0,0 +1,88 @@
+from datetime import date, datetime, timedelta, timezone
+
+from decidrx.api import Session
+from decidrx.db import Database
+
+NOW = datetime(2030, 5, 1, 8, tzinfo=timezone.utc)
+
+
+def _at(day, hour=12):
+    return datetime(2030, 5, day, hour, tzinfo=timezone.utc)
+
+
+def test_agenda_merges_tasks_occurrences_and_blocked_days(tmp_path):
+    db = Database(str(tmp_path / "agenda.db"))
+    small = db.add_task("Small", _at(3), duration=5, reward=1)
+    big = db.add_task("Big", _at(3, 15), duration=60, reward=9, penalty=5)
+    done = db.add_task("Done already", _at(4), duration=10)
+    db.mark_done(done)
+    water = db.add_task("Water", _at(2, 7), recur="every 3 days")
+    db.add_blocked_day("2030-05-04", reason="holiday")
+    db.add_blocked_rule("daily", "2030-05-06", "2030-05-07", reason="trip")
+    db.add_task("Outside", _at(20))
+
+    s = Session(db=db)
+    days = list(s.agenda(date(2030, 5, 1), date(2030, 5, 9), use_local=False, now=NOW))
+    assert [(d.day.day, [r.task.id for r in d.ranked], d.blocked) for d in days] == [
+        (2, [water], False),
+        (3, [big, small], False),  # by score, not by time of day
+        (4, [], True),
+        (5, [water], False),
+        (6, [], True),
+        (7, [], True),
+        (8, [water], False),
+    ]
+    assert days[2].reason == "holiday" and days[4].reason == "trip"
+    assert days[0].upcoming == set() and days[3].upcoming == {water}
+    assert days[3].ranked[0].task.deadline_dt == _at(5, 7)
+
+    with_done = list(s.agenda(date(2030, 5, 4), date(2030, 5, 5), include_completed=True, use_local=False, now=NOW))
+    assert [(d.blocked, [r.task.id for r in d.ranked]) for d in with_done] == [(True, [done])]
+    assert [d.day.day for d in s.agenda(date(2030, 5, 1), date(2030, 5, 9), where="reward >= 5", use_local=False)] == [3, 4, 6, 7]
+
+
+def test_agenda_reads_the_range_lazily(tmp_path):
+    db = Database(str(tmp_path / "stream.db"))
+    with db.transaction():
+        for i in range(3000):
+            db.add_task(f"t{i}", datetime(2030, 1, 1, tzinfo=timezone.utc) + timedelta(hours=6 * i))
+    pulled = []
+    rows = db.iter_tasks_between
+
+    def counting(*args, **kwargs):
+        for t in rows(*args, **kwargs):
+            pulled.append(t.id)
+            yield t
+
+    db.iter_tasks_between = counting
+    days = Session(db=db).agenda(date(2030, 1, 1), date(2033, 1, 1), use_local=False)
+    first = next(days)
+    # the first day is out after reading its 4 tasks and the first row of the next day
+    assert len(first.ranked) == 4 and len(pulled) == 5
+    assert sum(len(d.ranked) for d in days) == 3000 - 4
+
+
+def test_agenda_command(tmp_path, monkeypatch, printed):
+    dbfile = tmp_path / "cli.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    db = Database(str(dbfile))
+    db.add_task("Report", _at(3), duration=5, reward=8)
+    db.add_task("Call", _at(3), duration=60)
+    db.add_task("Plan week", _at(5), recur="weekly")
+    db.add_blocked_day("2030-05-04", reason="holiday")
+    from decidrx.cli import build_parser
+
+    def run(*argv):
+        printed.clear()
+        args = build_parser().parse_args(["agenda", *argv])
+        args.func(args)
+        return "\n".join(printed)
+
+    out = run("--from", "2030-05-01", "--to", "2030-05-31", "--limit", "1")
+    lines = [line for line in out.splitlines() if line.strip()]
+    assert lines[0].startswith("Fri 2030-05-03") and "Report" in lines[1] and "+1 more" in lines[2]
+    assert any(line.startswith("Sat 2030-05-04") and line.split()[-2:] == ["blocked", "holiday"] for line in lines)
+    assert "~3 Plan week (every 1 week)" in out and "Sun 2030-05-12" in out
+    assert "No deadlines" in run("--from", "2031-01-01", "--to", "2031-01-02")
+    assert "--to must not be before --from" in run("--from", "2030-05-02", "--to", "2030-05-01")
+    assert "Invalid filter" in run("--where", "reward >")
@@ -0,0 +1,101 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from decidrx.api import Session, Task
+from decidrx.db import Database, shared_database
+
+
+def test_session_add_edit_done(tmp_path):
+    with Session(str(tmp_path / "api.db")) as s:
+        parent = s.add("Report", 2, duration=30, reward=7, tags=["work"])
+        assert isinstance(parent, Task)
+        assert parent.title == "Report" and parent.reward == 7 and parent["duration"] == 30
+        assert s.db.get_tags(parent.id) == ["work"]
+        child = s.add("Draft", 1, duration=10, parent_id=parent.id)
+
+        edited = s.edit(child.id, title="First draft", reward=3)
+        assert (edited.title, edited.reward) == ("First draft", 3)
+        with pytest.raises(ValueError, match="between 0 and 10"):
+            s.edit(child.id, reward=11)
+        with pytest.raises(ValueError):
+            s.edit(child.id, completed=1)
+        with pytest.raises(ValueError, match="No task with id 999"):
+            s.done(999)
+
+        result = s.done(child.id)
+        assert result.task_id == child.id and result.next is None
+        # completing the last subtask completes the parent
+        assert s.get(parent.id).completed == 1
+
+
+
+def test_session_stores_deadlines_in_utc(tmp_path):
+    with Session(str(tmp_path / "utc.db")) as s:
+        due = datetime(2030, 1, 2, 1, 0, tzinfo=timezone(timedelta(hours=5)))
+        t = s.add("Offset", due, duration=20)
+        assert t.deadline == "2030-01-01T20:00:00+00:00"
+        jan1, jan2 = datetime(2030, 1, 1, tzinfo=timezone.utc), datetime(2030, 1, 2, tzinfo=timezone.utc)
+        # range queries, --where and the day counters all see it on Jan 1 (UTC)
+        assert [x.id for x in s.db.get_tasks_between(jan1, jan2)] == [t.id]
+        assert [r.task.id for r in s.rank(where="deadline < '2030-01-02'")] == [t.id]
+        assert s.db.get_day_totals(jan1, jan2) == {date(2030, 1, 1): (1, 20)}
+        edited = s.edit(t.id, deadline=datetime(2030, 1, 3, 0, 30, tzinfo=timezone(timedelta(hours=1))))
+        assert edited.deadline == "2030-01-02T23:30:00+00:00"
+
+def test_session_add_validates_and_rolls_back_tags(tmp_path):
+    with Session(str(tmp_path / "api.db")) as s:
+        with pytest.raises(ValueError, match="Type must be"):
+            s.add("x", type="medium")
+        with pytest.raises(ValueError, match="Deadline must be >= 0"):
+            s.add("x", -1)
+        with pytest.raises(ValueError):
+            s.add("x", tags=[""])
+        assert s.db.stats()["total"] == 0
+
+
+def test_session_rank_quick_tree(tmp_path):
+    with Session(str(tmp_path / "api.db")) as s:
+        p = s.add("Parent", 5, duration=60, reward=5)
+        c1 = s.add("Child one", 1, duration=5, reward=9, parent_id=p.id)
+        s.add("Child two", 3, duration=15, reward=2, parent_id=p.id)
+        other = s.add("Errand", 2, duration=10, reward=4, tags=["home"])
+
+        ranked = s.rank(limit=None)
+        assert [r.score for r in ranked] == sorted((r.score for r in ranked), reverse=True)
+        agg = [r for r in ranked if r.aggregate]
+        assert [r.task.id for r in agg] == [p.id]
+        assert [c.title for c in agg[0].children] == ["Child one", "Child two"]
+        assert len(s.rank(limit=2)) == 2
+        assert [r.task.id for r in s.rank(tags=["home"])] == [other.id]
+
+        quick = s.quick(max_duration=10, leaves=True)
+        assert {q.task.id for q in quick} == {c1.id, other.id}
+        assert {q.task.id: q.parent_title for q in quick}[c1.id] == "Parent"
+
+        tree = s.tree()
+        assert [n.task.id for n in tree] == [p.id, other.id]
+        assert [(n.task.title, d) for n, d in tree[0].walk()] == [("Parent", 0), ("Child one", 1), ("Child two", 1)]
+        assert [n.task.id for n in s.tree(where="duration <= 10")] == [c1.id, other.id]
+
+
+def test_session_calendar_month(tmp_path):
+    with Session(str(tmp_path / "api.db")) as s:
+        due = datetime(2030, 3, 4, 12, 0, tzinfo=timezone.utc)
+        s.add("Weekly", due, recur="weekly")
+        s.db.add_blocked_day(date(2030, 3, 20), reason="trip")
+        view = s.calendar_month(2030, 3, use_local=False)
+    assert view.counts == {date(2030, 3, d): 1 for d in (4, 11, 18, 25)}
+    assert view.blocked == {date(2030, 3, 20): "trip"}
+    assert view.weeks()[0][:2] == [None, None]  # 2030-03-01 is a Friday
+
+
+def test_session_reuses_shared_database(tmp_path):
+    path = str(tmp_path / "api.db")
+    db = Database(path)
+    with shared_database(db), db.transaction():
+        with Session(path) as s:
+            assert s.db is db
+            s.add("Inside", None)
+        # the shared connection stays open after the session closes
+        assert db.stats()["total"] == 1
+    assert Session(db=db).get(1).title == "Inside"
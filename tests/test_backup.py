@@ -0,0 +1,143 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from decidrx import backup
+from decidrx.db import Database
+
+SOON = datetime.now(timezone.utc) + timedelta(days=1)
+
+
+def _titles(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(r[0] for r in conn.execute("SELECT title FROM tasks"))
+    finally:
+        conn.close()
+
+
+def test_paged_backup_lets_other_connections_write(tmp_path):
+    path = str(tmp_path / "live.db")
+    db = Database(path)
+    with db.transaction():
+        for i in range(2000):
+            db.add_task(f"task {i} " + "x" * 200, SOON)
+    writer = sqlite3.connect(path, timeout=0.5)
+    steps = []
+
+    def progress(remaining, total):
+        # between steps the source is unlocked: another connection can read and commit
+        if len(steps) == 3:
+            assert writer.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 2000
+            writer.execute("UPDATE tasks SET title = 'written mid-backup' WHERE id = 1")
+            writer.commit()
+        steps.append(remaining)
+
+    target = backup.snapshot(path, pages=8, progress=progress)
+    assert len(steps) > 10 and steps[-1] == 0
+    # the write restarted the copy, so the backup includes it
+    assert "written mid-backup" in _titles(target)
+    assert len(_titles(target)) == 2000
+    assert os.path.dirname(target) == str(tmp_path / "backups")
+
+
+def test_rotation_compression_and_restore(tmp_path):
+    path = str(tmp_path / "todo.db")
+    db = Database(path)
+    db.add_task("First", SOON)
+    folder = str(tmp_path / "bk")
+    first = backup.snapshot(path, folder, keep=2, compress=True)
+    assert first.endswith(".db.gz")
+    db.add_task("Second", SOON)
+    backup.snapshot(path, folder, keep=2)
+    newest = backup.snapshot(path, folder, keep=2)
+    assert backup.list_backups(path, folder)[0] == newest and len(backup.list_backups(path, folder)) == 2
+    assert not os.path.exists(first)
+
+    first = backup.snapshot(path, folder, keep=None, compress=True)
+    db.add_task("Third", SOON)
+    saved = backup.restore(db, first, folder)
+    assert [t.title for t in db.find_tasks()] == ["First", "Second"]
+    assert _titles(saved) == ["First", "Second", "Third"]
+    # other connections see the restored contents
+    assert _titles(path) == ["First", "Second"]
+
+    bogus = tmp_path / "notes.db"
+    bogus.write_text("not a database")
+    with pytest.raises(ValueError):
+        backup.restore(db, str(bogus), folder)
+    assert [t.title for t in db.find_tasks()] == ["First", "Second"]
+
+
+def test_reset_saves_a_snapshot_first(tmp_path, monkeypatch):
+    path = str(tmp_path / "reset.db")
+    monkeypatch.setenv("DECIDRX_DB", path)
+    Database(path).add_task("Precious", SOON)
+    from decidrx.cli import build_parser
+
+    args = build_parser().parse_args(["reset", "--yes"])
+    args.func(args)
+    assert Database(path).find_tasks() == []
+    [saved] = backup.list_backups(path)
+    assert _titles(saved) == ["Precious"]
+
+    args = build_parser().parse_args(["db", "restore", "--yes"])
+    args.func(args)
+    assert [t.title for t in Database(path).find_tasks()] == ["Precious"]
+
+
+def test_backup_finishes_while_writes_keep_coming(tmp_path):
+    path = str(tmp_path / "busy.db")
+    db = Database(path)
+    with db.transaction():
+        for i in range(500):
+            db.add_task(f"task {i} " + "x" * 200, SOON)
+    writer = sqlite3.connect(path, timeout=0)
+    commits = []
+
+    def progress(remaining, total):
+        # a commit between every step would restart an unpinned copy forever
+        try:
+            writer.execute("UPDATE tasks SET reward = ? WHERE id = 1", (len(commits) % 10,))
+            writer.commit()
+            commits.append(remaining)
+        except sqlite3.OperationalError:
+            writer.rollback()  # the pinned final copy holds writers off
+
+    target = backup.snapshot(path, pages=4, progress=progress)
+    assert len(_titles(target)) == 500
+    assert len(commits) > backup.MAX_RESTARTS
+
+
+def test_restored_database_syncs_again_in_full(tmp_path):
+    from decidrx import sync
+
+    a, b = Database(str(tmp_path / "a.db")), Database(str(tmp_path / "b.db"))
+    task = a.add_task("x", SOON)
+    sync.sync_databases(a, b)
+    folder = str(tmp_path / "bk")
+    snap = backup.snapshot(a.path, folder)
+    there = b.conn.execute("SELECT id FROM tasks").fetchone()[0]
+    b.update_task(there, title="edited on b")
+    sync.sync_databases(a, b)
+    site = sync.site_id(a)
+
+    backup.restore(a, snap, folder)
+    assert a.get_task(task).title == "x"
+    assert sync.site_id(a) != site and a.conn.execute("SELECT COUNT(*) FROM sync_peers").fetchone()[0] == 0
+    pushed, pulled = sync.sync_databases(a, b)
+    assert pulled["updated"] == 1
+    assert a.get_task(task).title == b.get_task(there).title == "edited on b"
+
+
+def test_restoring_the_oldest_backup_keeps_it(tmp_path):
+    path = str(tmp_path / "full.db")
+    db = Database(path)
+    db.add_task("Kept", SOON)
+    folder = str(tmp_path / "bk")
+    backups = [backup.snapshot(path, folder) for _ in range(backup.KEEP)]
+    backup.restore(db, backups[0], folder)
+    assert os.path.exists(backups[0])
+    assert len(backup.list_backups(path, folder)) == backup.KEEP + 1
@@ -0,0 +1,80 @@
+import json
+
+from decidrx.db import Database
+
+
+def _run_batch(tmp_path, monkeypatch, capsys, lines, *flags):
+    dbfile = tmp_path / "test_batch.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    ops = tmp_path / "ops.txt"
+    ops.write_text("\n".join(lines) + "\n")
+    from decidrx.cli import build_parser, run_command
+
+    capsys.readouterr()
+    run_command(build_parser().parse_args(["batch", str(ops), *flags]))
+    out = capsys.readouterr().out
+    return [json.loads(l) for l in out.splitlines()], Database(str(dbfile))
+
+
+def test_batch_runs_commands_in_one_transaction(tmp_path, monkeypatch, capsys):
+    results, db = _run_batch(tmp_path, monkeypatch, capsys, [
+        'add "Buy milk" --duration 5 --tag home',
+        "# comments and blank lines are skipped",
+        "",
+        '["add", "Write report", "--reward", "7"]',
+        '{"argv": ["done", "1"], "id": "req-3"}',
+        "add",
+        "frobnicate",
+        "reset --yes",
+    ])
+    assert [r["line"] for r in results] == [1, 4, 5, 6, 7, 8]
+    assert [r["ok"] for r in results] == [True, True, True, False, False, False]
+    assert results[0]["output"] == "Added task Buy milk (id=1)"
+    assert results[2]["id"] == "req-3"
+    assert "interactive" in results[3]["error"]
+    assert "invalid choice" in results[4]["error"]
+    assert "not available in batch mode" in results[5]["error"]
+    assert db.get_task(1)["completed"] == 1
+    assert db.get_task(2)["reward"] == 7
+    assert db.get_tags(1) == ["home"]
+
+
+def test_atomic_batch_rolls_back_everything(tmp_path, monkeypatch, capsys):
+    results, db = _run_batch(tmp_path, monkeypatch, capsys, ["add A --duration 1", "add", "add B"], "--atomic")
+    assert [r["ok"] for r in results] == [True, False]
+    assert db.get_pending_tasks() == []
+
+
+def test_commands_reporting_an_error_fail_the_line(tmp_path, monkeypatch, capsys):
+    # these handlers print the problem and return a failure status rather than raise
+    results, db = _run_batch(tmp_path, monkeypatch, capsys, [
+        "add A",
+        "done 999",
+        "edit 999 --title x",
+        "remove 999 --yes",
+        "dep add 1 999",
+        "add B --reward 50",
+        "add C",
+    ])
+    assert [r["ok"] for r in results] == [True, False, False, False, False, False, True]
+    assert all("999" in r["error"] for r in results[1:5])
+    assert "reward" in results[5]["error"].lower() and "output" not in results[5]
+    assert [t["title"] for t in db.get_pending_tasks()] == ["A", "C"]
+
+    results, db = _run_batch(tmp_path, monkeypatch, capsys, ["add D", "done 999", "add E"], "--atomic")
+    assert [r["ok"] for r in results] == [True, False]
+    assert [t["title"] for t in db.get_pending_tasks()] == ["A", "C"]
+
+
+def test_failed_command_only_undoes_itself(tmp_path):
+    db = Database(str(tmp_path / "test_savepoint.db"))
+    with db.transaction():
+        db.add_task("kept", None)
+        try:
+            with db.savepoint():
+                db.add_task("undone", None)
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert db.conn.in_transaction
+    assert [t["title"] for t in db.get_pending_tasks()] == ["kept"]
@@ -1,3 +1,4 @@
+import pytest
 from datetime import datetime, timedelta, timezone
 from decidrx.db import Database
 import os
@@ -155,3 +156,156 @@ def test_help_shows_bad(monkeypatch):
     cmd_help(args)
     out = "\n".join(printed)
     assert "bad add" in out or "bad" in out
+
+
+def test_blocked_rules_expand_lazily_into_an_interval_index(tmp_path):
+    from datetime import date
+    from decidrx.blocked import parse_block_rule
+
+    db = Database(str(tmp_path / "rules.db"))
+    weekends = db.add_blocked_rule("weekends", "2026-01-01", reason="rest")
+    db.add_blocked_rule("every other fri", "2026-10-19", reason="off")
+    db.add_blocked_rule("daily", "2026-07-01", "2026-07-14", reason="trip")
+    db.add_blocked_rule("monthly on 31", "2026-01-01", reason="close books")
+    db.add_blocked_day("2026-07-20", reason="holiday")
+    assert str(parse_block_rule("Other Friday", date(2026, 1, 1))) == "every 2 weeks on fri"
+    with pytest.raises(ValueError):
+        db.add_blocked_rule("every fortnight-ish", "2026-01-01")
+
+    index = db.blocked_index(date(2026, 1, 1), date(2031, 1, 1))
+    # one range per weekend, other Friday and month end; the trip is one, weekends inside it included
+    assert len(index.ranges) < 450 and (date(2026, 7, 1), date(2026, 7, 15)) in index.ranges
+    assert date(2030, 6, 15) in index and date(2030, 6, 17) not in index
+    assert index.get(date(2026, 7, 20)) == ("holiday", "1") and index.get(date(2026, 7, 5)) == ("trip", "rule 3")
+    assert index.get(date(2026, 10, 23)) == ("off", "rule 2") and date(2026, 10, 30) not in index
+    assert date(2026, 2, 28) in index and date(2026, 4, 30) in index  # clamped to the month end
+
+    db.remove_blocked_rule(weekends)
+    view = db.blocked_index(date(2026, 11, 1), date(2026, 12, 1))
+    assert [d.day for d in view] == [6, 20, 30]
+    assert [r.id for r in db.get_blocked_rules(date(2026, 8, 1), date(2026, 9, 1))] == [4]  # the trip is over, fridays not begun
+
+
+def test_bad_rules_from_the_command_line(tmp_path, monkeypatch, printed):
+    dbfile = tmp_path / "test_cal5.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    Database(str(dbfile))
+    from decidrx.cli import build_parser
+    from decidrx.commands.calendar import cmd_calendar
+
+    def run(*argv):
+        printed.clear()
+        cmd_calendar(build_parser().parse_args(["calendar", *argv]))
+        return "\n".join(printed)
+
+    assert "(rule id=1)" in run("bad", "add", "2030-05-06", "--until", "2030-05-08", "--reason", "Trip")
+    assert "(rule id=2)" in run("bad", "add", "--every", "sat,sun", "--from", "2030-05-01")
+    assert "Invalid blocked-day rule" in run("bad", "add", "--every", "now and then")
+    out = run("bad", "list", "2030", "5")
+    assert "2030-05-07" in out and "rule 1" in out and "2030-05-25" in out and "2030-05-09" not in out
+    assert "every week on sat,sun" in run("bad", "list")
+    assert "Blocked: Yes — Trip" in run("show", "2030-05-08")
+    assert "🔒" in run("2030", "5")
+    assert "Removed bad-day rule 2" in run("bad", "remove", "--rule", "2")
+    assert "Blocked: No" in run("show", "2030-05-11")
+
+
+def test_day_totals_bucket_by_local_day_across_dst(tmp_path, monkeypatch):
+    import time
+    from datetime import date
+
+    db = Database(str(tmp_path / "totals.db"))
+    utc = lambda s: datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
+    db.add_task("Winter", utc("2030-01-31T23:30:00"), duration=20)  # 00:30 on Feb 1 in Berlin (UTC+1)
+    db.add_task("Summer", utc("2030-06-30T22:30:00"), duration=40)  # 00:30 on Jul 1 in Berlin (UTC+2)
+    db.add_task("Also summer", utc("2030-07-01T09:00:00"))
+    done = db.add_task("Done", utc("2030-07-01T10:00:00"), duration=5)
+    db.mark_done(done)
+    start, end = utc("2030-01-01T00:00:00"), utc("2031-01-01T00:00:00")
+    assert db.get_day_totals(start, end, timezone.utc) == {date(2030, 1, 31): (1, 20), date(2030, 6, 30): (1, 40), date(2030, 7, 1): (1, 0)}
+
+    monkeypatch.setenv("TZ", "Europe/Berlin")
+    time.tzset()
+    try:
+        totals = db.get_day_totals(start, end, include_completed=True)
+        assert totals == {date(2030, 2, 1): (1, 20), date(2030, 7, 1): (3, 45)}
+        from decidrx.api import Session
+        views = Session(db=db).calendar_months(2030, 1, 12)
+        assert [v.month for v in views] == list(range(1, 13))
+        assert views[1].counts == {date(2030, 2, 1): 1} and views[6].minutes == {date(2030, 7, 1): 40}
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+
+def test_year_heatmap(tmp_path, monkeypatch, printed):
+    dbfile = tmp_path / "test_cal6.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    db = Database(str(dbfile))
+    for day in (6, 6, 6, 9):
+        db.add_task("Due", datetime(2030, 5, day, 12, tzinfo=timezone.utc), duration=30)
+    db.add_blocked_rule("every other fri", "2030-05-01")
+    from decidrx.cli import build_parser
+    from decidrx.commands.calendar import cmd_calendar
+
+    cmd_calendar(build_parser().parse_args(["calendar", "--year", "2030"]))
+    out = "\n".join(printed)
+    assert "Calendar: 2030" in out and "2030-01" in out and "2030-12" in out
+    may = next(line for line in out.splitlines() if "2030-05" in line)
+    assert may.split()[-3:-1] == ["4", "120"] and "■" in may and "×" in may
+
+    printed.clear()
+    cmd_calendar(build_parser().parse_args(["calendar", "--months", "3", "2030", "11"]))
+    out = "\n".join(printed)
+    assert "2030-11 to 2031-01" in out and "2031-01" in out
+
+
+def test_deadline_counters_follow_every_write(tmp_path, monkeypatch, printed):
+    import random
+
+    dbfile = tmp_path / "counts.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    db = Database(str(dbfile))
+    rng = random.Random(7)
+    base = datetime(2030, 3, 1, tzinfo=timezone.utc)
+    when = lambda: base + timedelta(minutes=rng.randrange(60 * 24 * 60))
+    ids = [db.add_task(f"t{i}", when() if i % 5 else None, duration=rng.choice([None, 10, 30])) for i in range(60)]
+    for _ in range(200):
+        tid = rng.choice(ids)
+        op = rng.choice(["deadline", "duration", "done", "undone", "clear"])
+        if op == "deadline":
+            db.update_task(tid, deadline=when())
+        elif op == "duration":
+            db.update_task(tid, duration=rng.choice([None, 5, 45]))
+        elif op == "done":
+            db.mark_done(tid)
+        elif op == "undone":
+            db.mark_undone(tid)
+        else:
+            db.update_task(tid, deadline=None)
+    for tid in ids[:10]:
+        db.delete_task(tid, cascade=True)
+    live = sorted(tuple(r) for r in db.conn.execute("SELECT * FROM deadline_day_counts"))
+    db.rebuild_day_counts()
+    assert live == sorted(tuple(r) for r in db.conn.execute("SELECT * FROM deadline_day_counts"))
+    assert sum(r[3] for r in live) == db.conn.execute("SELECT COUNT(*) FROM tasks WHERE deadline IS NOT NULL").fetchone()[0]
+
+    # whole-hour ranges are answered from the counters, others by scanning tasks: same totals
+    start, end, tz = base, base + timedelta(days=90), timezone(timedelta(hours=-5))
+    assert db.get_day_totals(start, end, tz, include_completed=True) == db.get_day_totals(
+        start, end - timedelta(seconds=1), tz, include_completed=True)
+    db.conn.execute("UPDATE deadline_day_counts SET n = n + 100 WHERE (day, hour, completed) = (?, ?, ?)", live[0][:3])
+    db.commit()
+    assert sum(n for n, _ in db.get_day_totals(start, end, tz, include_completed=True).values()) == sum(r[3] for r in live) + 100
+
+    from decidrx.cli import build_parser
+    args = build_parser().parse_args(["db", "rebuild-counts"])
+    args.func(args)
+    assert "1 corrected" in "\n".join(printed)
+    assert sorted(tuple(r) for r in db.conn.execute("SELECT * FROM deadline_day_counts")) == live
+
+    # a database from before the counters gets them filled on open
+    db.conn.execute("DROP TABLE deadline_day_counts")
+    db.commit()
+    reopened = Database(str(dbfile))
+    assert sorted(tuple(r) for r in reopened.conn.execute("SELECT * FROM deadline_day_counts")) == live
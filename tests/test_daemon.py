@@ -0,0 +1,111 @@
+import asyncio
+import io
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from decidrx import client, daemon
+from decidrx.db import Database
+
+
+@pytest.fixture
+def served(tmp_path, monkeypatch):
+    path = str(tmp_path / "tasks.db")
+    sock = str(tmp_path / "d.sock")
+    monkeypatch.setenv("DECIDRX_DB", path)
+    monkeypatch.delenv("DECIDRX_DBS", raising=False)
+    Database(path).add_task("Existing", datetime.now(timezone.utc) + timedelta(days=3), duration=30, reward=2)
+    ready = threading.Event()
+    d = daemon.Daemon(path, sock)
+    thread = threading.Thread(target=lambda: asyncio.run(d.run(ready)))
+    thread.start()
+    assert ready.wait(10)
+    yield d
+    daemon.stop(sock)
+    thread.join(10)
+
+
+def _run(sock, argv):
+    out, err = io.StringIO(), io.StringIO()
+    code = client.forward(argv, sock, out, err)
+    return code, out.getvalue(), err.getvalue()
+
+
+def test_commands_run_in_the_daemon(served):
+    sock = served.socket_path
+    code, out, _ = _run(sock, ["add", "Pay rent", "--deadline", "1", "--duration", "5", "--reward", "9"])
+    assert code == 0 and "Added task Pay rent (id=2)" in out
+    code, out, _ = _run(sock, ["now"])
+    assert code == 0 and out.index("Pay rent") < out.index("Existing")
+    code, _, err = _run(sock, ["now", "--bogus"])
+    assert code == 2 and "unrecognized arguments: --bogus" in err
+    code, out, _ = _run(sock, ["done", "999"])
+    assert code == 1 and "999" in out
+    assert served.served == 4
+
+    # a write from another process invalidates the daemon's cached rows
+    Database(served.db_path).add_task("From elsewhere", datetime.now(timezone.utc) + timedelta(hours=1), reward=10)
+    assert "From elsewhere" in _run(sock, ["now"])[1]
+
+
+def test_prompting_and_foreign_commands_fall_back(served, monkeypatch, tmp_path):
+    sock = served.socket_path
+    # `add` without a title prompts: rolled back in the daemon and handed to the client
+    assert _run(sock, ["add"]) == (None, "", "")
+    assert _run(sock, ["batch"])[0] is None
+    assert len(Database(served.db_path).get_pending_tasks()) == 1
+    monkeypatch.setenv("DECIDRX_DB", str(tmp_path / "other.db"))
+    assert _run(sock, ["now"])[0] is None
+    assert _run(str(tmp_path / "nobody.sock"), ["now"])[0] is None
+
+
+def test_concurrent_clients_see_serial_results(served):
+    sock = served.socket_path
+    results = []
+
+    def worker(n):
+        results.append(_run(sock, ["add", f"Job {n}", "--duration", "5"]))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ids = sorted(int(out.split("id=")[1].split(")")[0]) for _, out, _ in results)
+    assert ids == list(range(2, 14))
+    _, out, _ = _run(sock, ["quick", "--limit", "20"])
+    assert all(f"Job {n}" in out for n in range(12))
+
+
+def test_client_only_trusts_private_sockets(served, tmp_path, monkeypatch, capsys):
+    import os
+    import socket
+    import stat
+
+    assert stat.S_IMODE(os.stat(served.socket_path).st_mode) == 0o600
+    assert client.connect(served.socket_path) is not None
+
+    # a socket others can open (or swap out) may belong to someone else: never forward to it
+    loose = str(tmp_path / "loose.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(loose)
+    listener.listen()
+    try:
+        os.chmod(loose, 0o666)
+        assert client.connect(loose) is None
+        assert "not a private socket" in capsys.readouterr().err
+        os.chmod(loose, 0o600)
+        assert client.connect(loose) is not None
+        os.chmod(tmp_path, 0o777)
+        assert not client.owned_socket(loose)
+        os.chmod(tmp_path, 0o1777)
+        assert client.owned_socket(loose)
+    finally:
+        os.chmod(tmp_path, 0o700)
+        listener.close()
+
+    monkeypatch.delenv("DECIDRX_SOCKET", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    default = client.socket_path()
+    assert os.path.basename(os.path.dirname(default)) == f"decidrx-{os.getuid()}"
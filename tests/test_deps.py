@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from decidrx.db import Database
+from decidrx.deps import effective_deadlines, propagate_deadlines
+from decidrx.filters import ReadyFilter, parse_filter
+
+
+def _ids(rows):
+    return {r["id"] for r in rows}
+
+
+def test_dependency_edges_and_cycle_detection(tmp_path):
+    db = Database(str(tmp_path / "test_deps.db"))
+    a = db.add_task("Design", None)
+    b = db.add_task("Build", None)
+    c = db.add_task("Ship", None)
+    assert db.add_dependency(b, a) is True
+    assert db.add_dependency(c, b) is True
+    assert db.add_dependency(c, b) is False  # already present
+
+    with pytest.raises(ValueError):
+        db.add_dependency(a, a)
+    with pytest.raises(ValueError):
+        db.add_dependency(a, c)  # a -> c -> b -> a
+    with pytest.raises(ValueError):
+        db.add_dependency(a, 9999)
+
+    assert _ids(db.get_dependencies(c)) == {b}
+    assert _ids(db.get_dependents(a)) == {b}
+    assert _ids(db.find_tasks(ReadyFilter())) == {a}
+    assert _ids(db.find_tasks(parse_filter("blocked"))) == {b, c}
+
+    db.mark_done(a)
+    assert _ids(db.find_tasks(ReadyFilter())) == {b}
+    assert db.get_pending_dependency_edges() == [(c, b, None, None)]
+
+    assert db.remove_dependency(c, b) == 1
+    db.delete_task(b)
+    assert db.get_dependencies(c) == []
+    assert db.get_dependents(a) == []
+
+
+def test_propagate_deadlines_is_transitive():
+    soon = "2030-01-01T00:00:00+00:00"
+    later = "2030-06-01T00:00:00+00:00"
+    # 3 depends on 2 depends on 1; 4 depends on 1 too
+    deadlines = {1: later, 2: None, 3: soon, 4: None}
+    edges = [(3, 2), (2, 1), (4, 1)]
+    assert propagate_deadlines(deadlines, edges) == {1: soon, 2: soon, 3: soon, 4: None}
+    rows = [(t, d, deadlines[t], deadlines[d]) for t, d in edges]
+    assert effective_deadlines(rows) == {1: soon, 2: soon}
+
+
+def test_now_ready_hides_blocked_and_boosts_prerequisites(tmp_path, monkeypatch):
+    dbfile = tmp_path / "test_deps_now.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    from decidrx import cli
+    from decidrx.cli import build_parser, run_command
+
+    db = Database(str(dbfile))
+    soon = datetime.now(timezone.utc) + timedelta(hours=6)
+    prereq = db.add_task("Get approval", None, reward=1)
+    urgent = db.add_task("Launch", soon, reward=9, penalty=9)
+    other = db.add_task("Tidy desk", None, reward=5)
+    db.add_dependency(urgent, prereq)
+
+    printed = []
+
+    def fake_print(obj, *args, **kwargs):
+        from rich.console import Console
+        c = Console(record=True, width=200)
+        c.print(obj)
+        printed.append(c.export_text())
+
+    monkeypatch.setattr(cli.console, "print", fake_print)
+    run_command(build_parser().parse_args(["now", "--ready"]))
+    out = "\n".join(printed)
+    assert "Launch" not in out
+    # the prerequisite inherits the launch deadline and outranks the unrelated task
+    assert out.index("Get approval") < out.index("Tidy desk")
+    assert other in _ids(db.find_tasks(ReadyFilter()))
@@ -0,0 +1,80 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from decidrx import federation
+from decidrx.db import Database
+
+
+def _two_dbs(tmp_path):
+    now = datetime.now(timezone.utc)
+    acme, globex = str(tmp_path / "acme.db"), str(tmp_path / "globex.db")
+    a = Database(acme)
+    a.add_task("Acme urgent", now + timedelta(hours=2), duration=10, reward=9, penalty=5)
+    a.add_task("Acme later", now + timedelta(days=20), duration=60, reward=1)
+    g = Database(globex)
+    g.add_task("Globex soon", now + timedelta(hours=5), duration=15, reward=8, penalty=2)
+    g.add_task("Globex whenever", None, duration=30, reward=1)
+    return acme, globex
+
+
+def test_now_merges_sources_with_qualified_ids(tmp_path, monkeypatch, printed):
+    acme, globex = _two_dbs(tmp_path)
+    monkeypatch.setenv("DECIDRX_DB", str(tmp_path / "unused.db"))
+    from decidrx.cli import build_parser
+
+    args = build_parser().parse_args(["now", "--db", acme, "--db", globex, "--limit", "3"])
+    args.func(args)
+    text = "\n".join(printed)
+    ids = [line.split("│")[2].strip() for line in text.splitlines() if line.startswith("│")]
+    # top 3 by score across both databases, each source ranked on its own thread
+    assert ids == ["acme:1", "globex:1", "globex:2"]
+
+    printed.clear()
+    monkeypatch.setenv(federation.DBS_ENV, os.pathsep.join([acme, str(tmp_path / "missing.db")]))
+    args = build_parser().parse_args(["quick", "--max-duration", "15"])
+    args.func(args)
+    text = "\n".join(printed)
+    assert "Skipped missing" in text and "no database at" in text
+    assert "acme:1" in text and "Globex" not in text
+    assert not (tmp_path / "missing.db").exists()
+
+
+def test_fan_out_runs_each_source_on_its_own_connection(tmp_path):
+    acme, globex = _two_dbs(tmp_path)
+    seen = []
+
+    def probe(session):
+        seen.append(threading.get_ident())
+        return [r.task.title for r in session.rank(limit=1)]
+
+    results = federation.fan_out([acme, globex], probe)
+    assert [(name, value, err) for name, value, err in results] == [
+        ("acme", ["Acme urgent"], None), ("globex", ["Globex soon"], None)]
+    assert threading.get_ident() not in seen
+
+
+def test_source_names_are_unique():
+    assert federation.source_names(["/a/work.db", "/b/work.db", "/c/home.db"]) == ["a/work", "b/work", "home"]
+    assert federation.source_names(["x.db", "x.db"]) == ["x", "x#2"]
+
+
+def test_calendar_month_sums_sources(tmp_path, monkeypatch, printed):
+    due = datetime(2030, 5, 14, 12, tzinfo=timezone.utc)
+    paths = []
+    for name in ("one", "two"):
+        db = Database(str(tmp_path / f"{name}.db"))
+        db.add_task(f"{name} task", due)
+        paths.append(str(tmp_path / f"{name}.db"))
+    Database(paths[1]).add_blocked_day("2030-05-20", reason="holiday")
+    from decidrx.cli import build_parser
+
+    args = build_parser().parse_args(["calendar", "--db", paths[0], "--db", paths[1], "2030", "5"])
+    args.func(args)
+    text = "\n".join(printed)
+    assert "14 (2)" in text and "20 🔒" in text
+
+    printed.clear()
+    args = build_parser().parse_args(["calendar", "--db", paths[0], "--db", paths[1], "add", "2030-05-21"])
+    args.func(args)
+    assert "only supported for the month view" in "\n".join(printed)
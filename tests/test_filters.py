@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from decidrx.db import Database
+from decidrx.filters import FilterError, parse_filter
+
+
+def _ids(rows):
+    return {r["id"] for r in rows}
+
+
+@pytest.fixture
+def seeded(tmp_path, monkeypatch):
+    dbfile = tmp_path / "test_filters.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    db = Database(str(dbfile))
+    now = datetime.now(timezone.utc)
+    ids = {}
+    ids["proj"] = db.add_task("Project", now + timedelta(days=30), duration=0, reward=5, type="deep")
+    ids["spec"] = db.add_task("Write spec", now + timedelta(days=2), duration=120, reward=8, type="deep", parent_id=ids["proj"])
+    ids["mail"] = db.add_task("Send mail", now + timedelta(hours=5), duration=5, reward=2, parent_id=ids["proj"])
+    ids["review"] = db.add_task("Review spec", None, duration=60, reward=7, type="deep", parent_id=ids["spec"])
+    ids["other"] = db.add_task("Other deep work", now + timedelta(days=3), duration=90, reward=9, type="deep", description="quarterly report")
+    return db, ids
+
+
+def test_compiles_to_parameterized_sql():
+    f = parse_filter("type = deep and (reward > 6 or title ~ 'it\\'s') and not done = true")
+    clause, params = f.sql("t")
+    assert clause == "((t.type = ? AND (t.reward > ? OR t.title LIKE ? ESCAPE '\\')) AND (NOT t.completed = ?))"
+    assert params == ["deep", 6, "%it's%", 1]
+    assert parse_filter("due = null").sql() == ("deadline IS NULL", [])
+    assert parse_filter("   ") is None
+
+
+@pytest.mark.parametrize("bad", ["reward >", "colour = red", "reward > lots", "due < someday", "(type = deep", "duration ~ 5", "under x"])
+def test_rejects_malformed_expressions(bad):
+    with pytest.raises(FilterError):
+        parse_filter(bad)
+
+
+def test_find_tasks_with_fields_dates_and_subtree(seeded):
+    db, ids = seeded
+    assert _ids(db.find_tasks(parse_filter("type = deep and reward > 6"))) == {ids["spec"], ids["review"], ids["other"]}
+    assert _ids(db.find_tasks(parse_filter("due < 1d"))) == {ids["mail"]}
+    assert _ids(db.find_tasks(parse_filter("due < eow or due = null"))) >= {ids["review"]}
+    assert _ids(db.find_tasks(parse_filter(f"under {ids['proj']}"))) == {ids["spec"], ids["mail"], ids["review"]}
+    assert _ids(db.find_tasks(parse_filter(f"under {ids['proj']} and type = deep and reward > 6"))) == {ids["spec"], ids["review"]}
+    assert _ids(db.find_tasks(parse_filter("description ~ report"))) == {ids["other"]}
+    assert _ids(db.find_tasks(parse_filter("parent = null"))) == {ids["proj"], ids["other"]}
+
+
+def test_where_on_now_and_quick(seeded, monkeypatch):
+    db, ids = seeded
+    from decidrx import cli
+    printed = []
+
+    def fake_print(obj, *args, **kwargs):
+        from rich.console import Console
+        c = Console(record=True, width=200)
+        c.print(obj)
+        printed.append(c.export_text())
+
+    monkeypatch.setattr(cli.console, "print", fake_print)
+    from decidrx.cli import build_parser, cmd_now, cmd_quick
+
+    cmd_now(build_parser().parse_args(["now", "--where", "reward >= 9"]))
+    text = "\n".join(printed)
+    assert "Other deep work" in text
+    assert "Send mail" not in text
+
+    printed.clear()
+    cmd_quick(build_parser().parse_args(["quick", "--where", "title ~ nothing-matches"]))
+    assert "Send mail" not in "\n".join(printed)
+
+    printed.clear()
+    cmd_now(build_parser().parse_args(["now", "--where", "reward >>"]))
+    assert "Invalid filter" in "\n".join(printed)
+
+
+def test_where_on_show_nests_matching_subtree(seeded, monkeypatch):
+    db, ids = seeded
+    from decidrx import cli
+    printed = []
+
+    def fake_print(obj, *args, **kwargs):
+        from rich.console import Console
+        c = Console(record=True, width=200)
+        c.print(obj)
+        printed.append(c.export_text())
+
+    monkeypatch.setattr(cli.console, "print", fake_print)
+    from decidrx.cli import build_parser, cmd_show
+
+    cmd_show(build_parser().parse_args(["show", "--where", f"under {ids['proj']} and type = deep"]))
+    text = "\n".join(printed)
+    assert "Write spec" in text
+    assert "└── Review spec" in text
+    assert "Send mail" not in text
+    assert "Other deep work" not in text
+
+
+def test_export_and_bulk_done(seeded, capsys):
+    db, ids = seeded
+    from decidrx.cli import build_parser, run_command
+
+    run_command(build_parser().parse_args(["export", "--where", "type = deep and due != null"]))
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert {r["id"] for r in rows} == {ids["proj"], ids["spec"], ids["other"]}
+
+    run_command(build_parser().parse_args(["done", "--where", f"under {ids['proj']}"]))
+    assert db.get_task(ids["mail"])["completed"] == 1
+    assert db.get_task(ids["review"])["completed"] == 1
+    # all children done -> parent completed by propagation
+    assert db.get_task(ids["proj"])["completed"] == 1
+    assert db.get_task(ids["other"])["completed"] == 0
+
+
+def test_export_includes_recurrence_and_tags(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("DECIDRX_DB", str(tmp_path / "export.db"))
+    db = Database(str(tmp_path / "export.db"))
+    standup = db.add_task("Standup", datetime(2030, 5, 1, 9, tzinfo=timezone.utc), recur="daily")
+    db.add_tags(standup, ["work", "team"])
+    db.add_task("Plain", None)
+    from decidrx.cli import build_parser, run_command
+
+    run_command(build_parser().parse_args(["export"]))
+    rows = {r["title"]: r for r in map(json.loads, capsys.readouterr().out.splitlines())}
+    assert rows["Standup"]["recur"] == "every 1 day" and rows["Standup"]["series_id"] == standup
+    assert rows["Standup"]["tags"] == ["team", "work"] and rows["Plain"]["tags"] == []
+
+    run_command(build_parser().parse_args(["export", "--format", "csv", "--tag", "work"]))
+    lines = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [(r["title"], r["recur"], r["tags"]) for r in lines] == [("Standup", "every 1 day", "team,work")]
@@ -0,0 +1,61 @@
+from datetime import date, datetime, timezone
+
+from decidrx.api import Session
+from decidrx.db import Database
+
+
+def _at(day, hour=12):
+    return datetime(2030, 5, day, hour, tzinfo=timezone.utc)
+
+
+def test_forecast_prefix_sums_and_first_shortfall(tmp_path):
+    db = Database(str(tmp_path / "fc.db"))
+    db.add_task("Late already", datetime(2030, 4, 28, tzinfo=timezone.utc), duration=30)
+    db.add_task("Draft", _at(2), duration=60)
+    done = db.add_task("Done", _at(2), duration=500)
+    db.mark_done(done)
+    db.add_task("Review", _at(4), duration=90)
+    db.add_task("Standup", _at(1, 9), duration=15, recur="daily")
+    db.add_blocked_day("2030-05-03", reason="holiday")
+    db.add_task("Outside", _at(20), duration=999)
+
+    s = Session(db=db)
+    fc = s.forecast(5, 60, start=date(2030, 5, 1), use_local=False)
+    assert fc.days[0] == date(2030, 5, 1) and len(fc.days) == 5
+    assert fc.overdue == (1, 30)
+    assert fc.due == [15, 75, 15, 105, 15]
+    assert fc.demand == [45, 120, 135, 240, 255]
+    assert fc.supply == [60, 120, 120, 180, 240]
+    assert fc.blocked == {date(2030, 5, 3): "holiday"}
+    # day 3 is blocked: 135 min due by then against 120 available
+    assert fc.first_short == 2 and fc.slack(2) == -15
+    assert fc.tightest() == 3
+
+    roomy = s.forecast(5, 240, start=date(2030, 5, 1), use_local=False)
+    assert roomy.first_short is None and roomy.tightest() == 0
+
+
+def test_forecast_command(tmp_path, monkeypatch, printed):
+    dbfile = tmp_path / "cli.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    db = Database(str(dbfile))
+    db.add_task("Essay", _at(3), duration=300)
+    db.add_task("Email", _at(2), duration=10)
+    db.add_blocked_day("2030-05-02", reason="trip")
+    from decidrx.cli import build_parser
+
+    def run(*argv):
+        printed.clear()
+        args = build_parser().parse_args(["forecast", *argv])
+        args.func(args)
+        return "\n".join(printed)
+
+    out = run("--from", "2030-05-01", "--days", "7", "--capacity", "120")
+    assert "Thu 2030-05-02 blocked" in out and "Fri 2030-05-03" in out
+    assert "Over capacity from 2030-05-03: 5h10 due by then, 4h00 available (short 1h10)" in out
+    assert "5h10 due over 7 day(s)" in out and "(6 working day(s), 1 blocked)" in out
+
+    out = run("--from", "2030-05-01", "--days", "7", "--capacity", "480")
+    assert "Capacity covers every deadline. Tightest: 2030-05-02 with 7h50 to spare" in out
+    assert "must be positive" in run("--days", "0")
+    assert "--from must be YYYY-MM-DD" in run("--from", "May 1")
@@ -0,0 +1,118 @@
+import asyncio
+import http.client
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+
+import pytest
+
+from decidrx.db import Database
+from decidrx.httpapi import ApiServer
+
+
+@pytest.fixture
+def api(tmp_path):
+    path = str(tmp_path / "http.db")
+    db = Database(path)
+    soon = datetime.now(timezone.utc) + timedelta(hours=3)
+    parent = db.add_task("Launch", soon, duration=60, reward=8)
+    db.add_task("Write notes", soon, duration=10, reward=4, parent_id=parent)
+    db.add_blocked_day("2030-05-20", reason="holiday")
+    server = ApiServer(path, port=0)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        started.set()
+        loop.run_until_complete(server.serve_forever())
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert started.wait(10)
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+
+    def call(method, target, body=None, headers=None):
+        headers = dict(headers or {})
+        if body is not None:
+            headers.setdefault("Content-Type", "application/json")
+            body = json.dumps(body)
+        conn.request(method, target, body=body, headers=headers)
+        r = conn.getresponse()
+        raw = r.read()
+        return r.status, r.getheader("ETag"), json.loads(raw) if raw else None
+
+    yield call, path
+    conn.close()
+    server.stop()
+    thread.join(10)
+    assert not thread.is_alive()
+
+
+def test_etag_turns_polls_into_304_until_a_write(api):
+    call, path = api
+    status, etag, body = call("GET", "/now?limit=5")
+    assert status == 200 and body[0]["task"]["title"] == "Launch" and body[0]["aggregate"]
+    status, again, body = call("GET", "/now?limit=5", headers={"If-None-Match": etag})
+    assert (status, again, body) == (304, etag, None)
+    # a write from another connection changes the version
+    Database(path).add_task("Elsewhere", None)
+    status, newer, _ = call("GET", "/now?limit=5", headers={"If-None-Match": etag})
+    assert status == 200 and newer != etag
+
+    status, etag, tasks = call("GET", "/tasks")
+    assert [t["title"] for t in tasks] == ["Launch", "Write notes", "Elsewhere"]
+    assert call("POST", "/tasks/3/done", {})[0] == 200
+    assert call("GET", "/tasks", headers={"If-None-Match": etag})[0] == 200
+
+
+def test_task_crud_and_views(api):
+    call, _ = api
+    status, _, task = call("POST", "/tasks", {"title": "Pay rent", "deadline": 1, "duration": 30, "reward": 9, "tags": ["home"]})
+    assert status == 201 and task["id"] == 3 and task["reward"] == 9
+    assert call("GET", "/tasks/3")[2]["tags"] == ["home"]
+    status, _, task = call("PATCH", "/tasks/3", {"title": "Pay the rent", "deadline": "2030-05-14T12:00:00"})
+    assert status == 200 and task["title"] == "Pay the rent" and task["deadline"].startswith("2030-05-14T12:00:00")
+
+    tree = call("GET", "/tasks/1/tree")[2]
+    assert tree["title"] == "Launch" and [c["title"] for c in tree["children"]] == ["Write notes"]
+    month = call("GET", "/calendar/2030/5?utc=1")[2]
+    assert month["counts"] == {"2030-05-14": 1} and month["blocked"] == {"2030-05-20": "holiday"}
+    assert [q["task"]["title"] for q in call("GET", "/quick?max_duration=15")[2]] == ["Write notes"]
+
+    assert call("DELETE", "/tasks/1")[0] == 400  # has a subtask
+    assert call("DELETE", "/tasks/1?cascade=1")[2] == {"deleted": 2}
+    assert call("GET", "/tasks/1")[0] == 404
+
+
+def test_bad_requests(api):
+    call, _ = api
+    assert call("POST", "/tasks", {"title": "x", "reward": "high"})[:2] == (400, None)
+    assert call("POST", "/tasks", {"title": "x", "reward": 11})[2] == {"error": "Reward must be between 0 and 10."}
+    assert call("POST", "/tasks", {"title": "x"}, headers={"Content-Type": "text/plain"})[0] == 415
+    assert call("PATCH", "/tasks/99", {"title": "y"})[0] == 404
+    assert call("GET", "/now?where=bogus+~")[0] == 400
+    assert call("GET", "/nowhere")[0] == 404
+    assert call("PUT", "/tasks/1", {})[0] == 405
+
+
+def test_deadlines_with_an_offset_are_stored_in_utc(api):
+    call, _ = api
+    status, _, task = call("POST", "/tasks", {"title": "Call", "deadline": "2030-01-02T01:00:00+05:00", "duration": 15})
+    assert status == 201 and task["deadline"] == "2030-01-01T20:00:00+00:00"
+    assert call("GET", "/calendar/2030/1?utc=1")[2]["counts"] == {"2030-01-01": 1}
+    where = quote("deadline >= '2030-01-01' and deadline < '2030-01-02'")
+    assert [t["title"] for t in call("GET", f"/tasks?where={where}")[2]] == ["Call"]
+    status, _, task = call("PATCH", f"/tasks/{task['id']}", {"deadline": "2030-01-03T00:30:00+01:00"})
+    assert task["deadline"] == "2030-01-02T23:30:00+00:00"
+
+
+def test_requests_for_other_hosts_are_refused(api):
+    call, _ = api
+    # what a page on a domain re-pointed at 127.0.0.1 would send
+    assert call("GET", "/tasks", headers={"Host": "evil.example:8765"})[:1] == (403,)
+    assert call("POST", "/tasks", {"title": "x"}, headers={"Host": "evil.example"})[0] == 403
+    assert call("GET", "/tasks", headers={"Host": "localhost:1"})[0] == 403
+    assert call("GET", "/tasks")[0] == 200
@@ -0,0 +1,74 @@
+import itertools
+import random
+import time
+
+from decidrx.db import Database
+from decidrx.planner import Item, solve
+
+
+def _brute(items, budget, caps):
+    best = 0.0
+    for r in range(len(items) + 1):
+        for comb in itertools.combinations(items, r):
+            if sum(i.minutes for i in comb) > budget:
+                continue
+            if all(sum(i.minutes for i in comb if i.kind == k) <= c for k, c in caps.items()):
+                best = max(best, sum(i.value for i in comb))
+    return best
+
+
+def test_solve_matches_exhaustive_search():
+    rng = random.Random(7)
+    for _ in range(60):
+        items = [Item(i, rng.uniform(0, 3), rng.randint(1, 40), rng.choice(["deep", "shallow"])) for i in range(10)]
+        caps = rng.choice([{}, {"deep": rng.randint(0, 50)}])
+        budget = rng.randint(10, 100)
+        plan = solve(items, budget, caps)
+        assert plan.optimal and plan.minutes <= budget
+        assert abs(plan.value - _brute(items, budget, caps)) < 1e-9
+
+
+def test_solve_thousands_of_candidates_quickly():
+    rng = random.Random(1)
+    items = [Item(i, rng.uniform(0.05, 3), rng.choice([5, 10, 15, 20, 30, 45, 60, 90]), rng.choice(["deep", "shallow"]))
+             for i in range(3000)]
+    t0 = time.perf_counter()
+    plan = solve(items, 180, {"deep": 60}, time_limit=2.0)
+    assert time.perf_counter() - t0 < 2.5
+    assert plan.minutes <= 180
+    assert sum(i.minutes for i in plan.items if i.kind == "deep") <= 60
+
+
+def test_plan_command_fills_budget_with_leaves(tmp_path, monkeypatch):
+    dbfile = tmp_path / "test_plan.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    from decidrx import cli
+    from decidrx.cli import build_parser, run_command
+
+    db = Database(str(dbfile))
+    parent = db.add_task("Big project", None, duration=5, reward=9)
+    db.add_task("Outline", None, duration=30, reward=8, type="deep", parent_id=parent)
+    db.add_task("Email", None, duration=10, reward=5)
+    db.add_task("Marathon", None, duration=300, reward=10)
+    db.add_task("Someday", None, reward=10)
+
+    printed = []
+
+    def fake_print(obj, *args, **kwargs):
+        from rich.console import Console
+        c = Console(record=True, width=200)
+        c.print(obj)
+        printed.append(c.export_text())
+
+    monkeypatch.setattr(cli.console, "print", fake_print)
+    run_command(build_parser().parse_args(["plan", "--minutes", "45"]))
+    out = "\n".join(printed)
+    assert "Outline" in out and "Email" in out
+    assert "Big project" in out  # shown as the subtask's parent
+    assert "Marathon" not in out
+    assert "40/45 min" in out and "optimal" in out
+    assert "1 task(s) without a duration" in out
+
+    printed.clear()
+    run_command(build_parser().parse_args(["plan", "--minutes", "45", "--max-deep", "0"]))
+    assert "Outline" not in "\n".join(printed)
@@ -0,0 +1,48 @@
+import pstats
+from datetime import datetime, timezone, timedelta
+from decidrx.db import Database
+
+
+def test_profile_flag_prints_phase_breakdown(tmp_path, monkeypatch, capsys):
+    dbfile = tmp_path / "test_profile.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    db = Database(str(dbfile))
+    now = datetime.now(timezone.utc)
+    parent = db.add_task("Profile parent", now + timedelta(days=1), duration=30, reward=3)
+    db.add_task("Profile child", None, duration=10, reward=1, parent_id=parent)
+
+    from decidrx import cli, profiling
+
+    before = cli.console.print
+    cli.main(["--profile", "now"])
+
+    err = capsys.readouterr().err
+    for name in ("db.open", "db.init", "db.query", "db.children", "score", "render", "command", "total"):
+        assert name in err
+    # the profiler is only active for the duration of the command
+    assert profiling.active() is None
+    assert cli.console.print == before
+
+
+def test_profile_out_writes_pstats(tmp_path, monkeypatch, capsys):
+    dbfile = tmp_path / "test_profile_out.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    Database(str(dbfile)).add_task("Quick one", None, duration=5, reward=1)
+    out = tmp_path / "quick.pstats"
+
+    from decidrx import cli
+
+    cli.main(["--profile", "--profile-out", str(out), "quick"])
+
+    assert out.exists()
+    stats = pstats.Stats(str(out))
+    assert any("cmd_quick" in fn for (_, _, fn) in stats.stats)
+
+
+def test_phase_is_noop_without_profiler():
+    from decidrx import profiling
+
+    assert profiling.active() is None
+    with profiling.phase("anything"):
+        pass
+    assert profiling.timed("x")(lambda a: a + 1)(1) == 2
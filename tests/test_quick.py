@@ -0,0 +1,73 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from decidrx.db import Database
+from decidrx.tracing import SQLTracer, max_queries, trace_sql
+
+
+def test_quick_threshold_and_limit(tmp_path, monkeypatch, printed):
+    dbfile = tmp_path / "test_quick.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    db = Database(str(dbfile))
+    now = datetime.now(timezone.utc)
+    short = db.add_task("Five minutes", now + timedelta(hours=3), duration=5, reward=5)
+    medium = db.add_task("Fifteen minutes", None, duration=15, reward=1)
+    db.add_task("Long haul", None, duration=90, reward=9)
+
+    rows = db.get_quick_tasks(10)
+    assert [r["id"] for r in rows] == [short]
+    assert {r["id"] for r in db.get_quick_tasks(20)} == {short, medium}
+
+    from decidrx.cli import build_parser, cmd_quick
+
+    cmd_quick(build_parser().parse_args(["quick", "--limit", "1"]))
+    text = "\n".join(printed)
+    assert "Five minutes" in text
+    assert "Fifteen minutes" not in text
+    assert "Long haul" not in text
+
+
+def test_quick_leaves_surfaces_subtasks_of_large_parents(tmp_path, monkeypatch, printed):
+    dbfile = tmp_path / "test_quick_leaves.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    db = Database(str(dbfile))
+    parent = db.add_task("Big project", None, duration=0, reward=5)
+    leaf = db.add_task("Send kickoff mail", None, duration=5, reward=2, parent_id=parent)
+    db.add_task("Write the spec", None, duration=240, reward=8, parent_id=parent)
+
+    ids = {r["id"] for r in db.get_quick_tasks(20, leaves_only=True)}
+    assert ids == {leaf}
+    # without --leaves the parent's own (tiny) duration qualifies it
+    assert parent in {r["id"] for r in db.get_quick_tasks(20)}
+
+    from decidrx.cli import build_parser, cmd_quick
+
+    with max_queries(2):
+        cmd_quick(build_parser().parse_args(["quick", "--leaves"]))
+    text = "\n".join(printed)
+    assert "Send kickoff mail" in text
+    assert "Big project" in text  # shown in the `under` column
+
+
+@pytest.mark.parametrize("argv", [["quick"], ["quick", "--leaves"]])
+def test_quick_query_uses_duration_index(tmp_path, monkeypatch, printed, argv):
+    dbfile = tmp_path / "plan.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    db = Database(str(dbfile))
+    parent = db.add_task("Parent", None, duration=90)
+    db.add_task("Child", None, duration=5, parent_id=parent)
+    from decidrx.cli import build_parser, run_command
+
+    # the statements exactly as SQLite ran them, parameters filled in, via the --trace-sql tracer
+    ran = []
+    callback = SQLTracer.callback
+    monkeypatch.setattr(SQLTracer, "callback", lambda self, sql: (ran.append(sql), callback(self, sql)))
+    with trace_sql():
+        run_command(build_parser().parse_args(argv))
+    [query] = [sql for sql in ran if "FROM tasks t LEFT JOIN tasks p" in sql]
+    assert ("NOT EXISTS" in query) == ("--leaves" in argv)
+    plan = " | ".join(r[3] for r in db.conn.execute(f"EXPLAIN QUERY PLAN {query}"))
+    assert "SCAN t USING INDEX idx_tasks_pending_duration" in plan
+    if "--leaves" in argv:
+        assert "SEARCH c USING INDEX idx_tasks_parent_id" in plan
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from decidrx.db import Database
+from decidrx.records import Task
+from decidrx.scoring import aggregate_task_for_scoring, score_task
+
+
+def test_task_queries_return_records(tmp_path):
+    db = Database(str(tmp_path / "records.db"))
+    due = datetime(2030, 1, 2, 9, 30, tzinfo=timezone.utc)
+    parent = db.add_task("Parent", due, description="notes", duration=30, reward=4)
+    db.add_task("Child", None, duration=5, parent_id=parent)
+
+    t = db.get_task(parent)
+    assert isinstance(t, Task)
+    assert (t.title, t["reward"], t.get("missing", "x")) == ("Parent", 4, "x")
+    assert t.deadline_dt == due and t.deadline_dt is t.deadline_dt  # decoded once
+    assert dict(t)["description"] == "notes"
+    assert t.replace(reward=9).reward == 9 and t.reward == 4
+
+    quick = db.get_quick_tasks(10)
+    assert [(q.title, q["parent_title"]) for q in quick] == [("Child", "Parent")]
+    assert "parent_title" in quick[0].keys()
+    # other queries keep plain rows
+    assert db.tag_counts() == []
+
+
+def test_partial_and_legacy_rows():
+    t = Task.from_row({"id": 1, "title": "x", "deadline": "2030-01-01T00:00:00", "anchor": "a"})
+    assert t.completed is None and t["anchor"] == "a"
+    assert t.deadline_dt == datetime(2030, 1, 1, tzinfo=timezone.utc)  # naive means UTC
+    assert Task(deadline="garbage").deadline_dt is None
+
+
+def test_scoring_accepts_records_and_dicts():
+    now = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    fields = dict(id=1, title="x", deadline=(now + timedelta(hours=5)).isoformat(), duration=10, reward=5, penalty=2,
+                  created_at=(now - timedelta(days=2)).isoformat())
+    assert score_task(Task(**fields), now) == score_task(fields, now)
+    child = Task(id=2, title="c", deadline=(now + timedelta(hours=1)).isoformat(), duration=5, reward=1)
+    agg = aggregate_task_for_scoring(Task(**fields), [child])
+    assert agg["deadline"] == child.deadline and agg["duration"] == 15
+    assert score_task(agg, now) == score_task(aggregate_task_for_scoring(fields, [dict(child)]), now)
+
+
+def test_projected_task_queries(tmp_path):
+    from decidrx.db import DESCRIPTION_PREVIEW, LIST_COLUMNS, SCORE_COLUMNS
+
+    db = Database(str(tmp_path / "records.db"))
+    parent = db.add_task("Parent", None, description="x" * 5000, duration=5, reward=3)
+    db.add_task("Child", None, description="short", parent_id=parent)
+
+    scored = db.get_pending_tasks(columns=SCORE_COLUMNS)
+    assert sorted((t.title, t.reward, t.description) for t in scored) == [("Child", 0, None), ("Parent", 3, None)]
+    listed = db.find_tasks(columns=LIST_COLUMNS)
+    assert [len(t.description) for t in listed] == [DESCRIPTION_PREVIEW, 5]
+    quick = db.get_quick_tasks(columns=("id", "title"))
+    assert {t.title: t["parent_title"] for t in quick} == {"Parent": None, "Child": "Parent"}
+    # parent_id is always selected so children can be grouped
+    assert [c.title for c in db.get_children_map(columns=("title",))[parent]] == ["Child"]
+    assert db.get_task(parent).description == "x" * 5000
+    with pytest.raises(ValueError):
+        db.find_tasks(columns=("id; DROP TABLE tasks",))
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from decidrx.db import Database
+from decidrx.recurrence import expand_series, parse_rule
+
+
+def _dt(s):
+    return datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
+
+
+def test_parse_rule_and_occurrences():
+    assert str(parse_rule("weekly")) == "every 1 week"
+    assert str(parse_rule("every 2 weeks")) == "every 2 weeks"
+    assert str(parse_rule("3d")) == "every 3 days"
+    with pytest.raises(ValueError):
+        parse_rule("fortnightly-ish")
+
+    monthly = parse_rule("monthly")
+    anchor = _dt("2026-01-31T09:00:00")
+    occ = monthly.occurrences(anchor)
+    # clamped to the month end, but computed from the anchor so it does not drift
+    assert [next(occ) for _ in range(3)] == [anchor, _dt("2026-02-28T09:00:00"), _dt("2026-03-31T09:00:00")]
+    assert monthly.next_after(anchor, _dt("2026-02-28T09:00:00")) == _dt("2026-03-31T09:00:00")
+    assert parse_rule("2d").next_after(anchor, _dt("2026-02-04T00:00:00")) == _dt("2026-02-04T09:00:00")
+
+
+def test_mark_done_materializes_only_the_next_occurrence(tmp_path):
+    db = Database(str(tmp_path / "test_recur.db"))
+    due = datetime.now(timezone.utc) + timedelta(days=1)
+    tid = db.add_task("Water plants", due, reward=3, recur="weekly")
+    db.add_tags(tid, ["home"])
+    with pytest.raises(ValueError):
+        db.add_task("No deadline", None, recur="weekly")
+
+    next_id = db.mark_done(tid)
+    nxt = db.get_task(next_id)
+    assert nxt["completed"] == 0 and nxt["series_id"] == tid and nxt["reward"] == 3
+    assert datetime.fromisoformat(nxt["deadline"]) == due + timedelta(weeks=1)
+    assert db.get_tags(next_id) == ["home"]
+
+    # undo + redo must not create a second successor
+    db.mark_undone(tid)
+    assert db.mark_done(tid) is None
+    assert len(db.get_pending_tasks()) == 1
+
+    # the calendar expands later occurrences virtually from the pending one
+    series = db.get_recurring_series()
+    occ = [o for _, o in expand_series(series, due, due + timedelta(weeks=4))]
+    assert occ == [due + timedelta(weeks=k) for k in (2, 3)]
+    assert len(db.get_pending_tasks()) == 1
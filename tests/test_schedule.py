@@ -0,0 +1,95 @@
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from decidrx.db import Database
+from decidrx.scheduler import Job, schedule, working_days
+
+
+def test_edf_fills_days_and_reports_late_jobs():
+    start = date(2026, 3, 2)
+    days = working_days(start, 5, blocked=[date(2026, 3, 3)])
+    assert date(2026, 3, 3) not in days and len(days) == 4
+    jobs = [
+        Job("later", 60, date(2026, 3, 6)),
+        Job("first", 90, date(2026, 3, 2)),
+        Job("split", 100, date(2026, 3, 4)),
+        Job("whenever", 30),
+    ]
+    plan = schedule(jobs, days, capacity=120)
+    # EDF: first (90) then 30 of split on day 1; blocked 3rd skipped; split finishes on the 4th
+    assert [(j.key, m) for j, m in plan.assignments[start]] == [("first", 90), ("split", 30)]
+    assert plan.finish["split"] == date(2026, 3, 4)
+    assert plan.finish["later"] == plan.finish["whenever"] == date(2026, 3, 5)
+    assert plan.late == []
+
+    plan = schedule(jobs + [Job("huge", 600, date(2026, 3, 5))], days, capacity=120)
+    assert [j.key for j, _ in plan.late] == ["huge", "later"]
+    assert plan.unscheduled and plan.late[0][1] is None
+
+
+def test_jobs_due_after_the_horizon_are_not_late():
+    days = working_days(date(2026, 3, 2), 3, [])
+    far = Job("far", 1000, date(2026, 3, 2) + timedelta(days=200))
+    plan = schedule([far, Job("soon", 500, date(2026, 3, 3))], days, capacity=100)
+    assert [j.key for j in plan.unscheduled] == ["far", "soon"]
+    # "soon" cannot finish by its date inside the horizon; "far" simply did not fit yet
+    assert plan.late == [(plan.unscheduled[1], None)]
+
+
+def test_prerequisites_run_first():
+    days = working_days(date(2026, 3, 2), 3, [])
+    jobs = [Job("b", 60, date(2026, 3, 2)), Job("a", 60, date(2026, 3, 4))]
+    plan = schedule(jobs, days, capacity=60, edges=[("b", "a")])
+    assert plan.finish == {"a": date(2026, 3, 2), "b": date(2026, 3, 3)}
+    assert [j.key for j, _ in plan.late] == ["b"]
+
+
+def test_schedule_scales_to_a_year_of_tasks():
+    rng = random.Random(3)
+    start = date(2026, 1, 1)
+    jobs = [Job(i, rng.randint(5, 120), start + timedelta(days=rng.randint(0, 365))) for i in range(30000)]
+    t0 = time.perf_counter()
+    plan = schedule(jobs, working_days(start, 365, []), capacity=480)
+    assert time.perf_counter() - t0 < 1.0
+    assert len(plan.finish) + len(plan.unscheduled) == len(jobs)
+
+
+def test_schedule_command_renders_overlay_and_infeasible(tmp_path, monkeypatch):
+    dbfile = tmp_path / "test_schedule.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    from decidrx import cli
+    from decidrx.cli import build_parser, run_command
+
+    db = Database(str(dbfile))
+    soon = datetime.now(timezone.utc) + timedelta(hours=1)
+    db.add_task("Too big for today", soon, duration=500)
+    db.add_task("Fits", None, duration=30)
+    db.add_blocked_day(datetime.now().astimezone().date() + timedelta(days=1), reason="trip")
+
+    printed = []
+
+    def fake_print(obj, *args, **kwargs):
+        from rich.console import Console
+        c = Console(record=True, width=200)
+        c.print(obj)
+        printed.append(c.export_text())
+
+    monkeypatch.setattr(cli.console, "print", fake_print)
+    run_command(build_parser().parse_args(["schedule", "--days", "5", "--capacity", "240"]))
+    out = "\n".join(printed)
+    assert "Schedule:" in out and "240m" in out
+    assert "Infeasible deadlines (1)" in out and "Too big for today" in out
+    assert "2 of 2 task(s) scheduled" in out
+
+
+def test_schedule_command_does_not_flag_work_due_after_the_horizon(tmp_path, monkeypatch, printed):
+    dbfile = tmp_path / "far.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    Database(str(dbfile)).add_task("Thesis", datetime.now(timezone.utc) + timedelta(days=200), duration=3000)
+    from decidrx.cli import build_parser, run_command
+
+    run_command(build_parser().parse_args(["schedule", "--days", "3", "--capacity", "100"]))
+    out = "\n".join(printed)
+    assert "1 task(s) do not fit in the next 3 day(s)" in out
+    assert "All deadlines are feasible." in out and "Infeasible" not in out
@@ -0,0 +1,170 @@
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+
+from decidrx import sync
+from decidrx.db import Database
+
+SOON = datetime(2030, 5, 1, 12, tzinfo=timezone.utc)
+
+
+def _snapshot(db):
+    """Tasks keyed by uid with parent/prerequisites as uids, for comparing copies."""
+    uids = dict(db.conn.execute("SELECT task_id, uid FROM sync_ids").fetchall())
+    out = {}
+    for t in db.find_tasks(include_completed=True):
+        deps = sorted(uids[d.id] for d in db.get_dependencies(t.id))
+        out[uids[t.id]] = (t.title, t.deadline, t.duration, t.reward, t.completed, uids.get(t.parent_id),
+                           tuple(db.get_tags(t.id)), tuple(deps))
+    return out
+
+
+def test_two_way_sync_merges_fields_and_deletions(tmp_path):
+    laptop, desktop = Database(str(tmp_path / "laptop.db")), Database(str(tmp_path / "desktop.db"))
+    launch = laptop.add_task("Launch", SOON, duration=60, reward=8)
+    notes = laptop.add_task("Write notes", SOON, duration=10, parent_id=launch)
+    laptop.add_tags(notes, ["work"])
+    laptop.add_dependency(launch, notes)
+    desktop.add_task("Buy milk", None, duration=5)
+
+    pushed, pulled = sync.sync_databases(laptop, desktop)
+    assert (pushed["created"], pulled["created"]) == (2, 1)
+    assert _snapshot(laptop) == _snapshot(desktop) and len(_snapshot(laptop)) == 3
+
+    # different fields of one task edited on each side: both edits survive
+    uid = dict(laptop.conn.execute("SELECT task_id, uid FROM sync_ids").fetchall())[launch]
+    there = desktop.conn.execute("SELECT task_id FROM sync_ids WHERE uid = ?", (uid,)).fetchone()[0]
+    laptop.update_task(launch, reward=3)
+    desktop.update_task(there, duration=90)
+    # the same field on both: the later edit wins
+    laptop.update_task(launch, title="Launch v1")
+    time.sleep(0.01)
+    desktop.update_task(there, title="Launch v2")
+    desktop.add_tags(there, ["big"])
+    laptop.mark_done(notes)
+    sync.sync_databases(laptop, desktop)
+    merged = _snapshot(laptop)
+    assert merged == _snapshot(desktop)
+    assert merged[uid][:4] == ("Launch v2", SOON.isoformat(), 90, 3)
+    assert merged[uid][6] == ("big",)
+    assert laptop.get_task(launch).completed  # the parent completed with its only subtask
+
+    # nothing new: nothing exchanged
+    assert sync.sync_databases(laptop, desktop) == ({"created": 0, "updated": 0, "deleted": 0},) * 2
+    desktop.delete_task(there, cascade=True)
+    assert sync.sync_databases(laptop, desktop)[1]["deleted"] == 2
+    assert _snapshot(laptop) == _snapshot(desktop) and len(_snapshot(laptop)) == 1
+
+
+def test_export_reads_only_changes_since_the_watermark(tmp_path):
+    a, b = Database(str(tmp_path / "a.db")), Database(str(tmp_path / "b.db"))
+    ids = [a.add_task(f"t{i}", SOON + timedelta(hours=i)) for i in range(300)]
+    sync.sync_databases(a, b)
+    a.update_task(ids[7], reward=9)
+    peer = sync.site_id(b)
+    batch = sync.export_changes(a, sync.watermark(a, peer)[0], peer=peer)
+    assert [r["fields"]["title"] for r in batch["tasks"]] == ["t7"]
+    assert set(batch["tasks"][0]["stamps"]) == {"reward"}
+    # applying the same batch again is a no-op
+    assert sync.apply_changes(b, batch)["updated"] == 1
+    assert sync.apply_changes(b, batch)["updated"] == 0
+
+
+def test_copied_file_and_directory_transport(tmp_path):
+    laptop = Database(str(tmp_path / "laptop.db"))
+    laptop.add_task("Shared before the copy", SOON)
+    shutil.copy(laptop.path, tmp_path / "desktop.db")
+    desktop = Database(str(tmp_path / "desktop.db"))
+    phone = Database(str(tmp_path / "phone.db"))
+    laptop.add_task("From laptop", SOON)
+    desktop.add_task("From desktop", SOON)
+    phone.add_task("From phone", None)
+
+    folder = str(tmp_path / "box")
+    for _ in range(2):
+        for db in (laptop, desktop, phone):
+            sync.sync_directory(db, folder)
+    titles = sorted(v[0] for v in _snapshot(laptop).values())
+    # the copy got its own site id, and the task from before the copy is not duplicated
+    assert titles == ["From desktop", "From laptop", "From phone", "Shared before the copy"]
+    assert _snapshot(laptop) == _snapshot(desktop) == _snapshot(phone)
+    assert sync.site_id(laptop) != sync.site_id(desktop)
+    assert sync.sync_directory(phone, folder) == (0, {"created": 0, "updated": 0, "deleted": 0})
+
+
+def test_compaction_keeps_what_peers_lack_and_late_peers_get_everything(tmp_path):
+    a, b = Database(str(tmp_path / "a.db")), Database(str(tmp_path / "b.db"))
+    ids = [a.add_task(f"t{i}", SOON) for i in range(5)]
+    sync.sync_databases(a, b)
+    a.update_task(ids[0], reward=4)
+    a.delete_task(ids[1])
+    unsent = a.last_change() - sync.watermark(a, sync.site_id(b))[0]
+    assert a.compact_changes() > 0
+    # what b has not received yet stays in the feed
+    assert len(a.changes_since(sync.watermark(a, sync.site_id(b))[0])) == unsent
+    sync.sync_databases(a, b)
+    assert a.compact_changes() > 0 and len(a.changes_since(0)) == 1
+    # deletions are remembered even though every peer has them
+    assert a.conn.execute("SELECT COUNT(*) FROM sync_tombstones").fetchone()[0] == 1
+
+    # a copy that never synced is behind the horizon: it gets every task and deletion
+    c = Database(str(tmp_path / "c.db"))
+    assert sync.sync_databases(a, c)[0]["created"] == 4
+    assert _snapshot(a) == _snapshot(b) == _snapshot(c)
+
+
+def test_db_compact_command(tmp_path, monkeypatch, printed):
+    dbfile = tmp_path / "cli.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    db = Database(str(dbfile))
+    for i in range(3):
+        db.add_task(f"t{i}", SOON)
+    from decidrx import cli
+    args = cli.build_parser().parse_args(["db", "compact"])
+    args.func(args)
+    assert "2 entries removed, 1 kept" in printed[-1]
+    assert db.last_change() == db.changes_horizon() + 1
+    args = cli.build_parser().parse_args(["db", "compact", "--prune-deletions", "30"])
+    args.func(args)
+    assert "Forgot 0 deletion(s) older than 30 day(s)" in printed[-1]
+
+
+def test_database_from_before_sync_is_sent_in_full_on_first_sync(tmp_path):
+    old = Database(str(tmp_path / "old.db"))
+    for i in range(3):
+        old.add_task(f"t{i}", SOON)
+    for table in ("sync_ids", "sync_stamps", "sync_tombstones", "sync_peers", "sync_meta"):
+        old.conn.execute(f"DROP TABLE {table}")
+    old.conn.execute("DELETE FROM changes")
+    old.commit()
+    old = Database(str(tmp_path / "old.db"))
+    # opening it logs nothing: the tasks are sent because the peer is new
+    assert old.changes_since(0) == []
+    other = Database(str(tmp_path / "other.db"))
+    assert sync.sync_databases(old, other)[0]["created"] == 3
+    assert _snapshot(old) == _snapshot(other)
+
+
+def test_copies_that_never_synced_cannot_bring_deleted_tasks_back(tmp_path):
+    a = Database(str(tmp_path / "a.db"))
+    doomed = a.add_task("Doomed", SOON)
+    a.add_task("Kept", SOON)
+    a.conn.close()
+    for name in ("b", "d", "e"):
+        shutil.copy(tmp_path / "a.db", tmp_path / f"{name}.db")
+    a, b, d, e = (Database(str(tmp_path / f"{name}.db")) for name in "abde")
+    a.delete_task(doomed)
+    sync.sync_databases(a, b)
+    sync.sync_databases(a, b)
+    a.compact_changes()
+    # d was copied before the deletion and never synced: its full batch still has the task
+    pushed, pulled = sync.sync_databases(a, d)
+    assert pulled["created"] == 0 and pushed["deleted"] == 1
+    assert [t.title for t in a.find_tasks()] == [t.title for t in d.find_tasks()] == ["Kept"]
+
+    # with the deletion forgotten, tasks last edited before it are not recreated either
+    sync.sync_databases(a, d)
+    assert a.prune_tombstones(0) == 1
+    assert a.conn.execute("SELECT COUNT(*) FROM sync_tombstones").fetchone()[0] == 0
+    assert sync.sync_databases(a, e)[1]["created"] == 0
+    assert [t.title for t in a.find_tasks()] == ["Kept"]
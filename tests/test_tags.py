@@ -0,0 +1,75 @@
+import pytest
+from decidrx.db import Database
+from decidrx.filters import TagFilter, parse_filter
+
+
+def _ids(rows):
+    return {r["id"] for r in rows}
+
+
+def test_tag_crud_and_intersection(tmp_path):
+    db = Database(str(tmp_path / "test_tags.db"))
+    a = db.add_task("Buy milk", None)
+    b = db.add_task("Fix sink", None)
+    c = db.add_task("Call plumber", None)
+    assert db.add_tags(a, ["Home", "errand"]) == 2
+    assert db.add_tags(a, ["home"]) == 0  # tags are case-insensitive and links unique
+    db.add_tags(b, ["home"])
+    db.add_tags(c, ["errand", "phone"])
+
+    assert db.get_tags(a) == ["errand", "home"]
+    assert _ids(db.find_tasks(TagFilter(["home"]))) == {a, b}
+    assert _ids(db.find_tasks(TagFilter(["home", "errand"]))) == {a}
+    assert _ids(db.find_tasks(TagFilter(["home", "nope"]))) == set()
+    assert _ids(db.find_tasks(parse_filter("tag = errand and not tag = home"))) == {c}
+    assert _ids(db.find_tasks(parse_filter("tag != home"))) == {c}
+
+    assert db.remove_tags(a, ["errand"]) == 1
+    assert db.get_tags_map() == {a: ["home"], b: ["home"], c: ["errand", "phone"]}
+    counts = {r["name"]: (r["pending"], r["total"]) for r in db.tag_counts()}
+    assert counts["home"] == (2, 2)
+
+    db.delete_task(c)
+    assert c not in db.get_tags_map()
+
+    with pytest.raises(ValueError):
+        db.add_tags(a, ["two words"])
+    with pytest.raises(ValueError):
+        db.add_tags(9999, ["home"])
+
+
+def test_now_ranks_within_tag_set(tmp_path, monkeypatch):
+    dbfile = tmp_path / "test_tags_now.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    from decidrx import cli
+    from decidrx.cli import build_parser, run_command
+
+    monkeypatch.setattr("rich.prompt.Confirm.ask", lambda *a, **k: False)
+    run_command(build_parser().parse_args(["add", "Tagged work", "--reward", "1", "--tag", "client-a"]))
+    run_command(build_parser().parse_args(["add", "Urgent other", "--reward", "9", "--deadline", "0"]))
+
+    printed = []
+
+    def fake_print(obj, *args, **kwargs):
+        from rich.console import Console
+        c = Console(record=True, width=200)
+        c.print(obj)
+        printed.append(c.export_text())
+
+    monkeypatch.setattr(cli.console, "print", fake_print)
+    run_command(build_parser().parse_args(["now", "--tag", "client-a"]))
+    text = "\n".join(printed)
+    assert "Tagged work" in text
+    assert "Urgent other" not in text
+
+    printed.clear()
+    run_command(build_parser().parse_args(["tag", "list"]))
+    assert "client-a" in "\n".join(printed)
+
+
+def test_tag_filter_uses_indexes(tmp_path):
+    db = Database(str(tmp_path / "test_tags_plan.db"))
+    clause, params = TagFilter(["a", "b"]).sql()
+    plan = " ".join(r[3] for r in db.conn.execute(f"EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE {clause}", params))
+    assert "SCAN task_tags" not in plan
+    assert "SCAN tasks" not in plan
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from decidrx.db import Database
+from decidrx.tracing import max_queries, normalize_sql, trace_sql
+
+
+def _seed(db, parents=20, children=3):
+    now = datetime.now(timezone.utc)
+    for i in range(parents):
+        p = db.add_task(f"Parent {i}", now + timedelta(days=i + 1), duration=30, reward=3)
+        for j in range(children):
+            db.add_task(f"Child {i}.{j}", None, duration=10, reward=1, parent_id=p)
+
+
+def _quiet(monkeypatch):
+    from decidrx import cli
+    monkeypatch.setattr(cli.console, "print", lambda *a, **k: None)
+
+
+def test_normalize_sql_groups_literals():
+    a = normalize_sql("SELECT * FROM tasks WHERE parent_id = 12   AND title = 'x''y'")
+    b = normalize_sql("SELECT * FROM tasks WHERE parent_id = 7 AND title = 'z'")
+    assert a == b == "SELECT * FROM tasks WHERE parent_id = ? AND title = ?"
+
+
+def test_trace_counts_statements_on_open_db(tmp_path):
+    db = Database(str(tmp_path / "trace.db"))
+    with trace_sql(db) as tracer:
+        tid = db.add_task("Traced", None)
+        db.get_task(tid)
+    assert tracer.queries == 2
+    # the implicit BEGIN/COMMIT around the insert are traced but not counted as queries
+    assert tracer.total > tracer.queries
+    assert any(sql.startswith("INSERT INTO tasks") for sql in tracer.statements)
+
+
+@pytest.mark.parametrize("argv", [["now"], ["show"], ["show", "--all"], ["archive"]])
+def test_listing_commands_do_not_query_per_row(tmp_path, monkeypatch, argv):
+    dbfile = tmp_path / "budget.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    _seed(Database(str(dbfile)))
+    _quiet(monkeypatch)
+
+    from decidrx.cli import build_parser, run_command
+
+    # a constant number of reads, independent of task count (schema setup is not counted)
+    with max_queries(5):
+        run_command(build_parser().parse_args(argv))
+
+
+def test_max_queries_reports_offenders(tmp_path):
+    db = Database(str(tmp_path / "offender.db"))
+    _seed(db, parents=5, children=0)
+    with pytest.raises(AssertionError) as exc:
+        with max_queries(2, db):
+            for t in db.get_pending_tasks():
+                db.get_children(t["id"])
+    assert "SELECT * FROM tasks WHERE parent_id = ? ORDER BY id" in str(exc.value)
+
+
+def test_trace_sql_flag_prints_summary(tmp_path, monkeypatch, capsys):
+    dbfile = tmp_path / "flag.db"
+    monkeypatch.setenv("DECIDRX_DB", str(dbfile))
+    _seed(Database(str(dbfile)), parents=2, children=1)
+
+    from decidrx import cli, tracing
+
+    cli.main(["--trace-sql", "now"])
+    err = capsys.readouterr().err
+    assert "queries" in err
+    assert "SELECT id, title, deadline, duration" in err  # projected ranking query
+    assert tracing.active() is None
@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from decidrx import __version__, update_checker
+from decidrx.update_checker import check_for_updates, is_newer, parse_version, StartupCheck
+
+
+@pytest.fixture
+def release_server():
+    """Local stand-in for the GitHub releases endpoint."""
+    state = {"tag": "v99.0.0", "etag": '"r1"', "delay": 0.0, "status": 200, "requests": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["requests"].append(self.headers.get("If-None-Match"))
+            if state["delay"]:
+                time.sleep(state["delay"])
+            if state["status"] != 200:
+                self.send_response(state["status"])
+                self.end_headers()
+                return
+            if self.headers.get("If-None-Match") == state["etag"]:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = json.dumps({"tag_name": state["tag"]}).encode()
+            self.send_response(200)
+            self.send_header("ETag", state["etag"])
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{server.server_address[1]}/releases/latest"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_versions_compare_numerically():
+    assert is_newer("0.10", "0.9")
+    assert is_newer("v1.2.0", "1.1.9")
+    assert not is_newer("v1.0", "1.0.0")
+    assert is_newer("1.0.0", "1.0.0rc1")
+    assert parse_version("v0.2.1") == parse_version("0.2.1")
+
+
+def test_check_reports_newer_release_and_caches(tmp_path, release_server):
+    cache = tmp_path / "update.json"
+    available, latest, current = check_for_updates(url=release_server["url"], cache_path=str(cache))
+    assert available is True
+    assert latest == "v99.0.0"
+    assert current == __version__
+    assert json.loads(cache.read_text())["etag"] == '"r1"'
+
+    # a forced re-check sends If-None-Match and accepts the 304
+    available, latest, _ = check_for_updates(url=release_server["url"], cache_path=str(cache), force=True)
+    assert (available, latest) == (True, "v99.0.0")
+    assert release_server["requests"] == [None, '"r1"']
+
+    # within the TTL the cache answers without any request
+    check_for_updates(url=release_server["url"], cache_path=str(cache))
+    assert len(release_server["requests"]) == 2
+
+
+def test_check_times_out_instead_of_hanging(tmp_path, release_server):
+    release_server["delay"] = 3.0
+    t0 = time.perf_counter()
+    available, msg, _ = check_for_updates(url=release_server["url"], cache_path=str(tmp_path / "u.json"), timeout=0.3)
+    assert available is None
+    assert msg == "Timed out after 0.3s"
+    assert time.perf_counter() - t0 < 2.5
+
+
+def test_check_reports_missing_releases(tmp_path, release_server):
+    release_server["status"] = 404
+    available, msg, _ = check_for_updates(url=release_server["url"], cache_path=str(tmp_path / "u.json"))
+    assert available is None
+    assert "No releases" in msg
+
+
+def test_startup_check_refreshes_in_background(tmp_path, release_server):
+    cache = tmp_path / "update.json"
+    check = StartupCheck(url=release_server["url"], cache_path=str(cache))
+    # nothing cached yet: no notice, refresh happens on a thread
+    assert check.start() is None
+    check.thread.join(5)
+    assert json.loads(cache.read_text())["tag"] == "v99.0.0"
+
+    again = StartupCheck(url=release_server["url"], cache_path=str(cache))
+    assert again.start() == "v99.0.0"
+    assert again.thread is None
+
+
+def test_failed_background_check_is_cached_too(tmp_path, release_server):
+    cache = tmp_path / "update.json"
+    release_server["status"] = 500
+    check = StartupCheck(url=release_server["url"], cache_path=str(cache))
+    assert check.start() is None
+    check.thread.join(5)
+    assert len(release_server["requests"]) == 1 and "checked_at" in json.loads(cache.read_text())
+
+    # offline or failing upstream: later commands do not try (or wait) again until the TTL passes
+    again = StartupCheck(url=release_server["url"], cache_path=str(cache))
+    assert again.start() is None and again.thread is None
+    stale = StartupCheck(url=release_server["url"], cache_path=str(cache), ttl=0)
+    stale.start()
+    stale.thread.join(5)
+    assert len(release_server["requests"]) == 2
+
+
+def test_update_command_uses_configured_url(tmp_path, monkeypatch, release_server):
+    monkeypatch.setenv(update_checker.URL_ENV, release_server["url"])
+    monkeypatch.setenv(update_checker.CACHE_ENV, str(tmp_path / "u.json"))
+    from decidrx import cli
+    printed = []
+    monkeypatch.setattr(cli.console, "print", lambda obj, *a, **k: printed.append(str(obj)))
+
+    cli.main(["update"])
+    assert any("v99.0.0" in p for p in printed)
@@ -0,0 +1,117 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from decidrx.api import LiveRanking, Session
+from decidrx.commands.watch import _on_change, watch
+from decidrx.db import Database
+
+NOW = datetime(2030, 5, 1, 12, tzinfo=timezone.utc)
+
+
+def _entries(ranked):
+    return sorted((round(r.score, 9), r.task.id, r.aggregate, tuple(c.id for c in r.children)) for r in ranked)
+
+
+def test_triggers_append_to_the_change_feed(tmp_path):
+    db = Database(str(tmp_path / "feed.db"))
+    a = db.add_task("A", None)
+    b = db.add_task("B", None, parent_id=a)
+    db.add_tags(b, ["x"])
+    db.add_dependency(a, b)
+    db.mark_done(b)
+    db.add_blocked_day("2030-05-20")
+    db.delete_task(a, cascade=True)
+    rows = db.changes_since(0)
+    assert [r["seq"] for r in rows] == sorted(r["seq"] for r in rows)
+    logged = {(r["tbl"], r["op"]) for r in rows}
+    assert {("tasks", "insert"), ("task_tags", "insert"), ("task_deps", "insert"), ("tasks", "update"),
+            ("completions", "insert"), ("blocked_days", "insert"), ("tasks", "delete")} <= logged
+    assert db.last_change() == rows[-1]["seq"]
+    assert db.changes_since(db.last_change()) == []
+
+
+def test_live_ranking_matches_full_rank_after_random_writes(tmp_path):
+    rng = random.Random(7)
+    db = Database(str(tmp_path / "live.db"))
+    for i in range(40):
+        parent = rng.choice([None, None, *range(1, i + 1)]) if i else None
+        db.add_task(f"t{i}", NOW + timedelta(hours=rng.randint(1, 500)), duration=rng.randint(1, 90),
+                    reward=rng.randint(0, 10), penalty=rng.randint(0, 10), parent_id=parent)
+    session = Session(db=db)
+    live = LiveRanking(session)
+    tagged = LiveRanking(session, where="reward > 3", tags=None)
+    live.refresh(NOW)
+    tagged.refresh(NOW)
+    sizes = []
+    for step in range(60):
+        ids = [t.id for t in db.get_pending_tasks(columns=("id",))]
+        op = rng.choice(["add", "add", "edit", "edit", "done", "move", "delete", "dep"]) if ids else "add"
+        tid = rng.choice(ids) if ids else None
+        if op == "add":
+            db.add_task(f"n{step}", NOW + timedelta(hours=rng.randint(1, 500)), duration=5, reward=rng.randint(0, 10),
+                        parent_id=rng.choice([None, tid]))
+        elif op == "edit":
+            db.update_task(tid, deadline=NOW + timedelta(hours=rng.randint(1, 500)), reward=rng.randint(0, 10))
+        elif op == "done":
+            db.mark_done(tid)
+        elif op == "move":
+            new_parent = rng.choice(ids)
+            if new_parent not in db.get_descendant_ids([tid]) + [tid]:
+                db.update_task(tid, parent_id=new_parent)
+        elif op == "delete":
+            db.delete_task(tid, cascade=True)
+        else:
+            try:
+                db.add_dependency(tid, rng.choice(ids))
+            except ValueError:
+                pass  # would close a cycle
+        sizes.append(len(live.update(NOW) or ()) / max(len(live.tasks), 1))
+        tagged.update(NOW)
+        assert _entries(live.top(None)) == _entries(session.rank(None, now=NOW))
+        assert _entries(tagged.top(None)) == _entries(session.rank(None, where="reward > 3", now=NOW))
+    assert live.update(NOW) is None
+    # most writes re-score a handful of tasks, not the whole set
+    assert sorted(sizes)[len(sizes) // 2] < 0.5
+
+
+def test_watch_renders_only_after_changes(tmp_path):
+    db = Database(str(tmp_path / "w.db"))
+    session = Session(db=db)
+    builds = []
+    render = _on_change(session, lambda: builds.append(db.last_change()) or len(builds))
+    writes = iter([None, lambda: db.add_task("New", None), None, lambda: db.add_blocked_day("2030-05-20")])
+
+    def sleep(_):
+        write = next(writes)
+        if write:
+            write()
+
+    frames = list(watch(render, interval=0, rescore=1e9, count=4, sleep=sleep))
+    assert frames == [1, 2, 3]
+
+
+def test_live_ranking_reloads_after_compaction(tmp_path):
+    db = Database(str(tmp_path / "compact.db"))
+    a = db.add_task("A", NOW + timedelta(hours=5), reward=3)
+    session = Session(db=db)
+    live = LiveRanking(session)
+    live.refresh(NOW)
+    db.update_task(a, reward=9)
+    db.add_task("B", NOW + timedelta(hours=2))
+    db.compact_changes()
+    assert live.update(NOW) == {a, a + 1}
+    assert _entries(live.top(None)) == _entries(session.rank(None, now=NOW))
+
+
+def test_triggers_are_recreated_when_the_schema_version_is_older(tmp_path):
+    from decidrx import db as dbmod
+    path = str(tmp_path / "old.db")
+    db = Database(path)
+    db.conn.execute("DROP TRIGGER trg_tasks_stamp_title")
+    db.conn.execute("PRAGMA user_version = 0")
+    db.commit()
+    db.conn.close()
+    db = Database(path)
+    names = {r[0] for r in db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert "trg_tasks_stamp_title" in names and "trg_tasks_stamp" not in names
+    assert db.conn.execute("PRAGMA user_version").fetchone()[0] == dbmod.SCHEMA_VERSION